@@ -0,0 +1,368 @@
+"""
+Local HTTP API for payroll and store costing, for scripts that need month-end figures.
+
+    python api_server.py --port 8502 --workers 4
+
+    POST /payroll?month=11[&format=xlsx]   multipart week files          -> monthly_stats JSON or the XLSX
+    POST /costs?month=11[&format=xlsx]     week files + "costs" JSON part -> location_costs JSON or the XLSX
+    GET  /health
+
+Week files are sent as multipart/form-data parts with a filename (xlsx/csv/tsv/zip);
+files that are not readable week schedules get a 400. "costs" holds {employee:
+monthly cost}, matched to the schedule's names and turned into daily costs exactly
+like the costing tab. Reports run in a pool of pre-forked worker processes,
+requests beyond the pool wait in a bounded queue, and connections are kept alive.
+
+The files of a request are parsed in parallel, one per worker. Each parsed week is
+packed (app.pack_week) into a shared memory segment, and the worker that builds the
+report reads the weeks from there in place; the HTTP process removes the segments.
+"""
+import argparse
+import email.parser
+import email.policy
+import importlib.util
+import io
+import json
+import logging
+import multiprocessing
+import os
+import sys
+import threading
+import warnings
+from concurrent.futures import ProcessPoolExecutor
+from multiprocessing import resource_tracker, shared_memory
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import urlparse, parse_qs, quote
+
+APP_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), "app.py")
+XLSX_MIME = "application/vnd.openxmlformats-officedocument.spreadsheetml.sheet"
+MAX_BODY_BYTES = 64 * 1024 * 1024
+
+# --- Worker Processes ---
+_app = None
+
+def _load_app():
+    """Imports app.py once per worker (the Streamlit page only runs when app.py is the script)."""
+    global _app
+    if _app is None:
+        logging.disable(logging.CRITICAL)
+        warnings.filterwarnings('ignore')
+        spec = importlib.util.spec_from_file_location("payroll_app", APP_PATH)
+        module = importlib.util.module_from_spec(spec)
+        sys.modules["payroll_app"] = module
+        spec.loader.exec_module(module)
+        _app = module
+    return _app
+
+def _warm_up():
+    _load_app()
+    return os.getpid()
+
+def _uploads(files):
+    uploads = []
+    for name, data in files:
+        upload = io.BytesIO(data)
+        upload.name = name
+        upload.size = len(data)
+        uploads.append(upload)
+    return uploads
+
+def _worker_shared_memory(name=None, size=0):
+    """Creates (size) or opens (name) a segment in a worker; the HTTP process owns its removal."""
+    shm = shared_memory.SharedMemory(name=name, create=name is None, size=size)
+    # Every open registers the segment for removal when this worker exits (before Python 3.13)
+    resource_tracker.unregister(shm._name, "shared_memory")
+    return shm
+
+def parse_upload(name, data, data_only_modes):
+    """Parses one uploaded file inside a worker and packs its weeks into shared memory.
+
+    Returns [(week file name, content digest, {data_only: [(sheet title, segment name)]})],
+    one entry per week file (several for a zip). Files that are not readable week
+    schedules raise RequestError.
+    """
+    app = _load_app()
+    if not name.lower().endswith(app.WEEK_FILE_EXTENSIONS + ('.zip',)):
+        raise RequestError(f"Το «{name}» δεν είναι αρχείο xlsx/csv/tsv/zip.")
+    parsed = []
+    segments = []
+    try:
+        try:
+            files = app.expand_week_uploads(_uploads([(name, data)]))
+        except Exception as e:
+            raise RequestError(f"Το «{name}» δεν διαβάστηκε: {e}")
+        if not files:
+            raise RequestError(f"Το «{name}» δεν περιέχει αρχεία εβδομάδων.")
+        for f in files:
+            try:
+                reads = app._parse_week_reads(f, None, values=True in data_only_modes)
+            except Exception as e:
+                raise RequestError(f"Το «{f.name}» δεν διαβάστηκε: {e}")
+            sheets = {}
+            packed_segments = {}
+            for data_only in data_only_modes:
+                file_weeks = reads[data_only]
+                if not any(any(week.months) for _, _, week in file_weeks):
+                    raise RequestError(f"Το «{f.name}» δεν είναι πρόγραμμα εβδομάδας (δεν βρέθηκαν ημερομηνίες στη γραμμή 2).")
+                sheets[data_only] = []
+                for title, ws, week in file_weeks:
+                    # Without formulas both reads are the same sheets, packed once
+                    segment = packed_segments.get(id(ws))
+                    if segment is None:
+                        packed = app.pack_week(ws, week)
+                        shm = _worker_shared_memory(size=len(packed))
+                        segments.append(shm.name)
+                        shm.buf[:len(packed)] = packed
+                        shm.close()
+                        segment = packed_segments[id(ws)] = shm.name
+                    sheets[data_only].append((title, segment))
+            parsed.append((f.name, app.content_digest(f.getvalue()), sheets))
+    except BaseException:
+        release_segments(segments)
+        raise
+    return parsed
+
+def _attach_weeks(app, parsed, data_only, upload_index, opened):
+    """Week list of packed sheets read in place from shared memory (segments are added to `opened`)."""
+    parsed_files = []
+    for name, digest, sheets in parsed:
+        if upload_index.is_duplicate_digest(name, digest):
+            continue
+        file_weeks = []
+        for title, segment in sheets[data_only]:
+            shm = _worker_shared_memory(segment)
+            ws = app.PackedSheet(shm.buf)
+            opened.append((shm, ws))
+            file_weeks.append((title, ws, ws.week))
+        parsed_files.append((name, file_weeks))
+    return app.arrange_weeks(parsed_files, upload_index)
+
+def run_report(kind, parsed, month, monthly_costs, fmt):
+    """Runs one report inside a worker. Returns (status, content type, body bytes, filename)."""
+    app = _load_app()
+    opened = []
+    try:
+        return _run_report(app, kind, parsed, month, monthly_costs, fmt, opened)
+    finally:
+        for shm, ws in opened:
+            ws.release()
+            shm.close()
+
+def _run_report(app, kind, parsed, month, monthly_costs, fmt, opened):
+    upload_index = app.UploadIndex()
+
+    if kind == "payroll":
+        week_list = _attach_weeks(app, parsed, False, upload_index, opened)
+        output, filename, monthly_stats = app.process_payroll(None, month, week_list=week_list)
+        if fmt == "xlsx":
+            return 200, XLSX_MIME, output.getvalue(), filename
+        payload = {'month': month, 'filename': filename, 'monthly_stats': monthly_stats,
+                   'warnings': upload_index.warnings()}
+        return 200, "application/json", json.dumps(payload, ensure_ascii=False).encode('utf-8'), None
+
+    # Worked days come from cached values, the cost sheet from the cells as written
+    value_weeks = _attach_weeks(app, parsed, True, upload_index, opened)
+    work_days, _ = app.scan_cost_inputs(None, month, week_list=value_weeks)
+    # Names are matched like the costing tab's cost tables (clean_name, case and accents)
+    matched, unknown_employees = app.match_cost_table(list(monthly_costs.items()), list(work_days))
+    employee_costs = {}
+    for name, monthly_cost in matched.items():
+        days = work_days.get(name, 0)
+        if monthly_cost > 0:
+            employee_costs[name] = monthly_cost / days if days > 0 else 0.0
+    week_list = _attach_weeks(app, parsed, False, app.UploadIndex(), opened)
+    output, location_costs = app.process_cost_analysis(None, employee_costs, month, week_list=week_list)[:2]
+    filename = f"ΚΟΣΤΟΛΟΓΗΣΗ_ΚΑΤΑΣΤΗΜΑΤΑ_{app.month_names_display.get(month, 'OUTPUT').upper()}.xlsx"
+    if fmt == "xlsx":
+        return 200, XLSX_MIME, output.getvalue(), filename
+    payload = {'month': month, 'location_costs': location_costs, 'total': sum(location_costs.values()),
+               'work_days': work_days, 'unknown_employees': sorted(unknown_employees),
+               'warnings': upload_index.warnings()}
+    return 200, "application/json", json.dumps(payload, ensure_ascii=False).encode('utf-8'), None
+
+def release_segments(names):
+    """Removes shared memory segments (in the HTTP process, or a worker cleaning up after an error)."""
+    for name in names:
+        try:
+            shm = shared_memory.SharedMemory(name=name)
+        except FileNotFoundError:
+            continue
+        shm.close()
+        shm.unlink()
+
+def parsed_segments(parsed):
+    # Both reads of a file without formulas share their segments
+    return list(dict.fromkeys(segment for _, _, sheets in parsed for weeks in sheets.values() for _, segment in weeks))
+
+# --- HTTP Front End ---
+class RequestError(Exception):
+    """Client error reported as a 400 JSON response."""
+
+def parse_multipart(content_type, body):
+    """Returns ([(filename, bytes)], {field: text}) from a multipart/form-data body."""
+    if not content_type.startswith("multipart/form-data"):
+        raise RequestError("Αναμένεται multipart/form-data με τα αρχεία εβδομάδων.")
+    message = email.parser.BytesParser(policy=email.policy.HTTP).parsebytes(
+        b"Content-Type: " + content_type.encode('latin-1') + b"\r\n\r\n" + body
+    )
+    files = []
+    fields = {}
+    for part in message.iter_parts():
+        filename = part.get_filename()
+        data = part.get_payload(decode=True) or b""
+        if filename:
+            files.append((os.path.basename(filename), data))
+        else:
+            fields[part.get_param('name', header='content-disposition')] = data.decode('utf-8')
+    return files, fields
+
+class PayrollAPIHandler(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"   # keep-alive
+    server_version = "ThikiShopPayrollAPI/1.0"
+
+    def log_message(self, format, *args):
+        if not self.server.quiet:
+            super().log_message(format, *args)
+
+    def _send(self, status, content_type, body, filename=None, headers=None):
+        self.send_response(status)
+        self.send_header("Content-Type", content_type)
+        self.send_header("Content-Length", str(len(body)))
+        if filename:
+            self.send_header("Content-Disposition", f"attachment; filename*=UTF-8''{quote(filename)}")
+        for key, value in (headers or {}).items():
+            self.send_header(key, value)
+        self.end_headers()
+        self.wfile.write(body)
+
+    def _send_json(self, status, payload, headers=None):
+        body = json.dumps(payload, ensure_ascii=False).encode('utf-8')
+        self._send(status, "application/json", body, headers=headers)
+
+    def do_GET(self):
+        if urlparse(self.path).path == "/health":
+            self._send_json(200, {'status': 'ok', 'workers': self.server.workers,
+                                  'pending': self.server.pending})
+        else:
+            self._send_json(404, {'error': "Άγνωστο endpoint."})
+
+    def do_POST(self):
+        url = urlparse(self.path)
+        length = int(self.headers.get("Content-Length") or 0)
+        if length > MAX_BODY_BYTES:
+            self.close_connection = True
+            self._send_json(413, {'error': "Πολύ μεγάλο αίτημα."})
+            return
+        body = self.rfile.read(length)
+
+        kind = url.path.strip("/")
+        if kind not in ("payroll", "costs"):
+            self._send_json(404, {'error': "Άγνωστο endpoint."})
+            return
+        try:
+            query = parse_qs(url.query)
+            try:
+                month = int(query.get("month", [""])[0])
+            except ValueError:
+                month = 0
+            if not 1 <= month <= 12:
+                raise RequestError("Το month πρέπει να είναι 1-12.")
+            fmt = query.get("format", ["json"])[0]
+            if fmt not in ("json", "xlsx"):
+                raise RequestError("Το format πρέπει να είναι json ή xlsx.")
+            files, fields = parse_multipart(self.headers.get("Content-Type", ""), body)
+            if not files:
+                raise RequestError("Δεν στάλθηκε κανένα αρχείο εβδομάδας.")
+            monthly_costs = {}
+            if kind == "costs":
+                try:
+                    monthly_costs = {str(k): float(v) for k, v in json.loads(fields.get("costs", "{}")).items()}
+                except (ValueError, TypeError, AttributeError):
+                    raise RequestError("Το πεδίο costs πρέπει να είναι JSON {εργαζόμενος: μηνιαίο κόστος}.")
+                if not monthly_costs:
+                    raise RequestError("Δεν δόθηκε κανένα μηνιαίο κόστος.")
+                if any(cost < 0 for cost in monthly_costs.values()):
+                    raise RequestError("Τα μηνιαία κόστη δεν μπορεί να είναι αρνητικά.")
+        except RequestError as e:
+            self._send_json(400, {'error': str(e)})
+            return
+
+        # Bounded queue: busy workers plus waiting requests
+        if not self.server.slots.acquire(blocking=False):
+            self._send_json(503, {'error': "Ο server είναι απασχολημένος, δοκίμασε ξανά."}, {"Retry-After": "1"})
+            return
+        try:
+            with self.server.pending_lock:
+                self.server.pending += 1
+            status, content_type, payload, filename = self.server.run(kind, files, month, monthly_costs, fmt)
+        except RequestError as e:
+            self._send_json(400, {'error': str(e)})
+            return
+        except Exception as e:
+            self._send_json(500, {'error': str(e)})
+            return
+        finally:
+            with self.server.pending_lock:
+                self.server.pending -= 1
+            self.server.slots.release()
+        self._send(status, content_type, payload, filename)
+
+class PayrollAPIServer(ThreadingHTTPServer):
+    daemon_threads = True
+
+    def __init__(self, address, workers=2, queue_size=16, quiet=False):
+        super().__init__(address, PayrollAPIHandler)
+        self.workers = workers
+        self.quiet = quiet
+        self.slots = threading.BoundedSemaphore(workers + queue_size)
+        self.pending = 0
+        self.pending_lock = threading.Lock()
+        context = multiprocessing.get_context("fork" if sys.platform.startswith("linux") else "spawn")
+        self.executor = ProcessPoolExecutor(max_workers=workers, mp_context=context)
+        # Pre-fork: start every worker and import app.py before the first request
+        for future in [self.executor.submit(_warm_up) for _ in range(workers)]:
+            future.result()
+
+    def run(self, kind, files, month, monthly_costs, fmt):
+        """Parses the files across the workers, then builds the report from shared memory."""
+        data_only_modes = (False,) if kind == "payroll" else (True, False)
+        futures = [self.executor.submit(parse_upload, name, data, data_only_modes) for name, data in files]
+        parsed = []
+        error = None
+        for future in futures:
+            # Collect every file, so the segments of the others are freed if one fails
+            try:
+                parsed.extend(future.result())
+            except Exception as e:
+                error = error or e
+        try:
+            if error:
+                raise error
+            return self.executor.submit(run_report, kind, parsed, month, monthly_costs, fmt).result()
+        finally:
+            release_segments(parsed_segments(parsed))
+
+    def server_close(self):
+        super().server_close()
+        self.executor.shutdown(cancel_futures=True)
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Local HTTP API for payroll and store costing.")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8502)
+    parser.add_argument("--workers", type=int, default=os.cpu_count() or 2)
+    parser.add_argument("--queue", type=int, default=16, help="requests allowed to wait for a worker")
+    parser.add_argument("--quiet", action="store_true")
+    args = parser.parse_args(argv)
+
+    server = PayrollAPIServer((args.host, args.port), workers=args.workers, queue_size=args.queue, quiet=args.quiet)
+    print(f"Payroll API on http://{args.host}:{args.port} ({args.workers} workers)")
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.server_close()
+
+if __name__ == "__main__":
+    main()
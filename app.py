@@ -1,16 +1,41 @@
 import streamlit as st
 import openpyxl
-from openpyxl.styles import PatternFill, Font, Alignment, Border, Side
+from openpyxl.styles import PatternFill, Font, Alignment, Border, Side, NamedStyle
+from openpyxl.formatting.rule import CellIsRule, FormulaRule, ColorScaleRule
+from openpyxl.styles.numbers import BUILTIN_FORMATS, is_date_format, is_timedelta_format
 from openpyxl.utils import get_column_letter
+from openpyxl.utils.cell import coordinate_from_string, column_index_from_string, range_boundaries
+from openpyxl.utils.datetime import from_excel, CALENDAR_WINDOWS_1900, CALENDAR_MAC_1904
+from collections import namedtuple, OrderedDict
+from concurrent.futures import ThreadPoolExecutor
+import threading
+import xml.etree.ElementTree as ET
+import posixpath
+import zipfile
+import time
+import csv
+import datetime
+import hashlib
+import json
+import pickle
+import shutil
+import struct
+import mmap
+from functools import lru_cache
+from contextlib import contextmanager
+from itertools import accumulate
+from array import array
 import re
 import io
 import tempfile
+import unicodedata
 import os
 
 # --- Configuration ---
 FILL_HEADER_GREY = PatternFill(start_color="D9D9D9", end_color="D9D9D9", fill_type="solid")
 FILL_ORANGE = PatternFill(start_color="FFC000", end_color="FFC000", fill_type="solid")
 FILL_LIGHT_ORANGE = PatternFill(start_color="FCE4D6", end_color="FCE4D6", fill_type="solid")
+FILL_EXCLUDED_DAY = PatternFill(start_color="EEEEEE", end_color="EEEEEE", fill_type="solid")
 BORDER_THIN = Side(style='thin', color="000000")
 BORDER_THICK = Side(style='medium', color="000000")
 BORDER_ALL_THIN = Border(left=BORDER_THIN, right=BORDER_THIN, top=BORDER_THIN, bottom=BORDER_THIN)
@@ -21,6 +46,62 @@ FILL_AIGALEO = PatternFill(start_color="E2EFDA", fill_type="solid")
 FILL_PEIRAIAS = PatternFill(start_color="DDEBF7", fill_type="solid")
 FILL_PERISTERI = PatternFill(start_color="F4B084", fill_type="solid")
 
+# Store fill colours in weekday column order (ΡΕΝΤΗΣ, ΑΙΓΑΛΕΩ, ΠΕΙΡΑΙΑΣ, ΠΕΡΙΣΤΕΡΙ)
+STORE_COLORS = {"ΡΕΝΤΗΣ": "FCE4D6", "ΑΙΓΑΛΕΩ": "E2EFDA", "ΠΕΙΡΑΙΑΣ": "DDEBF7", "ΠΕΡΙΣΤΕΡΙ": "F4B084"}
+
+# Month names as shown in the UI and in report file names
+month_names_display = {
+    1: 'Ιανουάριος', 2: 'Φεβρουάριος', 3: 'Μάρτιος', 4: 'Απρίλιος',
+    5: 'Μάιος', 6: 'Ιούνιος', 7: 'Ιούλιος', 8: 'Αύγουστος',
+    9: 'Σεπτέμβριος', 10: 'Οκτώβριος', 11: 'Νοέμβριος', 12: 'Δεκέμβριος'
+}
+
+# Reader engine for week files: "native" streams the sheet XML straight from the zip,
+# "openpyxl" loads the full workbook, "auto" tries native and falls back to openpyxl.
+READER_ENGINE = "auto"
+WEEK_FILE_EXTENSIONS = ('.xlsx', '.csv', '.tsv')
+
+# Payroll output styling: "conditional" writes highlights as sheet-level conditional
+# formatting over shared named styles, "cells" styles every cell individually.
+PAYROLL_OUTPUT_MODE = "conditional"
+
+# Per-session memory bounds for generated workbooks
+ARTIFACT_TTL_SECONDS = 30 * 60
+ARTIFACT_SPILL_BYTES = 2 * 1024 * 1024
+ARTIFACT_SPILL_PREFIX = 'thikishop_'
+SESSION_MEMORY_LIMIT_BYTES = 16 * 1024 * 1024
+DEBUG_COLORS_LIMIT = 500
+
+# Background parsing of uploaded week files (shared by all sessions)
+PARSE_WORKERS = 2
+PARSED_WEEK_CACHE_BYTES = 256 * 1024 * 1024
+PARSED_WEEK_TTL_SECONDS = 3600
+
+# Uploaded .zip limits (uncompressed): per week file and for all week files of one archive
+ZIP_MEMBER_MAX_BYTES = 32 * 1024 * 1024
+ZIP_TOTAL_MAX_BYTES = 256 * 1024 * 1024
+
+# Generated reports cached by (files, month, costs), shared by all sessions.
+# Set REPORT_CACHE_DIR to a folder to keep them across restarts.
+REPORT_CACHE_BYTES = 64 * 1024 * 1024
+REPORT_CACHE_DIR = None
+
+# Folder for everything kept across restarts (run checkpoints, cost tables, overtime ledger).
+# Defaults to the app folder; set THIKISHOP_DATA_DIR to keep them elsewhere (e.g. for tests).
+DATA_DIR = os.environ.get('THIKISHOP_DATA_DIR') or os.path.dirname(os.path.abspath(__file__))
+
+# Month-end runs checkpointed on disk under a run ID, so a lost session can resume
+RUN_CHECKPOINT_DIR = os.path.join(DATA_DIR, 'runs')
+RUN_RETENTION_SECONDS = 7 * 24 * 60 * 60
+
+# Saved monthly cost tables ({month: {employee: monthly cost}}), reused the next month
+COST_TABLE_PATH = os.path.join(DATA_DIR, 'cost_tables.json')
+
+# Year-to-date ledger of every generated payroll month, checked against the annual overtime limit
+OVERTIME_LEDGER_PATH = os.path.join(DATA_DIR, 'overtime_ledger.json')
+ANNUAL_OVERTIME_LIMIT_HOURS = 150
+OVERTIME_WARNING_SHARE = 0.8
+
 def clean_name(name):
     """Removes suffixes like (8ΩΡΟΣ), (4ΩΡΟΣ) and extra spaces."""
     if not name: return ""
@@ -65,6 +146,38 @@ def has_work_content(val_str):
     if val_str in ["NONE", "", "RR", "ΡΕΠΟ", "ΑΝΑΡΡΩΤΙΚΗ"]: return False
     return True
 
+def week_title(file_name):
+    """Strips the (ΕΠΙΘ) suffix and file extension from a week file name."""
+    for ext in WEEK_FILE_EXTENSIONS:
+        file_name = file_name.replace(f"(ΕΠΙΘ){ext}", "").replace(ext, "")
+    return file_name
+
+def is_cost_work(val):
+    """Whether a cell is charged as a worked day in the cost analysis (shifts, Α, ΑΔΕΙΑ, ΑΝΑΡΡΩΤΙΚΗ)."""
+    if val and val not in ["None", "", "RR", "ΡΕΠΟ"]:
+        if "-" in val or val.upper() in ["Α", "A", "ΑΝΑΡΡΩΤΙΚΗ", "ΑΔΕΙΑ"]:
+            return True
+    return False
+
+def resolve_cell_location(c_in, store):
+    """Store a work cell is charged to: the column's store on weekdays, fill colour on Sunday."""
+    # Weekday columns have a fixed store (more reliable than color)
+    if store:
+        return store
+    # Sunday has no store columns: default to the first store, check color just in case
+    location = LAYOUT.sunday_default_store
+    if c_in.fill and hasattr(c_in.fill, 'start_color') and c_in.fill.start_color:
+        try:
+            color = c_in.fill.start_color.index
+            color_clean = str(color).replace("00", "").upper()
+            for store_name, store_color in STORE_COLORS.items():
+                if store_color.replace("00", "") in color_clean:
+                    location = store_name
+                    break
+        except:
+            pass
+    return location
+
 def get_file_date_score(filename):
     """Parses filename for sorting."""
     months = {
@@ -90,17 +203,1213 @@ def get_file_date_score(filename):
     match_num = re.search(r'(\d+)', filename)
     if match_num:
         return int(match_num.group(1))
-        
+
     return 99999
 
-def process_payroll(uploaded_files, target_month):
-    """Main payroll processing function."""
-    
-    # Greek Month Map for Date Parsing
-    greek_months = {
-        'ΙΑΝΟΥΑΡΙΟΥ': 1, 'ΦΕΒΡΟΥΑΡΙΟΥ': 2, 'ΜΑΡΤΙΟΥ': 3, 'ΑΠΡΙΛΙΟΥ': 4, 'ΜΑΙΟΥ': 5, 'ΜΑΪΟΥ': 5,
-        'ΙΟΥΝΙΟΥ': 6, 'ΙΟΥΛΙΟΥ': 7, 'ΑΥΓΟΥΣΤΟΥ': 8, 'ΣΕΠΤΕΜΒΡΙΟυ': 9, 'ΟΚΤΩΒΡΙΟΥ': 10, 'ΝΟΕΜΒΡΙΟΥ': 11, 'ΔΕΚΕΜΒΡΙΟΥ': 12
+# --- Schedule Layout ---
+# The week grid every reader and writer works on, described once:
+#   rows 1..header_rows are headers (day names, dates in date_row, store names),
+#   employees start at first_data_row with their name in column 1,
+#   every weekday has one column per store (in STORE_COLORS order) and Sunday has
+#   sunday_columns columns whose store is given by the cell's fill colour.
+# It is compiled once into per-column lookups, so opening a store only means
+# adding it to STORE_COLORS.
+LayoutColumn = namedtuple('LayoutColumn', 'col day offset store index')
+
+class ScheduleLayout:
+    """A week grid description compiled into column -> (day, store) maps."""
+
+    def __init__(self, stores, sunday_columns=1, header_rows=3, date_row=2, first_data_row=4, first_day_column=2):
+        self.stores = list(stores)
+        self.header_rows = header_rows
+        self.date_row = date_row
+        self.first_data_row = first_data_row
+        self.sunday_index = 6
+        self.day_spans = [len(self.stores)] * 6 + [sunday_columns]
+        self.day_first_columns = []
+        self.day_columns = []    # per day: [LayoutColumn]
+        self.columns = []        # every schedule column in sheet order
+        col = first_day_column
+        for day, span in enumerate(self.day_spans):
+            day_cols = [LayoutColumn(col + k, day, k, None if day == self.sunday_index else self.stores[k],
+                                     len(self.columns) + k)
+                        for k in range(span)]
+            self.day_first_columns.append(col)
+            self.day_columns.append(day_cols)
+            self.columns.extend(day_cols)
+            col += span
+        self.last_data_col = col - 1
+        self.column_store = {c.col: c.store for c in self.columns}
+        self.column_index = {c.col: c.index for c in self.columns}
+
+    @property
+    def sunday_default_store(self):
+        return self.stores[0]
+
+LAYOUT = ScheduleLayout(STORE_COLORS)
+
+# --- Calendar ---
+# Row 2 of every week holds the date of each day in the day's first column.
+# The seven dates are resolved once per distinct row and cached; everything
+# else (month filtering, ordering, holidays) works on real dates.
+GREEK_MONTHS = {
+    'ΙΑΝΟΥΑΡΙΟΥ': 1, 'ΦΕΒΡΟΥΑΡΙΟΥ': 2, 'ΜΑΡΤΙΟΥ': 3, 'ΑΠΡΙΛΙΟΥ': 4, 'ΜΑΙΟΥ': 5, 'ΜΑΪΟΥ': 5,
+    'ΙΟΥΝΙΟΥ': 6, 'ΙΟΥΛΙΟΥ': 7, 'ΑΥΓΟΥΣΤΟΥ': 8, 'ΣΕΠΤΕΜΒΡΙΟΥ': 9, 'ΟΚΤΩΒΡΙΟΥ': 10, 'ΝΟΕΜΒΡΙΟΥ': 11, 'ΔΕΚΕΜΒΡΙΟΥ': 12
+}
+DAY_FIRST_COLUMNS = LAYOUT.day_first_columns
+DAY_SPANS = LAYOUT.day_spans
+
+_SLASH_DATE = re.compile(r'(\d{1,2})\s*/\s*(\d{1,2})(?:\s*/\s*(\d{2,4}))?')
+_GREEK_DATE = re.compile(r'(\d{1,2})\s+(' + '|'.join(GREEK_MONTHS) + r')(?:\s+(\d{4}))?')
+
+class WeekDates:
+    """The seven resolved days of one schedule week (Monday..Sunday)."""
+    __slots__ = ('dates', 'months', 'excluded')
+
+    def __init__(self, dates, months, excluded=frozenset()):
+        self.dates = dates
+        self.months = months
+        self.excluded = excluded
+
+    def excluding(self, day_indices):
+        """Copy of the week with some days left out (e.g. already covered by another file)."""
+        return WeekDates(self.dates, self.months, self.excluded | frozenset(day_indices))
+
+    @property
+    def start(self):
+        return self.dates[0]
+
+    @property
+    def iso_week(self):
+        return self.start.isocalendar()[1] if self.start else None
+
+    def included_days(self, target_month):
+        """Which of the seven days belong to target_month (all, if the week has no dates)."""
+        if not target_month or not any(self.months):
+            included = [True] * 7
+        else:
+            included = [m is None or m == target_month for m in self.months]
+        return [inc and i not in self.excluded for i, inc in enumerate(included)]
+
+def _parse_date_cell(value):
+    """Returns (day, month, year) from a row-2 date cell; day/year may be None."""
+    if value is None or value == "":
+        return None
+    if hasattr(value, 'month'):
+        return value.day, value.month, value.year
+    text = str(value).strip().upper()
+    match = _SLASH_DATE.search(text)
+    if match:
+        day, month, year = match.groups()
+        if 1 <= int(month) <= 12:
+            year = int(year) + 2000 if year and len(year) == 2 else (int(year) if year else None)
+            return int(day), int(month), year
+        return None
+    match = _GREEK_DATE.search(text)
+    if match:
+        year = match.group(3)
+        return int(match.group(1)), GREEK_MONTHS[match.group(2)], int(year) if year else None
+    for m_name, m_val in GREEK_MONTHS.items():
+        if m_name in text:
+            return None, m_val, None
+    return None
+
+def _infer_year(day, month, weekday, today):
+    """Picks the year (closest to today) in which day/month falls on the given weekday."""
+    for offset in (0, -1, 1, -2, 2):
+        year = today.year + offset
+        try:
+            if datetime.date(year, month, day).weekday() == weekday:
+                return year
+        except ValueError:
+            continue
+    return today.year
+
+def resolve_week_dates(date_cells, today=None):
+    """Resolves the seven row-2 date cells of a week to WeekDates (cached per distinct row and day)."""
+    return _resolve_week_dates(date_cells, today or datetime.date.today())
+
+# Dates without a year depend on today, so today is part of the cache key
+@lru_cache(maxsize=1024)
+def _resolve_week_dates(date_cells, today):
+    parsed = [_parse_date_cell(v) for v in date_cells]
+
+    anchor = None
+    for i, p in enumerate(parsed):
+        if p and p[0]:
+            day, month, year = p
+            if year is None:
+                year = _infer_year(day, month, i, today)
+            try:
+                anchor = datetime.date(year, month, day) - datetime.timedelta(days=i)
+                break
+            except ValueError:
+                continue
+
+    if anchor:
+        dates = [anchor + datetime.timedelta(days=i) for i in range(7)]
+        return WeekDates(dates, [d.month for d in dates])
+    # Month names without a day number: keep month-level filtering only
+    return WeekDates([None] * 7, [p[1] if p else None for p in parsed])
+
+def read_week_dates(ws):
+    """Resolves the dates of a loaded week sheet."""
+    return resolve_week_dates(tuple(ws.cell(row=LAYOUT.date_row, column=col).value for col in DAY_FIRST_COLUMNS))
+
+def week_include_col_map(week, target_month):
+    """Maps every day column of the layout to whether it belongs to target_month."""
+    included = week.included_days(target_month)
+    return {c.col: included[c.day] for c in LAYOUT.columns}
+
+def week_sort_key(file_name, week):
+    """Orders weeks by their real start date; undated weeks go last, by filename."""
+    if week.start:
+        return (0, week.start.toordinal())
+    return (1, get_file_date_score(file_name))
+
+def orthodox_easter(year):
+    """Orthodox Easter Sunday (Meeus Julian algorithm, valid 1900-2099)."""
+    a, b, c = year % 4, year % 7, year % 19
+    d = (19 * c + 15) % 30
+    e = (2 * a + 4 * b - d + 34) % 7
+    month = (d + e + 114) // 31
+    day = (d + e + 114) % 31 + 1
+    return datetime.date(year, month, day) + datetime.timedelta(days=13)
+
+@lru_cache(maxsize=32)
+def greek_public_holidays(year):
+    """Returns {date: name} of Greek public holidays (ΑΡΓΙΕΣ) for a year."""
+    easter = orthodox_easter(year)
+    return {
+        datetime.date(year, 1, 1): "Πρωτοχρονιά",
+        datetime.date(year, 1, 6): "Θεοφάνια",
+        easter - datetime.timedelta(days=48): "Καθαρά Δευτέρα",
+        datetime.date(year, 3, 25): "25η Μαρτίου",
+        easter - datetime.timedelta(days=2): "Μεγάλη Παρασκευή",
+        easter + datetime.timedelta(days=1): "Δευτέρα του Πάσχα",
+        datetime.date(year, 5, 1): "Πρωτομαγιά",
+        easter + datetime.timedelta(days=50): "Αγίου Πνεύματος",
+        datetime.date(year, 8, 15): "Κοίμηση της Θεοτόκου",
+        datetime.date(year, 10, 28): "28η Οκτωβρίου",
+        datetime.date(year, 12, 25): "Χριστούγεννα",
+        datetime.date(year, 12, 26): "Σύναξη της Θεοτόκου",
     }
+
+def holiday_name(day):
+    """Name of the public holiday on a date, or None."""
+    return greek_public_holidays(day.year).get(day)
+
+class ScheduleCalendar:
+    """Date index over a batch of weeks: date -> (week key, day index, first column) in O(1)."""
+
+    def __init__(self):
+        self._by_date = {}
+        self.weeks = {}
+
+    def add_week(self, key, week):
+        """Registers a week; returns the dates already claimed by other weeks."""
+        self.weeks[key] = week
+        overlaps = []
+        for day_idx, day in enumerate(week.dates):
+            if day is None:
+                continue
+            if day in self._by_date:
+                overlaps.append(day)
+            else:
+                self._by_date[day] = (key, day_idx, DAY_FIRST_COLUMNS[day_idx])
+        return overlaps
+
+    def locate(self, day):
+        return self._by_date.get(day)
+
+    def holidays(self, target_month=None):
+        """Public holidays falling on the calendar's dates (optionally one month only)."""
+        return {d: holiday_name(d) for d in sorted(self._by_date)
+                if holiday_name(d) and (not target_month or d.month == target_month)}
+
+class UploadIndex:
+    """Tracks a batch of week files by content hash and by resolved dates.
+
+    Exact duplicates are skipped before parsing. Days already covered by an
+    earlier week are left out of later ones, so hours and costs are counted once.
+    """
+
+    def __init__(self):
+        self.by_digest = {}
+        self.calendar = ScheduleCalendar()
+        self.duplicates = []   # (file name, kept file name)
+        self.overlaps = []     # (file name, kept file names, [dates])
+
+    def is_duplicate(self, file_obj):
+        return self.is_duplicate_digest(file_obj.name, content_digest(file_obj.getvalue()))
+
+    def is_duplicate_digest(self, file_name, digest):
+        if digest in self.by_digest:
+            self.duplicates.append((file_name, self.by_digest[digest]))
+            return True
+        self.by_digest[digest] = file_name
+        return False
+
+    def claim_week(self, file_name, week):
+        """Registers a week; returns it without already-covered days, or None if fully covered."""
+        overlaps = self.calendar.add_week(file_name, week)
+        if not overlaps:
+            return week
+        owners = sorted({self.calendar.locate(d)[0] for d in overlaps})
+        self.overlaps.append((file_name, owners, overlaps))
+        excluded = [i for i, d in enumerate(week.dates) if d in overlaps]
+        if len(excluded) == 7:
+            return None
+        return week.excluding(excluded)
+
+    def warnings(self):
+        """User-facing messages for skipped duplicates and overlapping weeks."""
+        messages = []
+        for name, kept in self.duplicates:
+            messages.append(f"Το αρχείο '{name}' είναι ίδιο με το '{kept}' και παραλείφθηκε.")
+        for name, owners, dates in self.overlaps:
+            days = ", ".join(d.strftime('%d/%m') for d in dates)
+            messages.append(f"Το αρχείο '{name}' επικαλύπτει το '{', '.join(owners)}' ({days}). Οι ημέρες αυτές μετρήθηκαν μία φορά.")
+        return messages
+
+def content_digest(data):
+    return hashlib.blake2b(data, digest_size=16).hexdigest()
+
+def load_weeks(uploaded_files, data_only=False, engine=None, upload_index=None, skip_errors=False):
+    """Loads every unique week file once; returns [(file_name, ws, WeekDates)] ordered by date.
+
+    A workbook with one sheet per week contributes every week, named "<file> - <sheet>".
+    """
+    upload_index = upload_index if upload_index is not None else UploadIndex()
+    parse_cache = week_parse_cache()
+    parsed_files = []
+    for f in expand_week_uploads(uploaded_files):
+        if upload_index.is_duplicate(f):
+            continue
+        try:
+            parsed_files.append((f.name, parse_cache.get(f, data_only=data_only, engine=engine)))
+        except Exception:
+            if skip_errors:
+                continue
+            raise
+    return arrange_weeks(parsed_files, upload_index)
+
+def arrange_weeks(parsed_files, upload_index):
+    """Names, orders and claims parsed files [(file name, [(sheet title, ws, WeekDates)])] into a week list."""
+    weeks = []
+    for name, file_weeks in parsed_files:
+        if len(file_weeks) == 1:
+            weeks.append((name, file_weeks[0][1], file_weeks[0][2]))
+        else:
+            # One sheet per week: name each week after its sheet
+            for title, ws, week in file_weeks:
+                weeks.append((f"{week_title(name)} - {title}", ws, week))
+    weeks.sort(key=lambda w: week_sort_key(w[0], w[2]))
+
+    claimed = []
+    for file_name, ws, week in weeks:
+        week = upload_index.claim_week(file_name, week)
+        if week is not None:
+            claimed.append((file_name, ws, week))
+    return claimed
+
+# --- Native XLSX Reader ---
+# Week sheets have one known layout, so we only need cell values and the
+# few style attributes the parsers look at (fill colour, header font/alignment).
+# The native engine streams the sheet XML straight from the zip and exposes the
+# same ws.cell(row=, column=) interface the parsers already use.
+_NativeColor = namedtuple('_NativeColor', 'index')
+_NativeFill = namedtuple('_NativeFill', 'start_color')
+_NativeFont = namedtuple('_NativeFont', 'name size')
+_NativeAlignment = namedtuple('_NativeAlignment', 'horizontal vertical wrap_text')
+_NativeCell = namedtuple('_NativeCell', 'value has_style font fill alignment')
+
+class NativeSheet:
+    """Read-only sheet holding only the cells present in the sheet XML."""
+
+    def __init__(self, cells, empty_cell):
+        self._cells = cells
+        self._empty = empty_cell
+
+    def cell(self, row, column):
+        return self._cells.get((row, column), self._empty)
+
+    @property
+    def max_row(self):
+        return max((r for r, _ in self._cells), default=0)
+
+def _local(tag):
+    """Strips the XML namespace from a tag."""
+    return tag.rsplit('}', 1)[-1]
+
+def _attr(element, name):
+    """Gets an attribute regardless of its namespace prefix (e.g. r:id)."""
+    for key, val in element.attrib.items():
+        if _local(key) == name:
+            return val
+    return None
+
+def _resolve_workbook_parts(zf):
+    """Finds the sheets ([(title, path)]), the active tab, shared strings and styles paths plus the date epoch."""
+    rels = {}
+    rel_types = {}
+    with zf.open('xl/_rels/workbook.xml.rels') as f:
+        for _, el in ET.iterparse(f):
+            if _local(el.tag) == 'Relationship':
+                target = el.get('Target')
+                target = target.lstrip('/') if target.startswith('/') else posixpath.normpath(posixpath.join('xl', target))
+                rels[el.get('Id')] = target
+                rel_types[el.get('Type', '').rsplit('/', 1)[-1]] = target
+
+    sheet_ids = []
+    sheet_titles = []
+    active_tab = 0
+    date1904 = False
+    with zf.open('xl/workbook.xml') as f:
+        for _, el in ET.iterparse(f):
+            tag = _local(el.tag)
+            if tag == 'sheet':
+                sheet_ids.append(_attr(el, 'id'))
+                sheet_titles.append(el.get('name'))
+            elif tag == 'workbookView':
+                active_tab = int(el.get('activeTab', 0))
+            elif tag == 'workbookPr':
+                date1904 = el.get('date1904') in ('1', 'true')
+
+    if not sheet_ids:
+        raise ValueError("Workbook has no sheets")
+    if active_tab >= len(sheet_ids):
+        active_tab = 0
+    sheets = [(title, rels[sheet_id]) for title, sheet_id in zip(sheet_titles, sheet_ids)]
+    return sheets, active_tab, rel_types.get('sharedStrings'), rel_types.get('styles'), date1904
+
+def _read_shared_strings(zf, path):
+    """Streams sharedStrings.xml into a list of plain strings."""
+    strings = []
+    if not path or path not in zf.namelist():
+        return strings
+    with zf.open(path) as f:
+        for _, el in ET.iterparse(f):
+            if _local(el.tag) != 'si':
+                continue
+            text = None
+            parts = []
+            for child in el:
+                tag = _local(child.tag)
+                if tag == 't':
+                    text = child.text or ""
+                elif tag == 'r':
+                    for t in child:
+                        if _local(t.tag) == 't':
+                            parts.append(t.text or "")
+            strings.append(text if text is not None else "".join(parts))
+            el.clear()
+    return strings
+
+def _read_cell_styles(zf, path):
+    """Reads styles.xml into one (has_style, font, fill, alignment, date_kind) tuple per cellXfs entry."""
+    default_font = _NativeFont('Calibri', 11.0)
+    default_fill = _NativeFill(_NativeColor('00000000'))
+    default_alignment = _NativeAlignment(None, None, None)
+    if not path or path not in zf.namelist():
+        return [], default_font, default_fill, default_alignment
+
+    root = ET.fromstring(zf.read(path))
+    num_fmts = dict(BUILTIN_FORMATS)
+    fonts = []
+    fills = []
+    xfs = []
+    for section in root:
+        tag = _local(section.tag)
+        if tag == 'numFmts':
+            for nf in section:
+                num_fmts[int(nf.get('numFmtId'))] = nf.get('formatCode', '')
+        elif tag == 'fonts':
+            for font in section:
+                name, size = None, None
+                for prop in font:
+                    prop_tag = _local(prop.tag)
+                    if prop_tag == 'name':
+                        name = prop.get('val')
+                    elif prop_tag == 'sz':
+                        size = float(prop.get('val'))
+                fonts.append(_NativeFont(name, size))
+        elif tag == 'fills':
+            for fill in section:
+                color = '00000000'
+                for pattern in fill:
+                    for fg in pattern:
+                        if _local(fg.tag) != 'fgColor':
+                            continue
+                        if fg.get('rgb'):
+                            rgb = fg.get('rgb').upper()
+                            color = rgb if len(rgb) == 8 else '00' + rgb
+                        elif fg.get('indexed'):
+                            color = int(fg.get('indexed'))
+                        elif fg.get('theme'):
+                            color = int(fg.get('theme'))
+                        elif fg.get('auto'):
+                            color = True
+                fills.append(_NativeFill(_NativeColor(color)))
+        elif tag == 'cellXfs':
+            for xf in section:
+                alignment = default_alignment
+                extra = False
+                for child in xf:
+                    child_tag = _local(child.tag)
+                    if child_tag == 'alignment':
+                        wrap = child.get('wrapText')
+                        alignment = _NativeAlignment(
+                            child.get('horizontal'), child.get('vertical'),
+                            None if wrap is None else wrap in ('1', 'true'))
+                        extra = True
+                    elif child_tag == 'protection':
+                        extra = True
+                ids = [int(xf.get(k, 0)) for k in ('fontId', 'fillId', 'borderId', 'numFmtId', 'xfId')]
+                font_id, fill_id, _, fmt_id, _ = ids
+                fmt = num_fmts.get(fmt_id, '')
+                date_kind = None
+                if fmt and is_date_format(fmt):
+                    date_kind = 'timedelta' if is_timedelta_format(fmt) else 'date'
+                xfs.append((
+                    any(ids) or extra,
+                    fonts[font_id] if font_id < len(fonts) else default_font,
+                    fills[fill_id] if fill_id < len(fills) else default_fill,
+                    alignment,
+                    date_kind,
+                ))
+    base_font = fonts[0] if fonts else default_font
+    base_fill = fills[0] if fills else default_fill
+    return xfs, base_font, base_fill, default_alignment
+
+def read_native_sheet(data, data_only=False):
+    """Streams the active sheet of an .xlsx (bytes) into a NativeSheet."""
+    return read_native_sheets(data, data_only=data_only, active_only=True)[0][1]
+
+def read_native_sheets(data, data_only=False, active_only=False):
+    """Streams the sheets of an .xlsx (bytes); returns [(title, NativeSheet)] with the active sheet first."""
+    with zipfile.ZipFile(io.BytesIO(data)) as zf:
+        sheets, active_tab, strings_path, styles_path, date1904 = _resolve_workbook_parts(zf)
+        # Shared strings and styles are read once for the whole workbook
+        shared_strings = _read_shared_strings(zf, strings_path)
+        styles = _read_cell_styles(zf, styles_path)
+        epoch = CALENDAR_MAC_1904 if date1904 else CALENDAR_WINDOWS_1900
+
+        ordered = [sheets[active_tab]] + ([] if active_only else sheets[:active_tab] + sheets[active_tab + 1:])
+        return [(title, _read_native_sheet_xml(zf, path, shared_strings, styles, epoch, data_only))
+                for title, path in ordered]
+
+def _read_native_sheet_xml(zf, sheet_path, shared_strings, styles, epoch, data_only):
+    """Streams one worksheet XML part into a NativeSheet."""
+    xfs, base_font, base_fill, base_alignment = styles
+    unstyled = (False, base_font, base_fill, base_alignment, None)
+    empty_cell = _NativeCell(None, *unstyled[:4])
+    cells = {}
+    merged = []
+    row_counter = 0
+
+    with zf.open(sheet_path) as f:
+        for _, el in ET.iterparse(f):
+            tag = _local(el.tag)
+            if tag == 'mergeCell':
+                merged.append(el.get('ref'))
+                continue
+            if tag != 'row':
+                continue
+
+            row_counter = int(el.get('r', row_counter + 1))
+            col_counter = 0
+            for c in el:
+                if _local(c.tag) != 'c':
+                    continue
+                ref = c.get('r')
+                if ref:
+                    col_letter, row = coordinate_from_string(ref)
+                    col_counter = column_index_from_string(col_letter)
+                else:
+                    row = row_counter
+                    col_counter += 1
+
+                style_id = int(c.get('s', 0))
+                style = xfs[style_id] if style_id and style_id < len(xfs) else unstyled
+                data_type = c.get('t', 'n')
+                value = None
+                formula = None
+                for child in c:
+                    child_tag = _local(child.tag)
+                    if child_tag == 'v':
+                        value = child.text or None
+                    elif child_tag == 'f':
+                        formula = child
+                    elif child_tag == 'is':
+                        value = "".join(t.text or "" for t in child.iter() if _local(t.tag) == 't')
+
+                if formula is not None and not data_only:
+                    # Formula text needs openpyxl's translator for shared formulas
+                    if formula.text is None or formula.get('t'):
+                        raise ValueError("Unsupported formula in week file")
+                    value = "=" + formula.text
+                elif value is not None:
+                    if data_type == 'n':
+                        value = float(value) if ('.' in value or 'E' in value or 'e' in value) else int(value)
+                        if style[4]:
+                            value = from_excel(value, epoch, timedelta=style[4] == 'timedelta')
+                    elif data_type == 's':
+                        value = shared_strings[int(value)]
+                    elif data_type == 'b':
+                        value = bool(int(value))
+
+                if value is not None or style is not unstyled:
+                    cells[(row, col_counter)] = _NativeCell(value, *style[:4])
+            el.clear()
+
+    # Like openpyxl, only the top-left cell of a merged range keeps its value
+    for ref in merged:
+        min_col, min_row, max_col, max_row = range_boundaries(ref)
+        for r in range(min_row, max_row + 1):
+            for c in range(min_col, max_col + 1):
+                if (r, c) != (min_row, min_col) and (r, c) in cells:
+                    cells[(r, c)] = cells[(r, c)]._replace(value=None)
+
+    return NativeSheet(cells, empty_cell)
+
+# --- CSV/TSV Reader ---
+# Exported schedules use the same grid as the (ΕΠΙΘ).xlsx files, one row per line:
+#   row 1:  ΟΝΟΜΑ, then the day name in the first column of each day
+#   row 2:  the date in the first column of each day (e.g. 03/11/2025 or 3 ΝΟΕΜΒΡΙΟΥ 2025)
+#   row 3:  store headers
+#   row 4+: employee name, 4 columns per weekday (ΡΕΝΤΗΣ, ΑΙΓΑΛΕΩ, ΠΕΙΡΑΙΑΣ, ΠΕΡΙΣΤΕΡΙ),
+#           1 column for Sunday
+# CSV has no colours, so the Sunday store is given either by an optional extra column
+# after Sunday whose row-3 header contains ΚΑΤΑΣΤΗΜΑ, or by a marker in the Sunday cell
+# such as "10:00-18:00 [ΑΙΓΑΛΕΩ]". It is turned into the store's fill colour, so the
+# parsers treat it exactly like a coloured Excel cell.
+def _decode_csv(data):
+    """Decodes CSV bytes as UTF-8 (with or without BOM), falling back to Greek Windows."""
+    try:
+        return data.decode('utf-8-sig')
+    except UnicodeDecodeError:
+        return data.decode('cp1253')
+
+def _store_fill(store):
+    return _NativeFill(_NativeColor('00' + STORE_COLORS[store]))
+
+def split_store_marker(value):
+    """('10:00-18:00', 'ΑΙΓΑΛΕΩ') from '10:00-18:00 [ΑΙΓΑΛΕΩ]'; (value, None) without a store marker."""
+    for match in re.finditer(r'\[([^\]]+)\]', value):
+        if match.group(1).strip().upper() in STORE_COLORS:
+            return (value[:match.start()] + value[match.end():]).strip(), match.group(1).strip().upper()
+    return value, None
+
+def read_csv_sheet(data, delimiter=None):
+    """Parses a CSV/TSV week schedule (bytes) into a NativeSheet."""
+    text = _decode_csv(data)
+    if delimiter is None:
+        first_line = text.split('\n', 1)[0]
+        try:
+            delimiter = csv.Sniffer().sniff(first_line, delimiters=',;\t').delimiter
+        except csv.Error:
+            delimiter = ','
+    rows = list(csv.reader(io.StringIO(text), delimiter=delimiter))
+
+    default_font = _NativeFont('Calibri', 11.0)
+    default_alignment = _NativeAlignment(None, None, None)
+    no_fill = _NativeFill(_NativeColor('00000000'))
+    store_col = None
+    if len(rows) >= LAYOUT.header_rows:
+        header_row = rows[LAYOUT.header_rows - 1]
+        for idx, header in enumerate(header_row[LAYOUT.last_data_col:], start=LAYOUT.last_data_col + 1):
+            if 'ΚΑΤΑΣΤΗΜΑ' in header.upper() or 'STORE' in header.upper():
+                store_col = idx
+                break
+
+    cells = {}
+    for r, row in enumerate(rows, start=1):
+        sunday_store = None
+        is_data_row = r >= LAYOUT.first_data_row
+        if is_data_row and store_col and store_col <= len(row):
+            marker = row[store_col - 1].strip().upper()
+            if marker in STORE_COLORS:
+                sunday_store = marker
+
+        for c, raw in enumerate(row, start=1):
+            value = raw.strip()
+            if not value:
+                continue
+            fill = no_fill
+            if is_data_row and LAYOUT.column_store.get(c):
+                fill = _store_fill(LAYOUT.column_store[c])
+            elif is_data_row and c in LAYOUT.column_store:
+                value, marker = split_store_marker(value)
+                store = marker or sunday_store
+                if store:
+                    fill = _store_fill(store)
+            cells[(r, c)] = _NativeCell(value, False, default_font, fill, default_alignment)
+
+    return NativeSheet(cells, _NativeCell(None, False, default_font, no_fill, default_alignment))
+
+def _read_openpyxl_sheets(file_obj, data_only=False, active_only=False):
+    """Loads the workbook through openpyxl (reference engine); [(title, ws)] with the active sheet first."""
+    with tempfile.NamedTemporaryFile(delete=False, suffix='.xlsx') as tmp:
+        tmp.write(file_obj.getvalue())
+        tmp_path = tmp.name
+    try:
+        wb = openpyxl.load_workbook(tmp_path, data_only=data_only)
+        active = wb.active
+        others = [] if active_only else [ws for ws in wb.worksheets if ws is not active]
+        return [(ws.title, ws) for ws in [active] + others]
+    finally:
+        os.unlink(tmp_path)
+
+def load_week_sheets(file_obj, data_only=False, engine=None, active_only=False):
+    """Returns [(title, ws)] of an uploaded week file, active sheet first, using the selected reader engine."""
+    file_name = getattr(file_obj, 'name', '').lower()
+    if file_name.endswith('.tsv'):
+        return [(None, read_csv_sheet(file_obj.getvalue(), delimiter='\t'))]
+    if file_name.endswith('.csv'):
+        return [(None, read_csv_sheet(file_obj.getvalue()))]
+
+    engine = engine or READER_ENGINE
+    if engine in ("native", "auto"):
+        try:
+            return read_native_sheets(file_obj.getvalue(), data_only=data_only, active_only=active_only)
+        except Exception:
+            if engine == "native":
+                raise
+    return _read_openpyxl_sheets(file_obj, data_only=data_only, active_only=active_only)
+
+def load_week_sheet(file_obj, data_only=False, engine=None):
+    """Returns the active sheet of an uploaded week file using the selected reader engine."""
+    return load_week_sheets(file_obj, data_only=data_only, engine=engine, active_only=True)[0][1]
+
+def select_week_sheets(sheets):
+    """
+    Picks the weeks of a workbook as [(title, ws, WeekDates)]. A month kept as one
+    workbook gives every sheet with dates in row 2; otherwise only the active sheet.
+    """
+    weeks = [(title, ws, read_week_dates(ws)) for title, ws in sheets]
+    if len(weeks) > 1:
+        dated = [w for w in weeks if any(w[2].months)]
+        if dated:
+            return dated
+    return weeks[:1]
+
+# --- ZIP Uploads ---
+class ZipMemberFile:
+    """One week file inside an uploaded .zip, decompressed only when read."""
+
+    def __init__(self, upload, info):
+        self._upload = upload
+        self._info = info
+        self.name = posixpath.basename(info.filename)
+        self.size = info.file_size
+
+    def getvalue(self):
+        # A private archive per read, so parser threads never share a file position
+        with zipfile.ZipFile(io.BytesIO(self._upload.getvalue())) as archive:
+            with archive.open(self._info) as member:
+                data = member.read(ZIP_MEMBER_MAX_BYTES + 1)
+        # file_size comes from the archive itself; the read is bounded either way
+        if len(data) > ZIP_MEMBER_MAX_BYTES:
+            raise ValueError(f"Το «{self.name}» είναι πάνω από {ZIP_MEMBER_MAX_BYTES // (1024 * 1024)} MB.")
+        return data
+
+def zip_week_members(upload):
+    """Week files of an uploaded .zip, from its central directory only (nothing is decompressed)."""
+    with zipfile.ZipFile(io.BytesIO(upload.getvalue())) as archive:
+        infos = archive.infolist()
+    members = []
+    for info in infos:
+        base = posixpath.basename(info.filename)
+        if info.is_dir() or info.filename.startswith('__MACOSX/') or base.startswith(('.', '~$')):
+            continue
+        if base.lower().endswith(WEEK_FILE_EXTENSIONS):
+            if info.file_size > ZIP_MEMBER_MAX_BYTES:
+                raise ValueError(f"Το «{base}» είναι πάνω από {ZIP_MEMBER_MAX_BYTES // (1024 * 1024)} MB.")
+            members.append(ZipMemberFile(upload, info))
+    if sum(member.size for member in members) > ZIP_TOTAL_MAX_BYTES:
+        raise ValueError(f"Τα αρχεία του «{upload.name}» είναι πάνω από {ZIP_TOTAL_MAX_BYTES // (1024 * 1024)} MB αποσυμπιεσμένα.")
+    return members
+
+def expand_week_uploads(uploaded_files):
+    """Replaces every uploaded .zip with its week files; other uploads pass through."""
+    expanded = []
+    for f in uploaded_files:
+        if getattr(f, 'name', '').lower().endswith('.zip'):
+            expanded.extend(zip_week_members(f))
+        else:
+            expanded.append(f)
+    return expanded
+
+def benchmark_reader_engines(uploaded_files, repeat=3):
+    """Times each reader engine over the uploaded files. Returns {engine: best seconds}."""
+    uploaded_files = expand_week_uploads(uploaded_files)
+    results = {}
+    for engine in ("openpyxl", "native"):
+        best = None
+        for _ in range(repeat):
+            start = time.perf_counter()
+            for f in uploaded_files:
+                load_week_sheet(f, engine=engine)
+            elapsed = time.perf_counter() - start
+            best = elapsed if best is None else min(best, elapsed)
+        results[engine] = best
+    return results
+
+# --- Background Parsing ---
+def _parse_week_file(file_obj, data_only, engine):
+    """Month-independent part of loading a week file: [(sheet title, PackedSheet, WeekDates)] for its weeks."""
+    return [(title, PackedSheet(pack_week(ws, week)), week)
+            for title, ws, week in select_week_sheets(load_week_sheets(file_obj, data_only=data_only, engine=engine))]
+
+def _parse_week_reads(file_obj, engine, values=True):
+    """Both reads of a week file from one parse: {False: formulas as written, True: cached values}.
+
+    The values are parsed separately only when the file's layout cells hold formulas;
+    otherwise both reads are the same sheets.
+    """
+    weeks = _parse_week_file(file_obj, False, engine)
+    reads = {False: weeks, True: weeks}
+    if values and any(ws.has_formulas for _, ws, _ in weeks):
+        reads[True] = _parse_week_file(file_obj, True, engine)
+    return reads
+
+class WeekParseCache:
+    """Parsed week files keyed by content, filled by a small thread pool.
+
+    Uploads are submitted as soon as they land, so by the time a report is
+    generated only month filtering, aggregation and writing are left. Parsed
+    sheets are only read afterwards, so sessions can share them. Entries are
+    bounded by the bytes of their packed weeks and dropped when unused for ttl
+    seconds.
+    """
+
+    def __init__(self, workers=PARSE_WORKERS, max_bytes=PARSED_WEEK_CACHE_BYTES, ttl=PARSED_WEEK_TTL_SECONDS):
+        self.executor = ThreadPoolExecutor(max_workers=workers, thread_name_prefix="week-parse")
+        self.entries = OrderedDict()    # key -> [future, bytes, last used]
+        self.lock = threading.RLock()
+        self.max_bytes = max_bytes
+        self.ttl = ttl
+
+    def submit(self, file_obj, engine=None):
+        """Starts parsing a file unless it is already parsed or queued; returns its future."""
+        data = file_obj.getvalue()
+        engine = engine or READER_ENGINE
+        key = (content_digest(data), os.path.splitext(file_obj.name.lower())[1], engine)
+        now = time.monotonic()
+        with self.lock:
+            entry = self.entries.get(key)
+            if entry is not None:
+                entry[2] = now
+                self.entries.move_to_end(key)
+                return entry[0]
+            # Parse from a private copy of the upload
+            buffer = io.BytesIO(data)
+            buffer.name = file_obj.name
+            future = self.executor.submit(_parse_week_reads, buffer, engine)
+            # Counted at the upload's size until the packed weeks are known
+            entry = self.entries[key] = [future, len(data), now]
+            future.add_done_callback(lambda done: self._parsed(key, entry, done))
+            self._trim(now)
+            return future
+
+    def _parsed(self, key, entry, future):
+        if future.exception() is not None:
+            size = 0
+        else:
+            reads = future.result()
+            sheets = {id(ws): ws for weeks in reads.values() for _, ws, _ in weeks}
+            size = sum(ws.nbytes for ws in sheets.values())
+        with self.lock:
+            if self.entries.get(key) is entry:
+                entry[1] = size
+                self._trim(time.monotonic())
+
+    def _trim(self, now):
+        for key in [key for key, (_, _, used) in self.entries.items() if now - used > self.ttl]:
+            del self.entries[key]
+        size = sum(entry[1] for entry in self.entries.values())
+        # The newest entry stays even on its own over the bound; it is about to be read
+        while size > self.max_bytes and len(self.entries) > 1:
+            _, (_, entry_size, _) = self.entries.popitem(last=False)
+            size -= entry_size
+
+    def get(self, file_obj, data_only=False, engine=None):
+        """[(sheet title, ws, WeekDates)] for a file, waiting for its background parse if needed."""
+        return self.submit(file_obj, engine=engine).result()[data_only]
+
+@st.cache_resource
+def week_parse_cache():
+    return WeekParseCache()
+
+def prefetch_week_uploads(uploaded_files):
+    """Queues every uploaded week file for parsing; returns immediately."""
+    parse_cache = week_parse_cache()
+    for f in expand_week_uploads(uploaded_files):
+        parse_cache.submit(f)
+
+# --- Packed Weeks ---
+# A loaded week as one flat buffer of typed arrays, so it can live in shared memory or
+# a memory-mapped file and be read in place by another process. Every week is packed
+# once when its file is parsed, with the per-cell figures the reports need already
+# worked out, so the reports read numbers instead of re-parsing cell text:
+#   header        magic, employees, styles, scalars, text bytes; then the week's dates
+#                 (ordinals, months, excluded days), so the week can be swapped cheaply
+#   per cell      (employee × LAYOUT.columns) hours as payroll counts them, cost flags,
+#                 store index (LAYOUT.stores), shift start/end minutes, value and fill codes
+#   per employee  clean and raw name codes
+#   header rows   value and style codes of rows 1..header_rows (copied into the reports)
+#   scalars       every distinct value (names, shift codes, colours, dates...) once, as a
+#                 type code and UTF-8 text in a flat offset table
+# PackedSheet reads the arrays through memoryviews and decodes a scalar on first use.
+_PACKED_WEEK_HEADER = struct.Struct('<4sIIII')
+_PACKED_WEEK_DATES = struct.Struct('<7i7B7B')
+_PACKED_WEEK_MAGIC = b'TSW2'
+_PACKED_DATA_OFFSET = 64    # header + dates, padded so the float array is 8-byte aligned
+_PACKED_COST_WORK = 1       # charged to a store in the cost analysis (is_cost_work)
+_PACKED_LEAVE = 2           # ΑΔΕΙΑ / ΑΝΑΡΡΩΤΙΚΗ: not a worked day in the cost inputs
+_PACKED_NO_SHIFT = 0xFFFF
+_PACKED_STYLE_FIELDS = 7
+_PACKED_EMPTY_STYLE = (False, _NativeFont('Calibri', 11.0), _NativeFill(_NativeColor('00000000')),
+                       _NativeAlignment(None, None, None))
+
+# Scalar type codes: (type, to text, from text)
+_PACKED_SCALARS = [
+    (type(None), lambda v: '', lambda t: None),
+    (str, str, str),
+    (bool, lambda v: '1' if v else '', bool),
+    (int, str, int),
+    (float, repr, float),
+    (datetime.datetime, datetime.datetime.isoformat, datetime.datetime.fromisoformat),
+    (datetime.date, datetime.date.isoformat, datetime.date.fromisoformat),
+    (datetime.time, datetime.time.isoformat, datetime.time.fromisoformat),
+    (datetime.timedelta, lambda v: repr(v.total_seconds()), lambda t: datetime.timedelta(seconds=float(t))),
+]
+_PACKED_SCALAR_TYPES = {scalar_type: code for code, (scalar_type, _, _) in enumerate(_PACKED_SCALARS)}
+
+def _packed_sections(employees, styles, scalars):
+    """(attribute, typecode, length) of every array after the header, in buffer order."""
+    cells = employees * len(LAYOUT.columns)
+    header_cells = LAYOUT.header_rows * LAYOUT.last_data_col
+    return (('hours', 'd', cells), ('values', 'I', cells), ('fills', 'I', cells),
+            ('header_values', 'I', header_cells), ('header_styles', 'I', header_cells),
+            ('style_table', 'I', styles * _PACKED_STYLE_FIELDS),
+            ('name_codes', 'I', employees), ('raw_name_codes', 'I', employees),
+            ('text_offsets', 'I', scalars + 1), ('shift_starts', 'H', cells), ('shift_ends', 'H', cells),
+            ('flags', 'B', cells), ('stores', 'B', cells), ('scalar_types', 'B', scalars))
+
+def _packed_dates(week):
+    return ([d.toordinal() if d else 0 for d in week.dates] + [m or 0 for m in week.months]
+            + [1 if i in week.excluded else 0 for i in range(7)])
+
+def pack_week(ws, week):
+    """Encodes a loaded week sheet (the layout's columns) and its WeekDates as packed bytes."""
+    if isinstance(ws, PackedSheet):
+        return ws.repack(week)
+    arrays = {name: array(typecode) for name, typecode, _ in _packed_sections(0, 0, 0)}
+    scalar_codes, style_codes = {}, {}
+    text = bytearray()
+    arrays['text_offsets'].append(0)
+
+    def scalar(value):
+        type_code = _PACKED_SCALAR_TYPES.get(type(value))
+        if type_code is None:
+            value, type_code = str(value), _PACKED_SCALAR_TYPES[str]
+        # Keyed by type too: 1, 1.0 and True are equal but must come back as written
+        code = scalar_codes.get((type_code, value))
+        if code is None:
+            code = scalar_codes[(type_code, value)] = len(scalar_codes)
+            text.extend(_PACKED_SCALARS[type_code][1](value).encode('utf-8'))
+            arrays['scalar_types'].append(type_code)
+            arrays['text_offsets'].append(len(text))
+        return code
+
+    for r in range(1, LAYOUT.header_rows + 1):
+        for c in range(1, LAYOUT.last_data_col + 1):
+            cell = ws.cell(row=r, column=c)
+            font, alignment = cell.font, cell.alignment
+            style = (cell.has_style, font.name, font.size, cell.fill.start_color.index,
+                     alignment.horizontal, alignment.vertical, alignment.wrap_text)
+            if style not in style_codes:
+                style_codes[style] = len(style_codes)
+                arrays['style_table'].extend(scalar(field) for field in style)
+            arrays['header_values'].append(scalar(cell.value))
+            arrays['header_styles'].append(style_codes[style])
+
+    row = LAYOUT.first_data_row
+    while ws.cell(row=row, column=1).value:
+        raw_name = ws.cell(row=row, column=1).value
+        name = clean_name(raw_name)
+        arrays['raw_name_codes'].append(scalar(raw_name))
+        arrays['name_codes'].append(scalar(name))
+        for layout_col in LAYOUT.columns:
+            cell = ws.cell(row=row, column=layout_col.col)
+            val = str(cell.value).strip() if cell.value else ""
+            hours = parse_hours(val, name) if val and val not in ["None", "RR", "ΡΕΠΟ"] else 0.0
+            shift = parse_shift(cell.value) or (_PACKED_NO_SHIFT, _PACKED_NO_SHIFT)
+            arrays['hours'].append(hours if hours > 0 else 0.0)
+            arrays['values'].append(scalar(cell.value))
+            arrays['fills'].append(scalar(cell.fill.start_color.index))
+            arrays['shift_starts'].append(shift[0])
+            arrays['shift_ends'].append(shift[1])
+            arrays['flags'].append((_PACKED_COST_WORK if is_cost_work(val) else 0)
+                                   | (_PACKED_LEAVE if val in ["ΑΝΑΡΡΩΤΙΚΗ", "ΑΔΕΙΑ"] else 0))
+            arrays['stores'].append(LAYOUT.stores.index(resolve_cell_location(cell, layout_col.store)))
+        row += 1
+
+    buffer = bytearray(_PACKED_DATA_OFFSET)
+    _PACKED_WEEK_HEADER.pack_into(buffer, 0, _PACKED_WEEK_MAGIC, len(arrays['name_codes']), len(style_codes),
+                                  len(scalar_codes), len(text))
+    _PACKED_WEEK_DATES.pack_into(buffer, _PACKED_WEEK_HEADER.size, *_packed_dates(week))
+    for name, _, _ in _packed_sections(0, 0, 0):
+        buffer += arrays[name].tobytes()
+    buffer += text
+    return bytes(buffer)
+
+class PackedSheet:
+    """Read-only week sheet over a packed buffer (bytes, mmap or shared memory), read in place.
+
+    Reports read the per-cell arrays (index: employee * len(LAYOUT.columns) + column index)
+    and decode values with scalar(); cell() serves the header rows and any other reader.
+    """
+
+    def __init__(self, buffer):
+        self._view = memoryview(buffer)
+        magic, employees, styles, scalars, text_size = _PACKED_WEEK_HEADER.unpack_from(self._view)
+        if magic != _PACKED_WEEK_MAGIC:
+            raise ValueError("Not a packed week")
+        dates = _PACKED_WEEK_DATES.unpack_from(self._view, _PACKED_WEEK_HEADER.size)
+        self.week = WeekDates([datetime.date.fromordinal(o) if o else None for o in dates[:7]],
+                              [m or None for m in dates[7:14]],
+                              frozenset(i for i, excluded in enumerate(dates[14:]) if excluded))
+        self.employees = employees
+        self._sections = []
+        offset = _PACKED_DATA_OFFSET
+        for name, typecode, length in _packed_sections(employees, styles, scalars):
+            size = length * array(typecode).itemsize
+            section = self._view[offset:offset + size].cast(typecode)
+            setattr(self, name, section)
+            self._sections.append(section)
+            offset += size
+        if offset + text_size != len(self._view):
+            self.release()
+            raise ValueError("Truncated packed week")
+        self._text = self._view[offset:]
+        self._scalars = {}
+        self._styles = {}
+        self._empty = _NativeCell(None, *_PACKED_EMPTY_STYLE)
+
+    def scalar(self, code):
+        """The value behind a scalar code (decoded once per sheet)."""
+        try:
+            return self._scalars[code]
+        except KeyError:
+            text = str(self._text[self.text_offsets[code]:self.text_offsets[code + 1]], 'utf-8')
+            value = self._scalars[code] = _PACKED_SCALARS[self.scalar_types[code]][2](text)
+            return value
+
+    @property
+    def names(self):
+        """Clean employee names in row order."""
+        return [self.scalar(code) for code in self.name_codes]
+
+    def _style(self, code):
+        style = self._styles.get(code)
+        if style is None:
+            start = code * _PACKED_STYLE_FIELDS
+            has_style, name, size, color, h, v, wrap = (self.scalar(c) for c in self.style_table[start:start + _PACKED_STYLE_FIELDS])
+            style = self._styles[code] = (has_style, _NativeFont(name, size), _NativeFill(_NativeColor(color)),
+                                          _NativeAlignment(h, v, wrap))
+        return style
+
+    def cell(self, row, column):
+        if 1 <= row <= LAYOUT.header_rows and 1 <= column <= LAYOUT.last_data_col:
+            i = (row - 1) * LAYOUT.last_data_col + column - 1
+            return _NativeCell(self.scalar(self.header_values[i]), *self._style(self.header_styles[i]))
+        employee = row - LAYOUT.first_data_row
+        if 0 <= employee < self.employees:
+            if column == 1:
+                return self._empty._replace(value=self.scalar(self.raw_name_codes[employee]))
+            layout_col = LAYOUT.column_index.get(column)
+            if layout_col is not None:
+                i = employee * len(LAYOUT.columns) + layout_col
+                return self._empty._replace(value=self.scalar(self.values[i]),
+                                            fill=_NativeFill(_NativeColor(self.scalar(self.fills[i]))))
+        return self._empty
+
+    @property
+    def max_row(self):
+        return LAYOUT.first_data_row - 1 + self.employees
+
+    @property
+    def has_formulas(self):
+        """True when a layout cell holds a formula ("=..." as written), so its cached value differs."""
+        text_type = _PACKED_SCALAR_TYPES[str]
+        return any(scalar_type == text_type and self._text[self.text_offsets[code]:self.text_offsets[code] + 1] == b'='
+                   for code, scalar_type in enumerate(self.scalar_types))
+
+    @property
+    def nbytes(self):
+        return self._view.nbytes
+
+    def repack(self, week):
+        """The packed bytes of this sheet with another WeekDates (e.g. days claimed by another file)."""
+        buffer = bytearray(self._view)
+        _PACKED_WEEK_DATES.pack_into(buffer, _PACKED_WEEK_HEADER.size, *_packed_dates(week))
+        return bytes(buffer)
+
+    def release(self):
+        """Drops the views into the buffer, so shared memory / mmap can be closed."""
+        for section in self._sections:
+            section.release()
+        if hasattr(self, '_text'):
+            self._text.release()
+        self._view.release()
+
+# --- Aggregates ---
+# Month totals are kept per key (employee or store) in typed arrays: keys are interned
+# to integer IDs in first-seen order and every counter is one array indexed by ID.
+# Updates are O(1), totals are one sum() per array and partial results (one per
+# week) merge by ID. Reports and caches still get plain {key: {field: value}} dicts,
+# with hours and costs as floats and counts as ints.
+EMPLOYEE_STATS_FIELDS = {'overwork': 'd', 'overtime': 'd', 'sundays': 'q', 'days_worked': 'q'}
+
+class Aggregates:
+    """Numeric counters per interned key, one contiguous array per field."""
+
+    def __init__(self, fields, keys=()):
+        self.fields = fields
+        self.ids = {}
+        self.keys = []
+        self.columns = {field: array(typecode) for field, typecode in fields.items()}
+        for key in keys:
+            self.key_id(key)
+
+    def __len__(self):
+        return len(self.keys)
+
+    def key_id(self, key):
+        """The integer ID of a key, adding a zeroed row the first time it is seen."""
+        key_id = self.ids.get(key)
+        if key_id is None:
+            key_id = self.ids[key] = len(self.keys)
+            self.keys.append(key)
+            for column in self.columns.values():
+                column.append(0)
+        return key_id
+
+    def merge(self, other):
+        """Adds another result (e.g. one week's) into this one."""
+        ids = [self.key_id(key) for key in other.keys]
+        for field, column in self.columns.items():
+            for key_id, value in zip(ids, other.columns[field]):
+                column[key_id] += value
+        return self
+
+    def add_records(self, records):
+        """Adds {key: {field: value}} (e.g. a checkpointed week's records())."""
+        for key, values in records.items():
+            key_id = self.key_id(key)
+            for field, value in values.items():
+                self.columns[field][key_id] += value
+        return self
+
+    def totals(self):
+        return {field: sum(column) for field, column in self.columns.items()}
+
+    def column(self, field):
+        """{key: value} of one field."""
+        return dict(zip(self.keys, self.columns[field]))
+
+    def records(self):
+        """{key: {field: value}}, the shape monthly_stats always had."""
+        columns = list(self.columns.items())
+        return {key: {field: column[key_id] for field, column in columns} for key_id, key in enumerate(self.keys)}
+
+def register_payroll_styles(wb):
+    """Registers the shared named styles used by the conditional output mode."""
+    grid = NamedStyle(name="payroll_grid")
+    grid.font = Font(bold=True)
+    grid.border = BORDER_ALL_THIN
+    grid.alignment = Alignment(horizontal='center', vertical='center')
+    wb.add_named_style(grid)
+    
+    calc = NamedStyle(name="payroll_calc")
+    calc.font = Font(bold=True)
+    calc.border = BORDER_ALL_THIN
+    calc.alignment = Alignment(horizontal='center')
+    wb.add_named_style(calc)
+
+def excluded_column_runs(include_col_map):
+    """Returns (first_col, last_col) runs of day columns outside the target month."""
+    runs = []
+    for col in sorted(c for c, included in include_col_map.items() if not included):
+        if runs and runs[-1][1] == col - 1:
+            runs[-1][1] = col
+        else:
+            runs.append([col, col])
+    return [tuple(run) for run in runs]
+
+def add_payroll_highlight_rules(ws, cf_ranges):
+    """Adds one sheet-level conditional formatting rule per highlight over all collected ranges."""
+    if cf_ranges['excluded']:
+        ws.conditional_formatting.add(" ".join(cf_ranges['excluded']),
+                                      FormulaRule(formula=['TRUE'], fill=FILL_EXCLUDED_DAY))
+    if cf_ranges['total']:
+        ws.conditional_formatting.add(" ".join(cf_ranges['total']),
+                                      CellIsRule(operator='greaterThan', formula=['40'], fill=FILL_ORANGE))
+    if cf_ranges['overwork']:
+        ws.conditional_formatting.add(" ".join(cf_ranges['overwork']),
+                                      CellIsRule(operator='greaterThan', formula=['0'], fill=FILL_ORANGE))
+    if cf_ranges['overtime']:
+        ws.conditional_formatting.add(" ".join(cf_ranges['overtime']),
+                                      CellIsRule(operator='greaterThan', formula=['0'], fill=FILL_LIGHT_ORANGE))
+
+def included_day_count(include_col_map):
+    """How many of the week's seven days have at least one column in the target month."""
+    return sum(1 for day_cols in LAYOUT.day_columns if any(include_col_map.get(c.col, True) for c in day_cols))
+
+def split_weekly_hours(employee_name, total_hours, days_worked, days_included):
+    """(overwork, overtime) hours of one employee's week: the first 5h over the threshold are overwork."""
+    # Calculate Dynamic Threshold
+    # If week is "cut" (incomplete - less than 7 days included in target month), use days_worked × 8
+    # Otherwise, use standard thresholds (40 hours for full-time, 20 for ΗΛΙΑΣ ΚΑΨΑΛΗΣ)
+    if days_included < 7:
+        # Cut week: threshold = days_worked × 8
+        if employee_name.upper() == "ΗΛΙΑΣ ΚΑΨΑΛΗΣ":
+            # For ΗΛΙΑΣ ΚΑΨΑΛΗΣ, half-time: days_worked × 4
+            weekly_threshold = days_worked * 4
+        else:
+            weekly_threshold = days_worked * 8
+    else:
+        # Full week: use standard thresholds
+        if employee_name.upper() == "ΗΛΙΑΣ ΚΑΨΑΛΗΣ":
+            weekly_threshold = 20
+        else:
+            weekly_threshold = 40
+    
+    overwork = 0
+    overtime = 0
+    
+    if total_hours > weekly_threshold:
+        remainder = total_hours - weekly_threshold
+        overwork = min(remainder, 5)
+        if remainder > 5:
+            overtime = remainder - 5
+    return overwork, overtime
+
+def process_payroll(uploaded_files, target_month, engine=None, upload_index=None, output_mode=None, week_list=None,
+                    aggregates=None, coverage=None, week_done=None, resumed_weeks=0):
+    """Main payroll processing function.
+
+    output_mode "conditional" writes the highlight rules and greyed-out days as sheet-level
+    conditional formatting over shared named styles; "cells" styles every cell individually.
+    Month totals are also added to `aggregates` (Aggregates of EMPLOYEE_STATS_FIELDS), if given.
+    `coverage` is the month's store_coverage() when the caller has already computed it.
+    week_done(index, week Aggregates) is called as each week finishes; the first
+    `resumed_weeks` weeks are already counted in `aggregates` (a resumed checkpoint).
+    """
+    conditional = (output_mode or PAYROLL_OUTPUT_MODE) == "conditional"
     
     # Month names for filename
     month_names = {
@@ -109,9 +1418,9 @@ def process_payroll(uploaded_files, target_month):
         9: 'ΣΕΠΤΕΜΒΡΙΟΣ', 10: 'ΟΚΤΩΒΡΙΟΣ', 11: 'ΝΟΕΜΒΡΙΟΣ', 12: 'ΔΕΚΕΜΒΡΙΟΣ'
     }
     
-    # Sort files
-    file_list = [(f.name, f) for f in uploaded_files]
-    file_list.sort(key=lambda x: get_file_date_score(x[0]))
+    # Load unique weeks, ordered by their real dates (unless already loaded)
+    if week_list is None:
+        week_list = load_weeks(uploaded_files, engine=engine, upload_index=upload_index)
     
     # Create output workbook
     wb_out = openpyxl.Workbook()
@@ -119,263 +1428,182 @@ def process_payroll(uploaded_files, target_month):
     ws_out.title = "ΜΙΣΘΟΔΟΣΙΑ"
     
     current_row = 1
-    monthly_stats = {}
+    monthly = aggregates if aggregates is not None else Aggregates(EMPLOYEE_STATS_FIELDS)
+    
+    # Conditional formatting ranges collected per rule (conditional mode)
+    cf_ranges = {'total': [], 'overwork': [], 'overtime': [], 'excluded': []}
+    if conditional:
+        register_payroll_styles(wb_out)
     
     # Process each file
-    for file_name, file_obj in file_list:
-        # Save uploaded file to temp location
-        with tempfile.NamedTemporaryFile(delete=False, suffix='.xlsx') as tmp:
-            tmp.write(file_obj.getvalue())
-            tmp_path = tmp.name
+    for week_idx, (file_name, ws_in, week) in enumerate(week_list):
+        last_data_col = LAYOUT.last_data_col
+        # Date filtering logic: month membership of each day column
+        include_col_map = week_include_col_map(week, target_month)
+        week_stats = Aggregates(EMPLOYEE_STATS_FIELDS)
+        overwork_col, overtime_col = week_stats.columns['overwork'], week_stats.columns['overtime']
+        sundays_col, days_col = week_stats.columns['sundays'], week_stats.columns['days_worked']
         
-        try:
-            wb_in = openpyxl.load_workbook(tmp_path)
-            ws_in = wb_in.active
-            
-            # Date filtering logic
-            last_data_col = 26
-            include_col_map = {}
-            
-            col_ptr = 2
-            dates_found = False
-            
-            for i in range(7):
-                is_sunday = (i == 6)
-                span = 1 if is_sunday else 4
-                
-                date_cell = ws_in.cell(row=2, column=col_ptr)
-                date_val_raw = date_cell.value
+        # Write Week Title
+        ws_out.cell(row=current_row, column=1).value = week_title(file_name)
+        ws_out.cell(row=current_row, column=1).font = Font(bold=True, size=12)
+        current_row += 1
+        
+        # Copy Headers
+        for r in range(1, LAYOUT.header_rows + 1):
+            for c in range(1, last_data_col + 1):
+                cell_in = ws_in.cell(row=r, column=c)
+                cell_out = ws_out.cell(row=current_row + r - 1, column=c)
+                cell_out.value = cell_in.value
                 
-                include_day = True
-                if target_month and date_val_raw:
-                    parsed_month = None
-                    
-                    if hasattr(date_val_raw, 'month'):
-                        parsed_month = date_val_raw.month
-                        dates_found = True
-                    else:
-                        date_val = str(date_val_raw).strip().upper()
-                        
-                        if '/' in date_val:
-                            try:
-                                parts = date_val.split('/')
-                                if len(parts) >= 2:
-                                    parsed_month = int(parts[1])
-                                    dates_found = True
-                            except: pass
-                        
-                        elif any(m in date_val for m in greek_months.keys()):
-                            for m_name, m_val in greek_months.items():
-                                if m_name in date_val:
-                                    parsed_month = m_val
-                                    dates_found = True
-                                    break
-                    
-                    if parsed_month:
-                        if parsed_month != target_month:
-                            include_day = False
+                if cell_in.has_style:
+                    cell_out.font = Font(name=cell_in.font.name, size=cell_in.font.size, bold=True)
+                    cell_out.alignment = Alignment(horizontal=cell_in.alignment.horizontal, vertical=cell_in.alignment.vertical, wrap_text=cell_in.alignment.wrap_text)
+                    cell_out.border = BORDER_ALL_THIN
+                    if cell_in.fill and cell_in.fill.start_color.index != '00000000':
+                         cell_out.fill = PatternFill(start_color=cell_in.fill.start_color.index, fill_type='solid')
                 
-                for k in range(span):
-                    include_col_map[col_ptr + k] = include_day
+                if c in include_col_map and not include_col_map[c] and not conditional:
+                    cell_out.fill = PatternFill(start_color="EEEEEE", fill_type="solid")
                 
-                col_ptr += span
-            
-            if not dates_found and target_month:
-                for col_idx in include_col_map.keys():
-                    include_col_map[col_idx] = True
-            
-            # Write Week Title
-            ws_out.cell(row=current_row, column=1).value = file_name.replace("(ΕΠΙΘ).xlsx", "").replace(".xlsx", "")
-            ws_out.cell(row=current_row, column=1).font = Font(bold=True, size=12)
-            current_row += 1
-            
-            # Copy Headers (Rows 1-3)
-            for r in range(1, 4):
-                for c in range(1, last_data_col + 1):
-                    cell_in = ws_in.cell(row=r, column=c)
-                    cell_out = ws_out.cell(row=current_row + r - 1, column=c)
-                    cell_out.value = cell_in.value
-                    
-                    if cell_in.has_style:
-                        cell_out.font = Font(name=cell_in.font.name, size=cell_in.font.size, bold=True)
-                        cell_out.alignment = Alignment(horizontal=cell_in.alignment.horizontal, vertical=cell_in.alignment.vertical, wrap_text=cell_in.alignment.wrap_text)
-                        cell_out.border = BORDER_ALL_THIN
-                        if cell_in.fill and cell_in.fill.start_color.index != '00000000':
-                             cell_out.fill = PatternFill(start_color=cell_in.fill.start_color.index, fill_type='solid')
-                    
-                    if c in include_col_map and not include_col_map[c]:
-                        cell_out.fill = PatternFill(start_color="EEEEEE", fill_type="solid")
-                    
-                    ws_out.column_dimensions[get_column_letter(c)].width = 16
-            
-            # Re-apply merges
-            base_r = current_row
-            col_ptr = 2
-            for i in range(7):
-                is_sunday = (i == 6)
-                span = 1 if is_sunday else 4
-                ws_out.merge_cells(start_row=base_r, start_column=col_ptr, end_row=base_r, end_column=col_ptr+span-1)
-                ws_out.merge_cells(start_row=base_r+1, start_column=col_ptr, end_row=base_r+1, end_column=col_ptr+span-1)
-                col_ptr += span
-            
-            # Add Calculation Headers
-            calc_headers = ["ΗΜΕΡΕΣ ΕΡΓΑΣΙΑΣ", "ΩΡΕΣ/ΕΒΔΟ", "ΥΠΕΡΕΡΓΑΣΙΑ (h)", "ΥΠΕΡΩΡΙΕΣ(h)"]
-            calc_col_start = last_data_col + 1
+                ws_out.column_dimensions[get_column_letter(c)].width = 16
+        
+        # Re-apply merges (day name and date rows span each day's columns)
+        base_r = current_row
+        for day_cols in LAYOUT.day_columns:
+            for r in range(base_r, base_r + LAYOUT.date_row):
+                ws_out.merge_cells(start_row=r, start_column=day_cols[0].col, end_row=r, end_column=day_cols[-1].col)
+        
+        # Add Calculation Headers
+        calc_headers = ["ΗΜΕΡΕΣ ΕΡΓΑΣΙΑΣ", "ΩΡΕΣ/ΕΒΔΟ", "ΥΠΕΡΕΡΓΑΣΙΑ (h)", "ΥΠΕΡΩΡΙΕΣ(h)"]
+        calc_col_start = last_data_col + 1
+        
+        for i, header in enumerate(calc_headers):
+            c = ws_out.cell(row=current_row + 2, column=calc_col_start + i)
+            c.value = header
+            c.font = Font(bold=True, size=9)
+            c.alignment = Alignment(horizontal='center', vertical='center', wrap_text=True)
+            c.border = BORDER_ALL_THIN
+            if i == 0: c.fill = PatternFill(start_color="FFFFFF", fill_type="solid")
+            elif i == 1: c.fill = PatternFill(start_color="FFFFFF", fill_type="solid")
+            elif i == 2: c.fill = FILL_ORANGE
+            elif i == 3: c.fill = FILL_LIGHT_ORANGE
+            ws_out.column_dimensions[get_column_letter(calc_col_start + i)].width = 14
+        
+        header_row = current_row
+        current_row += LAYOUT.header_rows
+        first_data_row = current_row
+        
+        # Process Data Rows (hours were parsed once, when the week was packed)
+        for emp_row, clean_n in enumerate(ws_in.names):
+            emp_id = week_stats.key_id(clean_n)
+            row_base = emp_row * len(LAYOUT.columns)
             
-            for i, header in enumerate(calc_headers):
-                c = ws_out.cell(row=current_row + 2, column=calc_col_start + i)
-                c.value = header
-                c.font = Font(bold=True, size=9)
-                c.alignment = Alignment(horizontal='center', vertical='center', wrap_text=True)
-                c.border = BORDER_ALL_THIN
-                if i == 0: c.fill = PatternFill(start_color="FFFFFF", fill_type="solid")
-                elif i == 1: c.fill = PatternFill(start_color="FFFFFF", fill_type="solid")
-                elif i == 2: c.fill = FILL_ORANGE
-                elif i == 3: c.fill = FILL_LIGHT_ORANGE
-                ws_out.column_dimensions[get_column_letter(calc_col_start + i)].width = 14
+            c_name = ws_out.cell(row=current_row, column=1)
+            c_name.value = clean_n
+            c_name.font = Font(bold=True)
+            c_name.border = BORDER_ALL_THIN
             
-            current_row += 3
+            total_hours = 0.0
+            sunday_worked = False
+            days_worked = 0
             
-            # Process Data Rows
-            row_in = 4
-            while True:
-                name_cell = ws_in.cell(row=row_in, column=1)
-                raw_name = name_cell.value
-                if not raw_name:
-                    break
-                
-                clean_n = clean_name(raw_name)
-                if clean_n not in monthly_stats:
-                    monthly_stats[clean_n] = {'overwork': 0, 'overtime': 0, 'sundays': 0, 'days_worked': 0}
-                
-                c_name = ws_out.cell(row=current_row, column=1)
-                c_name.value = clean_n
-                c_name.font = Font(bold=True)
-                c_name.border = BORDER_ALL_THIN
+            for day_idx, day_cols in enumerate(LAYOUT.day_columns):
+                is_sunday = (day_idx == LAYOUT.sunday_index)
                 
-                total_hours = 0.0
-                sunday_worked = False
-                days_worked = 0
+                day_hours = 0.0
+                is_included = include_col_map.get(day_cols[0].col, True)
                 
-                col_ptr = 2
-                
-                for day_idx in range(7):
-                    is_sunday = (day_idx == 6)
-                    span = 1 if is_sunday else 4
+                for layout_col in day_cols:
+                    i = row_base + layout_col.index
+                    c_out = ws_out.cell(row=current_row, column=layout_col.col)
+                    if conditional:
+                        c_out.style = "payroll_grid"
                     
-                    day_hours = 0.0
-                    is_included = include_col_map.get(col_ptr, True)
+                    if is_included:
+                        c_out.value = ws_in.scalar(ws_in.values[i])
+                        c_out.fill = PatternFill(start_color=ws_in.scalar(ws_in.fills[i]), fill_type='solid')
+                        # Note: "Α" and "ΑΔΕΙΑ" count as 8 hours, RR/ΡΕΠΟ as none (see pack_week)
+                        day_hours += ws_in.hours[i]
+                    elif not conditional:
+                        c_out.value = ""
+                        c_out.fill = PatternFill(start_color="EEEEEE", fill_type="solid")
                     
-                    for k in range(span):
-                        c_in = ws_in.cell(row=row_in, column=col_ptr + k)
-                        c_out = ws_out.cell(row=current_row, column=col_ptr + k)
-                        
-                        if is_included:
-                            c_out.value = c_in.value
-                            if c_in.fill: c_out.fill = PatternFill(start_color=c_in.fill.start_color.index, fill_type='solid')
-                            
-                            val = str(c_in.value).strip() if c_in.value else ""
-                            # Note: "Α" and "ΑΔΕΙΑ" are handled by parse_hours (counts as 8 hours)
-                            if val and val not in ["None", "RR", "ΡΕΠΟ"]:
-                                 h = parse_hours(val, clean_n)
-                                 if h > 0: day_hours += h
-                        else:
-                            c_out.value = ""
-                            c_out.fill = PatternFill(start_color="EEEEEE", fill_type="solid")
-                        
+                    if not conditional:
                         c_out.border = BORDER_ALL_THIN
                         c_out.alignment = Alignment(horizontal='center', vertical='center')
                         c_out.font = Font(bold=True)
-                    
-                    total_hours += day_hours
-                    if is_sunday and day_hours > 0:
-                        sunday_worked = True
-                    
-                    if day_hours > 0:
-                        days_worked += 1
-                    
-                    col_ptr += span
-                
-                # Calculate Dynamic Threshold
-                # If week is "cut" (incomplete - less than 7 days included in target month), use days_worked × 8
-                # Otherwise, use standard thresholds (40 hours for full-time, 20 for ΗΛΙΑΣ ΚΑΨΑΛΗΣ)
                 
-                # Count how many days are included in this week (for the target month)
-                days_included_in_week = 0
-                col_ptr_check = 2
-                for day_idx in range(7):
-                    is_sunday = (day_idx == 6)
-                    span = 1 if is_sunday else 4
-                    # Check if at least one column of this day is included
-                    if any(include_col_map.get(col_ptr_check + k, True) for k in range(span)):
-                        days_included_in_week += 1
-                    col_ptr_check += span
+                total_hours += day_hours
+                if is_sunday and day_hours > 0:
+                    sunday_worked = True
                 
-                # If week is incomplete (cut week at start/end of month), use days_worked × 8
-                if days_included_in_week < 7:
-                    # Cut week: threshold = days_worked × 8
-                    if clean_n.upper() == "ΗΛΙΑΣ ΚΑΨΑΛΗΣ":
-                        # For ΗΛΙΑΣ ΚΑΨΑΛΗΣ, half-time: days_worked × 4
-                        weekly_threshold = days_worked * 4
-                    else:
-                        weekly_threshold = days_worked * 8
-                else:
-                    # Full week: use standard thresholds
-                    if clean_n.upper() == "ΗΛΙΑΣ ΚΑΨΑΛΗΣ":
-                        weekly_threshold = 20
-                    else:
-                        weekly_threshold = 40
-                
-                overwork = 0
-                overtime = 0
-                
-                if total_hours > weekly_threshold:
-                    remainder = total_hours - weekly_threshold
-                    overwork = min(remainder, 5)
-                    if remainder > 5:
-                        overtime = remainder - 5
-                
-                monthly_stats[clean_n]['overwork'] += overwork
-                monthly_stats[clean_n]['overtime'] += overtime
-                monthly_stats[clean_n]['days_worked'] += days_worked
-                if sunday_worked:
-                    monthly_stats[clean_n]['sundays'] += 1
-                
-                # Write Calculated Columns
-                c_days = ws_out.cell(row=current_row, column=calc_col_start)
-                c_days.value = days_worked
-                c_days.alignment = Alignment(horizontal='center')
-                c_days.border = BORDER_ALL_THIN
-                c_days.font = Font(bold=True)
-                
-                c_total = ws_out.cell(row=current_row, column=calc_col_start + 1)
-                c_total.value = total_hours
-                c_total.alignment = Alignment(horizontal='center')
-                c_total.border = BORDER_ALL_THIN
-                c_total.font = Font(bold=True)
-                if total_hours > 40: c_total.fill = FILL_ORANGE
-                
-                c_overwork = ws_out.cell(row=current_row, column=calc_col_start + 2)
-                c_overwork.value = overwork
-                c_overwork.alignment = Alignment(horizontal='center')
-                c_overwork.border = BORDER_ALL_THIN
-                c_overwork.font = Font(bold=True)
-                if overwork > 0: c_overwork.fill = FILL_ORANGE
-                
-                c_overtime = ws_out.cell(row=current_row, column=calc_col_start + 3)
-                c_overtime.value = overtime
-                c_overtime.alignment = Alignment(horizontal='center')
-                c_overtime.border = BORDER_ALL_THIN
-                c_overtime.font = Font(bold=True)
-                if overtime > 0: c_overtime.fill = FILL_LIGHT_ORANGE
-                
-                row_in += 1
+                if day_hours > 0:
+                    days_worked += 1
+            
+            overwork, overtime = split_weekly_hours(clean_n, total_hours, days_worked, included_day_count(include_col_map))
+            
+            overwork_col[emp_id] += overwork
+            overtime_col[emp_id] += overtime
+            days_col[emp_id] += days_worked
+            if sunday_worked:
+                sundays_col[emp_id] += 1
+            
+            # Write Calculated Columns
+            if conditional:
+                for i, value in enumerate([days_worked, total_hours, overwork, overtime]):
+                    c = ws_out.cell(row=current_row, column=calc_col_start + i)
+                    c.style = "payroll_calc"
+                    c.value = value
                 current_row += 1
+                continue
             
-            current_row += 2
+            c_days = ws_out.cell(row=current_row, column=calc_col_start)
+            c_days.value = days_worked
+            c_days.alignment = Alignment(horizontal='center')
+            c_days.border = BORDER_ALL_THIN
+            c_days.font = Font(bold=True)
             
-        finally:
-            os.unlink(tmp_path)
+            c_total = ws_out.cell(row=current_row, column=calc_col_start + 1)
+            c_total.value = total_hours
+            c_total.alignment = Alignment(horizontal='center')
+            c_total.border = BORDER_ALL_THIN
+            c_total.font = Font(bold=True)
+            if total_hours > 40: c_total.fill = FILL_ORANGE
+            
+            c_overwork = ws_out.cell(row=current_row, column=calc_col_start + 2)
+            c_overwork.value = overwork
+            c_overwork.alignment = Alignment(horizontal='center')
+            c_overwork.border = BORDER_ALL_THIN
+            c_overwork.font = Font(bold=True)
+            if overwork > 0: c_overwork.fill = FILL_ORANGE
+            
+            c_overtime = ws_out.cell(row=current_row, column=calc_col_start + 3)
+            c_overtime.value = overtime
+            c_overtime.alignment = Alignment(horizontal='center')
+            c_overtime.border = BORDER_ALL_THIN
+            c_overtime.font = Font(bold=True)
+            if overtime > 0: c_overtime.fill = FILL_LIGHT_ORANGE
+            
+            current_row += 1
+        
+        if conditional:
+            last_row = max(current_row - 1, first_data_row)
+            for key, offset in (('total', 1), ('overwork', 2), ('overtime', 3)):
+                col_letter = get_column_letter(calc_col_start + offset)
+                cf_ranges[key].append(f"{col_letter}{first_data_row}:{col_letter}{last_row}")
+            for start_col, end_col in excluded_column_runs(include_col_map):
+                cf_ranges['excluded'].append(
+                    f"{get_column_letter(start_col)}{header_row}:{get_column_letter(end_col)}{last_row}")
+        
+        if week_idx >= resumed_weeks:
+            monthly.merge(week_stats)
+            if week_done is not None:
+                week_done(week_idx, week_stats)
+        current_row += 2
+        
+    
+    monthly_stats = monthly.records()
     
     # Generate Monthly Summary Table
     summary_headers = ["ΟΝΟΜΑΤΕΠΩΝΥΜΟ", "ΗΜΕΡΕΣ ΕΡΓΑΣΙΑΣ", "ΥΠΕΡΕΡΓΑΣΙΑ (h)", "ΥΠΕΡΩΡΙΕΣ(h)", "ΚΥΡΙΑΚΕΣ"]
@@ -389,6 +1617,12 @@ def process_payroll(uploaded_files, target_month):
     
     current_row += 1
     
+    if conditional and monthly_stats:
+        first_summary_row = current_row
+        last_summary_row = current_row + len(monthly_stats) - 1
+        cf_ranges['overwork'].append(f"C{first_summary_row}:C{last_summary_row}")
+        cf_ranges['overtime'].append(f"D{first_summary_row}:D{last_summary_row}")
+    
     for name, stats in monthly_stats.items():
         c = ws_out.cell(row=current_row, column=1)
         c.value = name
@@ -396,6 +1630,14 @@ def process_payroll(uploaded_files, target_month):
         c.fill = PatternFill(start_color="E7E6E6", fill_type="solid")
         c.font = Font(bold=True)
         
+        if conditional:
+            for i, key in enumerate(['days_worked', 'overwork', 'overtime', 'sundays']):
+                c = ws_out.cell(row=current_row, column=2 + i)
+                c.style = "payroll_calc"
+                c.value = stats[key]
+            current_row += 1
+            continue
+        
         c = ws_out.cell(row=current_row, column=2)
         c.value = stats['days_worked']
         c.alignment = Alignment(horizontal='center')
@@ -426,6 +1668,15 @@ def process_payroll(uploaded_files, target_month):
     
     ws_out.column_dimensions['A'].width = 30
     
+    if conditional:
+        add_payroll_highlight_rules(ws_out, cf_ranges)
+    
+    # Staffing per store and 15 minutes
+    if coverage is None:
+        coverage = store_coverage(week_list, target_month)
+    if coverage['counts']:
+        write_coverage_sheet(wb_out, coverage)
+    
     # Save to bytes
     output = io.BytesIO()
     wb_out.save(output)
@@ -439,127 +1690,219 @@ def process_payroll(uploaded_files, target_month):
     
     return output, filename, monthly_stats
 
-def get_monthly_work_days(uploaded_files, target_month):
+def scan_cost_inputs(uploaded_files, target_month, engine=None, upload_index=None, week_list=None):
     """
-    Scans uploaded files and calculates days worked for each employee.
-    Returns a dictionary: {employee_name: days_worked}
+    Scans uploaded files once for the cost inputs.
+    Returns ({employee_name: days_worked}, {employee_name: {store: charged_cells}}),
+    where charged_cells counts the cells process_cost_analysis charges to each store.
     """
-    greek_months = {
-        'ΙΑΝΟΥΑΡΙΟΥ': 1, 'ΦΕΒΡΟΥΑΡΙΟΥ': 2, 'ΜΑΡΤΙΟΥ': 3, 'ΑΠΡΙΛΙΟΥ': 4, 'ΜΑΙΟΥ': 5, 'ΜΑΪΟΥ': 5,
-        'ΙΟΥΝΙΟΥ': 6, 'ΙΟΥΛΙΟΥ': 7, 'ΑΥΓΟΥΣΤΟΥ': 8, 'ΣΕΠΤΕΜΒΡΙΟΥ': 9, 'ΟΚΤΩΒΡΙΟΥ': 10, 'ΝΟΕΜΒΡΙΟΥ': 11, 'ΔΕΚΕΜΒΡΙΟΥ': 12
-    }
+    employee_days = Aggregates({'days_worked': 'q'})
+    days_col = employee_days.columns['days_worked']
+    store_cells = {}
     
-    employee_days = {}
-    
-    for f in uploaded_files:
-        with tempfile.NamedTemporaryFile(delete=False, suffix='.xlsx') as tmp:
-            tmp.write(f.getvalue())
-            tmp_path = tmp.name
-            
+    if week_list is None:
+        week_list = load_weeks(uploaded_files, data_only=True, engine=engine, upload_index=upload_index, skip_errors=True)
+    for file_name, ws, week in week_list:
         try:
-            wb = openpyxl.load_workbook(tmp_path, data_only=True)
-            ws = wb.active
-            
-            # Date filtering logic (same as payroll)
-            include_col_map = {}
-            col_ptr = 2
-            dates_found = False
-            
-            for i in range(7):
-                is_sunday = (i == 6)
-                span = 1 if is_sunday else 4
-                
-                date_cell = ws.cell(row=2, column=col_ptr)
-                date_val_raw = date_cell.value
-                
-                include_day = True
-                if target_month and date_val_raw:
-                    parsed_month = None
-                    if hasattr(date_val_raw, 'month'):
-                        parsed_month = date_val_raw.month
-                        dates_found = True
-                    else:
-                        date_val = str(date_val_raw).strip().upper()
-                        if '/' in date_val:
-                            try:
-                                parts = date_val.split('/')
-                                if len(parts) >= 2:
-                                    parsed_month = int(parts[1])
-                                    dates_found = True
-                            except: pass
-                        elif any(m in date_val for m in greek_months.keys()):
-                            for m_name, m_val in greek_months.items():
-                                if m_name in date_val:
-                                    parsed_month = m_val
-                                    dates_found = True
-                                    break
-                    
-                    if parsed_month and parsed_month != target_month:
-                        include_day = False
-                
-                for k in range(span):
-                    include_col_map[col_ptr + k] = include_day
-                
-                col_ptr += span
-            
-            if not dates_found and target_month:
-                for col_idx in include_col_map.keys():
-                    include_col_map[col_idx] = True
+            # Date filtering logic: month membership of each day column
+            include_col_map = week_include_col_map(week, target_month)
             
-            # Scan rows for employees
-            row_idx = 4
-            while True:
-                name_cell = ws.cell(row=row_idx, column=1)
-                if not name_cell.value:
-                    break
-                
-                clean_n = clean_name(str(name_cell.value))
-                if clean_n not in employee_days:
-                    employee_days[clean_n] = 0
+            # Scan rows for employees (hours, cost flags and stores come from the packed week)
+            for emp_row, clean_n in enumerate(ws.names):
+                emp_id = employee_days.key_id(clean_n)
+                charged = store_cells.setdefault(clean_n, {})
+                row_base = emp_row * len(LAYOUT.columns)
                 
-                col_ptr = 2
-                for day_idx in range(7):
-                    is_sunday = (day_idx == 6)
-                    span = 1 if is_sunday else 4
-                    
+                for day_cols in LAYOUT.day_columns:
                     day_hours = 0
-                    is_included = include_col_map.get(col_ptr, True)
+                    is_included = include_col_map.get(day_cols[0].col, True)
                     
-                    for k in range(span):
+                    for layout_col in day_cols:
                         if is_included:
-                            c = ws.cell(row=row_idx, column=col_ptr + k)
-                            val = str(c.value).strip() if c.value else ""
-                            if val and val not in ["None", "RR", "ΡΕΠΟ", "ΑΝΑΡΡΩΤΙΚΗ", "ΑΔΕΙΑ"]:
-                                h = parse_hours(val, clean_n)
-                                if h > 0: day_hours += h
+                            i = row_base + layout_col.index
+                            # ΑΔΕΙΑ and ΑΝΑΡΡΩΤΙΚΗ are charged to the store but are not worked days
+                            if not ws.flags[i] & _PACKED_LEAVE:
+                                day_hours += ws.hours[i]
+                            if ws.flags[i] & _PACKED_COST_WORK:
+                                location = LAYOUT.stores[ws.stores[i]]
+                                charged[location] = charged.get(location, 0) + 1
                         
                     if day_hours > 0:
-                        employee_days[clean_n] += 1
-                        
-                    col_ptr += span
-                
-                row_idx += 1
+                        days_col[emp_id] += 1
                 
         except Exception:
             pass
-        finally:
-            try: os.unlink(tmp_path)
-            except: pass
             
-    return employee_days
+    return employee_days.column('days_worked'), store_cells
+
+def get_monthly_work_days(uploaded_files, target_month, engine=None, upload_index=None):
+    """
+    Scans uploaded files and calculates days worked for each employee.
+    Returns a dictionary: {employee_name: days_worked}
+    """
+    return scan_cost_inputs(uploaded_files, target_month, engine=engine, upload_index=upload_index)[0]
+
+# --- Data Files ---
+# Files under DATA_DIR are shared by every session. They are written to a temporary file
+# of their own and renamed over the old one, so readers never see half a file and two
+# writers never share a temp file; read-modify-write updates also hold data_file_lock.
+def _write_atomic(path, data):
+    directory = os.path.dirname(path)
+    os.makedirs(directory, exist_ok=True)
+    fd, tmp_path = tempfile.mkstemp(dir=directory, prefix=os.path.basename(path) + '.', suffix='.tmp')
+    try:
+        with os.fdopen(fd, 'wb') as f:
+            f.write(data)
+        os.replace(tmp_path, path)
+    except BaseException:
+        try:
+            os.unlink(tmp_path)
+        except OSError:
+            pass
+        raise
+
+@st.cache_resource
+def data_file_lock(path):
+    # One lock per data file, shared by all sessions of the server
+    return threading.Lock()
+
+# --- Employee Cost Tables ---
+_THOUSANDS_DOTS = re.compile(r'-?\d{1,3}(\.\d{3})+')
+
+def parse_cost_value(value):
+    """Parses a monthly cost cell (number, '1.234,56', '1.500', '1234.56 €'). Returns None if not a cost."""
+    if isinstance(value, (int, float)) and not isinstance(value, bool):
+        return float(value)
+    if not value:
+        return None
+    text = str(value).replace('€', '').replace(' ', '').strip()
+    if ',' in text and '.' in text:
+        text = text.replace('.', '').replace(',', '.') if text.rfind(',') > text.rfind('.') else text.replace(',', '')
+    elif ',' in text:
+        text = text.replace(',', '.')
+    elif _THOUSANDS_DOTS.fullmatch(text):
+        # Greek amounts without decimals: '1.500' is fifteen hundred
+        text = text.replace('.', '')
+    try:
+        return float(text)
+    except ValueError:
+        return None
+
+def read_cost_table(file_obj):
+    """Reads a two-column cost sheet (name, monthly cost) from xlsx/csv/tsv. Header rows are skipped."""
+    ws = load_week_sheet(file_obj, data_only=True)
+    rows = []
+    for r in range(1, ws.max_row + 1):
+        name = ws.cell(row=r, column=1).value
+        cost = parse_cost_value(ws.cell(row=r, column=2).value)
+        if name and cost is not None:
+            rows.append((str(name), cost))
+    return rows
+
+def _cost_key(name):
+    """Cost table name as matched to the roster: no (ΩΡΟΣ) suffix, case, accents or extra spaces."""
+    text = unicodedata.normalize('NFD', clean_name(name).upper())
+    return " ".join("".join(ch for ch in text if not unicodedata.combining(ch)).split())
 
-def process_cost_analysis(uploaded_files, employee_costs, target_month):
+def match_cost_table(rows, employee_list):
+    """Matches (name, cost) rows to the roster through clean_name, ignoring case and accents. Returns (matched, unmatched names)."""
+    roster = {_cost_key(name): name for name in employee_list}
+    matched = {}
+    unmatched = []
+    for name, cost in rows:
+        employee = roster.get(_cost_key(name))
+        if employee and cost >= 0:
+            matched[employee] = cost
+        else:
+            unmatched.append(str(name))
+    return matched, unmatched
+
+def load_cost_tables():
+    """Saved monthly cost tables: {month: {employee: monthly cost}}."""
+    try:
+        with open(COST_TABLE_PATH, encoding='utf-8') as f:
+            return {int(month): table for month, table in json.load(f).items()}
+    except (OSError, ValueError):
+        return {}
+
+def save_cost_table(month, monthly_costs):
+    """Persists a month's monthly costs so they can be loaded next month."""
+    with data_file_lock(COST_TABLE_PATH):
+        tables = load_cost_tables()
+        tables[month] = {name: cost for name, cost in monthly_costs.items() if cost > 0}
+        data = json.dumps({str(m): t for m, t in tables.items()}, ensure_ascii=False, indent=1)
+        try:
+            _write_atomic(COST_TABLE_PATH, data.encode('utf-8'))
+        except OSError:
+            pass
+
+# --- Overtime Ledger ---
+# {year: {"months": {month: {employee: [overwork, overtime, sundays, days_worked]}},
+#         "ytd":    {month: {employee: running totals from January to that month}}}}
+# Recording a month replaces it and rebuilds that year's twelve running totals from the
+# stored month totals, so year-to-date answers are one lookup and no past week is re-read.
+class OvertimeLedger:
+    """Per-employee payroll totals of every recorded month, with year-to-date running totals."""
+    FIELDS = tuple(EMPLOYEE_STATS_FIELDS)
+
+    def __init__(self, path=OVERTIME_LEDGER_PATH):
+        self.path = path
+        try:
+            with open(path, encoding='utf-8') as f:
+                self.years = json.load(f)
+        except (OSError, ValueError):
+            self.years = {}
+
+    def record_month(self, year, month, monthly_stats):
+        """Stores (or replaces) a finished month and updates the year's running totals."""
+        year_data = self.years.setdefault(str(year), {'months': {}, 'ytd': {}})
+        year_data['months'][str(month)] = {name: [stats[field] for field in self.FIELDS]
+                                           for name, stats in monthly_stats.items()}
+        running = {}
+        for m in range(1, 13):
+            for name, values in year_data['months'].get(str(m), {}).items():
+                totals = running.setdefault(name, [0] * len(self.FIELDS))
+                for i, value in enumerate(values):
+                    totals[i] += value
+            year_data['ytd'][str(m)] = {name: list(totals) for name, totals in running.items()}
+        _write_atomic(self.path, json.dumps(self.years, ensure_ascii=False).encode('utf-8'))
+
+    def year_to_date(self, year, month, employee):
+        """{field: total} for an employee from January to `month` (zeros if nothing is recorded)."""
+        totals = self.years.get(str(year), {}).get('ytd', {}).get(str(month), {}).get(employee)
+        return dict(zip(self.FIELDS, totals or [0] * len(self.FIELDS)))
+
+    def recorded_months(self, year):
+        return sorted(int(m) for m in self.years.get(str(year), {}).get('months', {}))
+
+    def limit_warnings(self, year, month, employees, limit=ANNUAL_OVERTIME_LIMIT_HOURS):
+        """[(employee, year-to-date overtime, share of the limit)] at or above OVERTIME_WARNING_SHARE, highest first."""
+        warnings = []
+        for name in employees:
+            overtime = self.year_to_date(year, month, name)['overtime']
+            if overtime >= limit * OVERTIME_WARNING_SHARE:
+                warnings.append((name, overtime, overtime / limit))
+        return sorted(warnings, key=lambda w: -w[1])
+
+def record_payroll_month(year, month, monthly_stats):
+    """Adds a generated payroll month to the ledger; returns the updated ledger."""
+    with data_file_lock(OVERTIME_LEDGER_PATH):
+        ledger = OvertimeLedger()
+        ledger.record_month(year, month, monthly_stats)
+    return ledger
+
+def payroll_year(week_list, target_month):
+    """The year the target month's days fall in (the current year for undated weeks)."""
+    years = [date.year for _, _, week in week_list for date in week.dates
+             if date is not None and date.month == target_month]
+    return max(set(years), key=years.count) if years else datetime.date.today().year
+
+def process_cost_analysis(uploaded_files, employee_costs, target_month, engine=None, upload_index=None, week_list=None):
     """Process weekly schedule files and create cost analysis by location."""
     
-    # Greek Month Map for Date Parsing
-    greek_months = {
-        'ΙΑΝΟΥΑΡΙΟΥ': 1, 'ΦΕΒΡΟΥΑΡΙΟΥ': 2, 'ΜΑΡΤΙΟΥ': 3, 'ΑΠΡΙΛΙΟΥ': 4, 'ΜΑΙΟΥ': 5, 'ΜΑΪΟΥ': 5,
-        'ΙΟΥΝΙΟΥ': 6, 'ΙΟΥΛΙΟΥ': 7, 'ΑΥΓΟΥΣΤΟΥ': 8, 'ΣΕΠΤΕΜΒΡΙΟΥ': 9, 'ΟΚΤΩΒΡΙΟΥ': 10, 'ΝΟΕΜΒΡΙΟΥ': 11, 'ΔΕΚΕΜΒΡΙΟΥ': 12
-    }
-    
-    # Sort files
-    file_list = [(f.name, f) for f in uploaded_files]
-    file_list.sort(key=lambda x: get_file_date_score(x[0]))
+    # Load unique weeks, ordered by their real dates (unless already loaded)
+    if week_list is None:
+        week_list = load_weeks(uploaded_files, engine=engine, upload_index=upload_index)
     
     # Create output workbook
     wb_out = openpyxl.Workbook()
@@ -567,218 +1910,123 @@ def process_cost_analysis(uploaded_files, employee_costs, target_month):
     ws_out.title = "ΚΟΣΤΟΛΟΓΗΣΗ"
     
     current_row = 1
-    location_costs = {"ΡΕΝΤΗΣ": 0, "ΑΙΓΑΛΕΩ": 0, "ΠΕΙΡΑΙΑΣ": 0, "ΠΕΡΙΣΤΕΡΙ": 0}
+    store_totals = Aggregates({'cost': 'd'}, keys=LAYOUT.stores)
+    store_cost_col = store_totals.columns['cost']
     
     # DEBUG: Track color detections
     debug_colors = []
     
+    # store × week × employee × weekday aggregates for drill-down
+    cube = CostCube()
+    
     # Process each file
-    for file_name, file_obj in file_list:
-        # Save uploaded file to temp location
-        with tempfile.NamedTemporaryFile(delete=False, suffix='.xlsx') as tmp:
-            tmp.write(file_obj.getvalue())
-            tmp_path = tmp.name
+    for file_name, ws_in, week in week_list:
+        last_data_col = LAYOUT.last_data_col
+        # Date filtering logic: month membership of each day column
+        include_col_map = week_include_col_map(week, target_month)
+        week_label = week.start.strftime('%d/%m/%Y') if week.start else week_title(file_name)
         
-        try:
-            wb_in = openpyxl.load_workbook(tmp_path)
-            ws_in = wb_in.active
-            
-            # Date filtering logic (same as payroll)
-            last_data_col = 26
-            include_col_map = {}
-            
-            col_ptr = 2
-            dates_found = False
-            
-            for i in range(7):
-                is_sunday = (i == 6)
-                span = 1 if is_sunday else 4
+        # Write Week Title
+        ws_out.cell(row=current_row, column=1).value = week_title(file_name)
+        ws_out.cell(row=current_row, column=1).font = Font(bold=True, size=12)
+        current_row += 1
+        
+        # Copy Headers
+        for r in range(1, LAYOUT.header_rows + 1):
+            for c in range(1, last_data_col + 1):
+                cell_in = ws_in.cell(row=r, column=c)
+                cell_out = ws_out.cell(row=current_row + r - 1, column=c)
+                cell_out.value = cell_in.value
                 
-                date_cell = ws_in.cell(row=2, column=col_ptr)
-                date_val_raw = date_cell.value
+                if cell_in.has_style:
+                    cell_out.font = Font(name=cell_in.font.name, size=cell_in.font.size, bold=True)
+                    cell_out.alignment = Alignment(horizontal=cell_in.alignment.horizontal, vertical=cell_in.alignment.vertical, wrap_text=cell_in.alignment.wrap_text)
+                    cell_out.border = BORDER_ALL_THIN
+                    if cell_in.fill and cell_in.fill.start_color.index != '00000000':
+                         cell_out.fill = PatternFill(start_color=cell_in.fill.start_color.index, fill_type='solid')
                 
-                include_day = True
-                if target_month and date_val_raw:
-                    parsed_month = None
-                    
-                    if hasattr(date_val_raw, 'month'):
-                        parsed_month = date_val_raw.month
-                        dates_found = True
-                    else:
-                        date_val = str(date_val_raw).strip().upper()
-                        
-                        if '/' in date_val:
-                            try:
-                                parts = date_val.split('/')
-                                if len(parts) >= 2:
-                                    parsed_month = int(parts[1])
-                                    dates_found = True
-                            except: pass
-                        
-                        elif any(m in date_val for m in greek_months.keys()):
-                            for m_name, m_val in greek_months.items():
-                                if m_name in date_val:
-                                    parsed_month = m_val
-                                    dates_found = True
-                                    break
-                    
-                    if parsed_month:
-                        if parsed_month != target_month:
-                            include_day = False
+                if c in include_col_map and not include_col_map[c]:
+                    cell_out.fill = PatternFill(start_color="EEEEEE", fill_type="solid")
                 
-                for k in range(span):
-                    include_col_map[col_ptr + k] = include_day
-                
-                col_ptr += span
-            
-            if not dates_found and target_month:
-                for col_idx in include_col_map.keys():
-                    include_col_map[col_idx] = True
-            
-            # Write Week Title
-            ws_out.cell(row=current_row, column=1).value = file_name.replace("(ΕΠΙΘ).xlsx", "").replace(".xlsx", "")
-            ws_out.cell(row=current_row, column=1).font = Font(bold=True, size=12)
-            current_row += 1
-            
-            # Copy Headers (Rows 1-3)
-            for r in range(1, 4):
-                for c in range(1, last_data_col + 1):
-                    cell_in = ws_in.cell(row=r, column=c)
-                    cell_out = ws_out.cell(row=current_row + r - 1, column=c)
-                    cell_out.value = cell_in.value
-                    
-                    if cell_in.has_style:
-                        cell_out.font = Font(name=cell_in.font.name, size=cell_in.font.size, bold=True)
-                        cell_out.alignment = Alignment(horizontal=cell_in.alignment.horizontal, vertical=cell_in.alignment.vertical, wrap_text=cell_in.alignment.wrap_text)
-                        cell_out.border = BORDER_ALL_THIN
-                        if cell_in.fill and cell_in.fill.start_color.index != '00000000':
-                             cell_out.fill = PatternFill(start_color=cell_in.fill.start_color.index, fill_type='solid')
-                    
-                    if c in include_col_map and not include_col_map[c]:
-                        cell_out.fill = PatternFill(start_color="EEEEEE", fill_type="solid")
-                    
-                    ws_out.column_dimensions[get_column_letter(c)].width = 16
-            
-            # Re-apply merges
-            base_r = current_row
-            col_ptr = 2
-            for i in range(7):
-                is_sunday = (i == 6)
-                span = 1 if is_sunday else 4
-                ws_out.merge_cells(start_row=base_r, start_column=col_ptr, end_row=base_r, end_column=col_ptr+span-1)
-                ws_out.merge_cells(start_row=base_r+1, start_column=col_ptr, end_row=base_r+1, end_column=col_ptr+span-1)
-                col_ptr += span
+                ws_out.column_dimensions[get_column_letter(c)].width = 16
+        
+        # Re-apply merges (day name and date rows span each day's columns)
+        base_r = current_row
+        for day_cols in LAYOUT.day_columns:
+            for r in range(base_r, base_r + LAYOUT.date_row):
+                ws_out.merge_cells(start_row=r, start_column=day_cols[0].col, end_row=r, end_column=day_cols[-1].col)
+        
+        current_row += LAYOUT.header_rows
+        
+        # Process Data Rows - REPLACE HOURS WITH COSTS
+        for emp_row, clean_n in enumerate(ws_in.names):
+            row_base = emp_row * len(LAYOUT.columns)
             
-            current_row += 3
+            # Write employee name
+            c_name = ws_out.cell(row=current_row, column=1)
+            c_name.value = clean_n
+            c_name.font = Font(bold=True)
+            c_name.border = BORDER_ALL_THIN
             
-            # Process Data Rows - REPLACE HOURS WITH COSTS
-            row_in = 4
-            while True:
-                name_cell = ws_in.cell(row=row_in, column=1)
-                raw_name = name_cell.value
-                if not raw_name:
-                    break
-                
-                clean_n = clean_name(raw_name)
-                
-                # Write employee name
-                c_name = ws_out.cell(row=current_row, column=1)
-                c_name.value = clean_n
-                c_name.font = Font(bold=True)
-                c_name.border = BORDER_ALL_THIN
-                
-                col_ptr = 2
+            for day_idx, day_cols in enumerate(LAYOUT.day_columns):
+                is_included = include_col_map.get(day_cols[0].col, True)
                 
-                for day_idx in range(7):
-                    is_sunday = (day_idx == 6)
-                    span = 1 if is_sunday else 4
+                for layout_col in day_cols:
+                    i = row_base + layout_col.index
+                    c_out = ws_out.cell(row=current_row, column=layout_col.col)
                     
-                    is_included = include_col_map.get(col_ptr, True)
-                    
-                    for k in range(span):
-                        c_in = ws_in.cell(row=row_in, column=col_ptr + k)
-                        c_out = ws_out.cell(row=current_row, column=col_ptr + k)
+                    if is_included:
+                        # Check if this is work (not RR, ΡΕΠΟ, etc)
+                        is_work = ws_in.flags[i] & _PACKED_COST_WORK
                         
-                        if is_included:
-                            val = str(c_in.value).strip() if c_in.value else ""
+                        # Replace with cost if this is work
+                        if is_work:
+                            # Get daily cost (default to 0 if not in dict)
+                            daily_cost = employee_costs.get(clean_n, 0.0)
+                            c_out.value = daily_cost
+                            c_out.number_format = '0.00'
                             
-                            # Check if this is work (not RR, ΡΕΠΟ, etc)
-                            is_work = False
-                            if val and val not in ["None", "", "RR", "ΡΕΠΟ"]:
-                                if "-" in val or val.upper() in ["Α", "A", "ΑΝΑΡΡΩΤΙΚΗ", "ΑΔΕΙΑ"]:
-                                    is_work = True
+                            location = LAYOUT.stores[ws_in.stores[i]]
                             
-                            # Replace with cost if this is work
-                            if is_work:
-                                # Get daily cost (default to 0 if not in dict)
-                                daily_cost = employee_costs.get(clean_n, 0.0)
-                                c_out.value = daily_cost
-                                c_out.number_format = '0.00'
-                                
-                                # Track location cost based on COLUMN POSITION (more reliable than color)
-                                if daily_cost > 0:
-                                    location = None
-                                    
-                                    # Determine location based on column index (k)
-                                    if span == 4:
-                                        if k == 0: location = "ΡΕΝΤΗΣ"
-                                        elif k == 1: location = "ΑΙΓΑΛΕΩ"
-                                        elif k == 2: location = "ΠΕΙΡΑΙΑΣ"
-                                        elif k == 3: location = "ΠΕΡΙΣΤΕΡΙ"
-                                    elif span == 1:
-                                        # Sunday usually has only 1 column. 
-                                        # We can try to guess from header or default to RENTIS (most common)
-                                        # Or check color as fallback
-                                        location = "ΡΕΝΤΗΣ" # Default for Sunday
-                                        
-                                        # Optional: Check color just in case for Sunday
-                                        if c_in.fill and hasattr(c_in.fill, 'start_color') and c_in.fill.start_color:
-                                            try:
-                                                color = c_in.fill.start_color.index
-                                                color_clean = str(color).replace("00", "").upper()
-                                                if "E2EFDA" in color_clean: location = "ΑΙΓΑΛΕΩ"
-                                                elif "DDEBF7" in color_clean: location = "ΠΕΙΡΑΙΑΣ"
-                                                elif "F4B084" in color_clean: location = "ΠΕΡΙΣΤΕΡΙ"
-                                            except:
-                                                pass
+                            if location:
+                                cube.add(location, week_label, clean_n, day_idx, ws_in.hours[i], daily_cost)
+                            
+                            # Track location cost
+                            if daily_cost > 0:
+                                if location:
+                                    store_cost_col[store_totals.key_id(location)] += daily_cost
                                     
-                                    if location:
-                                        location_costs[location] += daily_cost
-                                        
-                                        # DEBUG: Track this
+                                    # DEBUG: Track this (bounded, it lives in the session)
+                                    if len(debug_colors) < DEBUG_COLORS_LIMIT:
                                         debug_colors.append({
                                             'employee': clean_n,
                                             'cost': daily_cost,
                                             'location': location,
-                                            'method': f"Column {k} (Span {span})"
+                                            'method': f"Column {layout_col.offset} (Span {len(day_cols)})"
                                         })
-                            else:
-                                # Keep original value
-                                c_out.value = c_in.value
-                            
-                            # Copy styling
-                            if c_in.fill: 
-                                try:
-                                    c_out.fill = PatternFill(start_color=c_in.fill.start_color.index, fill_type='solid')
-                                except:
-                                    pass
                         else:
-                            c_out.value = ""
-                            c_out.fill = PatternFill(start_color="EEEEEE", fill_type="solid")
+                            # Keep original value
+                            c_out.value = ws_in.scalar(ws_in.values[i])
                         
-                        c_out.border = BORDER_ALL_THIN
-                        c_out.alignment = Alignment(horizontal='center', vertical='center')
-                        c_out.font = Font(bold=True)
+                        # Copy styling
+                        try:
+                            c_out.fill = PatternFill(start_color=ws_in.scalar(ws_in.fills[i]), fill_type='solid')
+                        except:
+                            pass
+                    else:
+                        c_out.value = ""
+                        c_out.fill = PatternFill(start_color="EEEEEE", fill_type="solid")
                     
-                    col_ptr += span
-                
-                row_in += 1
-                current_row += 1
-            
-            current_row += 2
+                    c_out.border = BORDER_ALL_THIN
+                    c_out.alignment = Alignment(horizontal='center', vertical='center')
+                    c_out.font = Font(bold=True)
             
-        finally:
-            os.unlink(tmp_path)
+            current_row += 1
+        
+        current_row += 2
+        
+    
+    location_costs = store_totals.column('cost')
     
     # Add ΚΟΣΤΟΣ ΑΝΑ ΚΑΤΑΣΤΗΜΑ summary
     summary_row = current_row + 1
@@ -832,19 +2080,1045 @@ def process_cost_analysis(uploaded_files, employee_costs, target_month):
     wb_out.save(output)
     output.seek(0)
     
-    return output, location_costs, debug_colors
+    return output, location_costs, debug_colors, cube
+
+def run_monthly_reports(uploaded_files, target_month, employee_costs, engine=None, upload_index=None, week_list=None,
+                        aggregates=None, week_done=None, resumed_weeks=0):
+    """
+    Payroll and store costing from a single ingestion pass over the uploads.
+    Returns a dict with the payroll workbook/filename/stats, the worked days and store
+    cells, the cost workbook/location costs/cube and the store coverage.
+    aggregates, week_done and resumed_weeks are passed on to process_payroll.
+    """
+    if week_list is None:
+        week_list = load_weeks(uploaded_files, engine=engine, upload_index=upload_index)
+    
+    monthly = aggregates if aggregates is not None else Aggregates(EMPLOYEE_STATS_FIELDS)
+    coverage = store_coverage(week_list, target_month)
+    payroll_file, payroll_filename, monthly_stats = process_payroll(None, target_month, week_list=week_list, aggregates=monthly,
+                                                                    coverage=coverage, week_done=week_done,
+                                                                    resumed_weeks=resumed_weeks)
+    work_days, store_cells = scan_cost_inputs(None, target_month, week_list=week_list)
+    cost_file, location_costs, debug_colors, cube = process_cost_analysis(None, employee_costs, target_month, week_list=week_list)
+    
+    return {
+        'payroll_file': payroll_file,
+        'payroll_filename': payroll_filename,
+        'monthly_stats': monthly_stats,
+        'monthly_totals': monthly.totals(),
+        'work_days': work_days,
+        'store_cells': store_cells,
+        'cost_file': cost_file,
+        'location_costs': location_costs,
+        'cost_cube': cube,
+        'coverage': coverage,
+    }
+
+# --- Cost Cube ---
+WEEKDAY_NAMES = ['ΔΕΥΤΕΡΑ', 'ΤΡΙΤΗ', 'ΤΕΤΑΡΤΗ', 'ΠΕΜΠΤΗ', 'ΠΑΡΑΣΚΕΥΗ', 'ΣΑΒΒΑΤΟ', 'ΚΥΡΙΑΚΗ']
+CUBE_DIMENSION_LABELS = {'store': 'ΚΑΤΑΣΤΗΜΑ', 'week': 'ΕΒΔΟΜΑΔΑ', 'employee': 'ΕΡΓΑΖΟΜΕΝΟΣ', 'weekday': 'ΗΜΕΡΑ'}
+CUBE_MEASURE_LABELS = {'cost': 'ΚΟΣΤΟΣ (€)', 'hours': 'ΩΡΕΣ', 'days': 'ΗΜΕΡΕΣ'}
+
+class CostCube:
+    """store × week × employee × weekday aggregates of a cost run (hours, worked days, cost)."""
+    DIMENSIONS = ('store', 'week', 'employee', 'weekday')
+    MEASURES = ('hours', 'days', 'cost')
+
+    def __init__(self, cells=None):
+        self.cells = cells if cells is not None else {}
+
+    def add(self, store, week, employee, weekday, hours, cost):
+        key = (store, week, employee, weekday)
+        cell = self.cells.get(key)
+        if cell is None:
+            self.cells[key] = [hours, 1, cost]
+        else:
+            # Several shifts in the same store on the same day are still one worked day
+            cell[0] += hours
+            cell[2] += cost
+
+    def values(self, dimension):
+        """Distinct values of a dimension (stores and weekdays in their usual order)."""
+        idx = self.DIMENSIONS.index(dimension)
+        if dimension == 'weekday':
+            return sorted({key[idx] for key in self.cells})
+        if dimension == 'store':
+            store_order = list(STORE_COLORS)
+            return sorted({key[idx] for key in self.cells}, key=lambda s: store_order.index(s) if s in store_order else len(store_order))
+        return list(dict.fromkeys(key[idx] for key in self.cells))
+
+    def rollup(self, by, filters=None):
+        """Sums the measures grouped by the given dimensions: {group tuple: [hours, days, cost]}."""
+        idx = [self.DIMENSIONS.index(d) for d in by]
+        checks = [(self.DIMENSIONS.index(d), set(v)) for d, v in (filters or {}).items() if v]
+        result = {}
+        for key, (hours, days, cost) in self.cells.items():
+            if any(key[i] not in allowed for i, allowed in checks):
+                continue
+            group = tuple(key[i] for i in idx)
+            acc = result.get(group)
+            if acc is None:
+                result[group] = [hours, days, cost]
+            else:
+                acc[0] += hours
+                acc[1] += days
+                acc[2] += cost
+        return result
+
+    def pivot(self, row_dim, col_dim, measure, filters=None):
+        """Rows of row_dim with one column per col_dim value plus a total, for tables/charts."""
+        m = self.MEASURES.index(measure)
+        cols = [c for c in self.values(col_dim) if not filters or not filters.get(col_dim) or c in filters[col_dim]]
+        rows = {}
+        for (row_key, col_key), measures in self.rollup((row_dim, col_dim), filters).items():
+            rows.setdefault(row_key, {})[col_key] = measures[m]
+        row_order = [r for r in self.values(row_dim) if r in rows]
+        table = []
+        for row_key in row_order:
+            label = WEEKDAY_NAMES[row_key] if row_dim == 'weekday' else row_key
+            record = {CUBE_DIMENSION_LABELS[row_dim]: label}
+            for col_key in cols:
+                col_label = WEEKDAY_NAMES[col_key] if col_dim == 'weekday' else col_key
+                record[col_label] = round(rows[row_key].get(col_key, 0), 2)
+            record['ΣΥΝΟΛΟ'] = round(sum(rows[row_key].values()), 2)
+            table.append(record)
+        return table
+
+# --- Store Coverage ---
+# How many people are in each store, per 15-minute slot of every day of the month.
+# Every timed shift ("09:00-17:00") becomes a (store, date, start, end) interval;
+# each interval adds +1/-1 at its boundary slots of a per-(store, date) difference
+# array, and one prefix sum per array turns those into headcounts.
+COVERAGE_SLOT_MINUTES = 15
+ShiftInterval = namedtuple('ShiftInterval', 'store date start end')
+
+def parse_shift(time_str):
+    """Parses '09:00-17:00' to (start, end) minutes after midnight; end > 1440 past midnight. None if untimed."""
+    if not time_str or not isinstance(time_str, str) or '-' not in time_str:
+        return None
+    time_str = re.sub(r'\[.*?\]', '', time_str).strip()
+    try:
+        start_str, end_str = time_str.split('-')
+        start_h, start_m = start_str.strip().split(':')
+        end_h, end_m = end_str.strip().split(':')
+        start = int(start_h) * 60 + int(start_m)
+        end = int(end_h) * 60 + int(end_m)
+    except ValueError:
+        return None
+    if end < start:
+        end += 24 * 60
+    return (start, end) if end > start else None
+
+def collect_shift_intervals(week_list, target_month):
+    """Every timed shift on a dated day of target_month, with the store it is worked in."""
+    intervals = []
+    for file_name, ws_in, week in week_list:
+        included = week.included_days(target_month)
+        for emp_row in range(ws_in.employees):
+            row_base = emp_row * len(LAYOUT.columns)
+            for day_idx, day_cols in enumerate(LAYOUT.day_columns):
+                date = week.dates[day_idx]
+                if date is None or not included[day_idx]:
+                    continue
+                for layout_col in day_cols:
+                    i = row_base + layout_col.index
+                    # Shifts were parsed with parse_shift when the week was packed
+                    if ws_in.shift_starts[i] != _PACKED_NO_SHIFT:
+                        intervals.append(ShiftInterval(LAYOUT.stores[ws_in.stores[i]], date,
+                                                       ws_in.shift_starts[i], ws_in.shift_ends[i]))
+    return intervals
+
+def sweep_coverage(intervals, target_month, slot_minutes=COVERAGE_SLOT_MINUTES):
+    """{(store, date): [headcount per slot]} from shift intervals (a slot counts if it is partly covered)."""
+    day_slots = 24 * 60 // slot_minutes
+    diffs = {}
+    for store, date, start, end in intervals:
+        # Shifts past midnight continue in the first slots of the next day
+        for day_offset in range(0, (end - 1) // (24 * 60) + 1):
+            day = date + datetime.timedelta(days=day_offset)
+            if day.month != target_month:
+                continue
+            day_start = max(start - day_offset * 24 * 60, 0)
+            day_end = min(end - day_offset * 24 * 60, 24 * 60)
+            diff = diffs.get((store, day))
+            if diff is None:
+                diff = diffs[(store, day)] = [0] * (day_slots + 1)
+            diff[day_start // slot_minutes] += 1
+            diff[-(-day_end // slot_minutes)] -= 1
+    return {key: list(accumulate(diff[:day_slots])) for key, diff in diffs.items()}
+
+def store_coverage(week_list, target_month):
+    """Plain coverage data of a month: {'slot_minutes', 'dates', 'counts': {(store, date): [headcount]}}."""
+    counts = sweep_coverage(collect_shift_intervals(week_list, target_month), target_month)
+    dates = sorted({date for _, _, week in week_list
+                    for date, included in zip(week.dates, week.included_days(target_month))
+                    if date is not None and included and date.month == target_month})
+    return {'slot_minutes': COVERAGE_SLOT_MINUTES, 'dates': dates, 'counts': counts}
+
+def coverage_table(coverage, store):
+    """(slot labels, dates, rows of headcount per date) for one store, trimmed to its staffed hours."""
+    dates = coverage['dates']
+    slot_minutes = coverage['slot_minutes']
+    day_slots = 24 * 60 // slot_minutes
+    empty = [0] * day_slots
+    columns = [coverage['counts'].get((store, date), empty) for date in dates]
+    staffed = [slot for slot in range(day_slots) if any(col[slot] for col in columns)]
+    if not staffed:
+        return [], dates, []
+    slots = range(staffed[0], staffed[-1] + 1)
+    labels = [f"{slot * slot_minutes // 60:02d}:{slot * slot_minutes % 60:02d}" for slot in slots]
+    return labels, dates, [[col[slot] for col in columns] for slot in slots]
+
+def write_coverage_sheet(wb, coverage):
+    """Adds a ΚΑΛΥΨΗ sheet: per store, a slot × date headcount grid shaded by a colour scale."""
+    ws = wb.create_sheet("ΚΑΛΥΨΗ")
+    ws.column_dimensions['A'].width = 10
+    current_row = 1
+    for store in LAYOUT.stores:
+        labels, dates, rows = coverage_table(coverage, store)
+        if not rows:
+            continue
+        ws.cell(row=current_row, column=1).value = store
+        ws.cell(row=current_row, column=1).font = Font(bold=True, size=12)
+        current_row += 1
+        for i, date in enumerate(dates):
+            c = ws.cell(row=current_row, column=2 + i)
+            c.value = f"{WEEKDAY_NAMES[date.weekday()][:3]} {date.strftime('%d/%m')}"
+            c.font = Font(bold=True, size=9)
+            c.alignment = Alignment(horizontal='center', wrap_text=True)
+            c.fill = FILL_HEADER_GREY
+            ws.column_dimensions[get_column_letter(2 + i)].width = 7
+        first_row = current_row + 1
+        for label, counts in zip(labels, rows):
+            current_row += 1
+            ws.cell(row=current_row, column=1).value = label
+            ws.cell(row=current_row, column=1).font = Font(bold=True)
+            for i, count in enumerate(counts):
+                c = ws.cell(row=current_row, column=2 + i)
+                c.value = count
+                c.alignment = Alignment(horizontal='center')
+        ws.conditional_formatting.add(
+            f"B{first_row}:{get_column_letter(1 + len(dates))}{current_row}",
+            ColorScaleRule(start_type='num', start_value=0, start_color='F8696B',
+                           mid_type='percentile', mid_value=50, mid_color='FFEB84',
+                           end_type='max', end_color='63BE7B'))
+        current_row += 3
+    ws.freeze_panes = 'B1'
+    return ws
+
+def coverage_heatmap_html(coverage, store):
+    """HTML heatmap of one store's coverage (slots down, dates across) for the page."""
+    labels, dates, rows = coverage_table(coverage, store)
+    peak = max((max(r) for r in rows), default=0) or 1
+    head = "".join(f"<th>{WEEKDAY_NAMES[d.weekday()][:2]}<br>{d.day}</th>" for d in dates)
+    body = []
+    for label, counts in zip(labels, rows):
+        cells = "".join(
+            f'<td style="background: rgba(99, 190, 123, {0.12 + 0.88 * count / peak:.2f})">{count or ""}</td>'
+            if count else '<td style="background: rgba(248, 105, 107, 0.35)"></td>'
+            for count in counts)
+        body.append(f"<tr><th>{label}</th>{cells}</tr>")
+    return (f'<div class="coverage-heatmap"><table><tr><th></th>{head}</tr>{"".join(body)}</table></div>')
+
+# --- What-if Scenarios ---
+# One parsed week as plain rows of cell texts, for trying schedule changes in the app
+# before the week is published. The baseline keeps every employee's weekly figures; an
+# edit recomputes only the edited employees' rows and moves the store totals by their
+# difference. Daily costs stay as entered (monthly cost / days worked in the month).
+def scenario_column_labels(week):
+    """Grid column label of every schedule column, e.g. 'ΔΕΥ 03/11 · ΡΕΝΤΗΣ' (Sunday: 'ΚΥΡ 09/11')."""
+    labels = []
+    for layout_col in LAYOUT.columns:
+        date = week.dates[layout_col.day]
+        label = WEEKDAY_NAMES[layout_col.day][:3] + (f" {date.strftime('%d/%m')}" if date else "")
+        if layout_col.store:
+            label += f" · {layout_col.store}"
+        elif LAYOUT.day_spans[layout_col.day] > 1:
+            label += f" #{layout_col.offset + 1}"
+        labels.append(label)
+    return labels
+
+def scenario_cell_text(layout_col, text, store):
+    """A cell as shown in the grid: Sunday cells carry their store, e.g. '10:00-18:00 [ΑΙΓΑΛΕΩ]'."""
+    if layout_col.store is None and text:
+        return f"{text} [{store}]"
+    return text
+
+def scenario_grid(scenario):
+    """Rows of {ΕΡΓΑΖΟΜΕΝΟΣ, column label: cell text} for the editable grid."""
+    grid = []
+    for name, cells, stores in zip(scenario['names'], scenario['cells'], scenario['stores']):
+        row = {'ΕΡΓΑΖΟΜΕΝΟΣ': name}
+        for layout_col, label, text, store in zip(LAYOUT.columns, scenario['columns'], cells, stores):
+            row[label] = scenario_cell_text(layout_col, text, store)
+        grid.append(row)
+    return grid
+
+def week_scenario(file_name, ws, week, target_month, daily_costs=None):
+    """Plain baseline of one week: column labels, month membership, per employee the
+    cell texts, the store each cell is charged to and the week's figures, and the
+    store totals at daily_costs (see price_scenario)."""
+    include_col_map = week_include_col_map(week, target_month)
+    scenario = {
+        'title': week_title(file_name),
+        'columns': scenario_column_labels(week),
+        'included': [include_col_map[c.col] for c in LAYOUT.columns],
+        'days_included': included_day_count(include_col_map),
+        'names': [], 'cells': [], 'stores': [], 'stats': [],
+    }
+    for emp_row, name in enumerate(ws.names):
+        row_base = emp_row * len(LAYOUT.columns)
+        cells, stores = [], []
+        for layout_col in LAYOUT.columns:
+            value = ws.scalar(ws.values[row_base + layout_col.index])
+            cells.append(str(value).strip() if value else "")
+            stores.append(LAYOUT.stores[ws.stores[row_base + layout_col.index]])
+        scenario['names'].append(name)
+        scenario['cells'].append(cells)
+        scenario['stores'].append(stores)
+        scenario['stats'].append(scenario_row_stats(scenario, name, cells, stores))
+    return price_scenario(scenario, daily_costs or {})
+
+def scenario_row_stats(scenario, name, cells, stores):
+    """One employee's week figures from the row's cell texts, as process_payroll and
+    process_cost_analysis count them (charged days and hours per store)."""
+    day_hours = [0.0] * 7
+    store_days, store_hours = {}, {}
+    for i, layout_col in enumerate(LAYOUT.columns):
+        if not scenario['included'][i]:
+            continue
+        val = cells[i]
+        if val and val not in ["None", "RR", "ΡΕΠΟ"]:
+            h = parse_hours(val, name)
+            if h > 0: day_hours[layout_col.day] += h
+        if is_cost_work(val):
+            store = stores[i]
+            store_days[store] = store_days.get(store, 0) + 1
+            store_hours[store] = store_hours.get(store, 0.0) + parse_hours(val, name)
+    total_hours = sum(day_hours)
+    days_worked = sum(1 for h in day_hours if h > 0)
+    overwork, overtime = split_weekly_hours(name, total_hours, days_worked, scenario['days_included'])
+    return {'hours': total_hours, 'days_worked': days_worked, 'overwork': overwork, 'overtime': overtime,
+            'sunday': day_hours[LAYOUT.sunday_index] > 0, 'store_days': store_days, 'store_hours': store_hours}
+
+def scenario_store_totals(stats, names, daily_costs):
+    """{store: [hours, cost]} of a set of employee rows."""
+    totals = {store: [0.0, 0.0] for store in LAYOUT.stores}
+    for name, row in zip(names, stats):
+        daily_cost = daily_costs.get(name, 0.0)
+        for store, days in row['store_days'].items():
+            total = totals.setdefault(store, [0.0, 0.0])
+            total[0] += row['store_hours'][store]
+            total[1] += daily_cost * days
+    return totals
+
+def price_scenario(scenario, daily_costs):
+    """Sets the daily costs of a scenario and its baseline store totals, once per costs."""
+    scenario['daily_costs'] = dict(daily_costs)
+    scenario['store_totals'] = scenario_store_totals(scenario['stats'], scenario['names'], daily_costs)
+    return scenario
+
+def evaluate_scenario(scenario, edited_rows):
+    """Applies grid edits ({row: {column label: text}}) to a week scenario.
+
+    Only rows with a cell that differs from the baseline are recomputed, and store
+    totals move from the baseline by those rows' difference. Returns
+    {'stats': figures per row, 'changed': recomputed rows, 'changes': [(row, column, before, after)],
+    'stores': {store: (hours, cost) before, (hours, cost) after}}.
+    """
+    column_index = {label: i for i, label in enumerate(scenario['columns'])}
+    stats = list(scenario['stats'])
+    changed, changes = [], []
+    for row, edits in sorted((int(r), e) for r, e in edited_rows.items()):
+        cells = list(scenario['cells'][row])
+        stores = list(scenario['stores'][row])
+        for label, value in edits.items():
+            i = column_index.get(label)
+            if i is None:
+                continue
+            text = str(value).strip() if value else ""
+            if LAYOUT.columns[i].store is None:
+                # Sunday cells name their store as in CSV exports: "10:00-18:00 [ΑΙΓΑΛΕΩ]"
+                text, marker = split_store_marker(text)
+                stores[i] = marker or stores[i]
+            cells[i] = text
+            if text != scenario['cells'][row][i] or stores[i] != scenario['stores'][row][i]:
+                changes.append((row, i, scenario_cell_text(LAYOUT.columns[i], scenario['cells'][row][i], scenario['stores'][row][i]),
+                                scenario_cell_text(LAYOUT.columns[i], text, stores[i])))
+        if cells != scenario['cells'][row] or stores != scenario['stores'][row]:
+            stats[row] = scenario_row_stats(scenario, scenario['names'][row], cells, stores)
+            changed.append(row)
+    
+    # Store totals move by the difference of the recomputed rows only
+    names = [scenario['names'][row] for row in changed]
+    daily_costs = scenario['daily_costs']
+    removed = scenario_store_totals([scenario['stats'][row] for row in changed], names, daily_costs)
+    added = scenario_store_totals([stats[row] for row in changed], names, daily_costs)
+    store_figures = {}
+    for store, (hours, cost) in scenario['store_totals'].items():
+        old_hours, old_cost = removed.get(store, (0.0, 0.0))
+        new_hours, new_cost = added.get(store, (0.0, 0.0))
+        store_figures[store] = ((hours, cost), (hours - old_hours + new_hours, cost - old_cost + new_cost))
+    return {'stats': stats, 'changed': changed, 'changes': changes, 'stores': store_figures}
+
+# --- Session Artifacts ---
+# Generated workbooks are kept per session in st.session_state['artifacts'] as
+# {key: {'filename', 'size', 'created', 'data', 'path'}}. Large ones live on disk
+# ('path'), the rest in memory ('data'). They are dropped after download or TTL.
+def _artifacts():
+    if 'artifacts' not in st.session_state:
+        st.session_state['artifacts'] = {}
+    return st.session_state['artifacts']
+
+def _spill_artifact(record, data):
+    """Moves an artifact's bytes to a temp file."""
+    fd, path = tempfile.mkstemp(prefix=ARTIFACT_SPILL_PREFIX, suffix=os.path.splitext(record['filename'])[1])
+    with os.fdopen(fd, 'wb') as f:
+        f.write(data)
+    record['path'] = path
+    record['data'] = None
+
+def store_artifact(key, data, filename):
+    """Keeps a generated file for this session, spilling large ones to disk."""
+    drop_artifact(key)
+    record = {'filename': filename, 'size': len(data), 'created': time.time(), 'data': None, 'path': None}
+    if len(data) > ARTIFACT_SPILL_BYTES:
+        _spill_artifact(record, data)
+    else:
+        record['data'] = data
+    _artifacts()[key] = record
+    enforce_session_memory_limit()
+
+def load_artifact(key):
+    """Returns (bytes, filename) of a stored artifact, or (None, None) if it is gone."""
+    record = _artifacts().get(key)
+    if not record:
+        return None, None
+    if record['data'] is not None:
+        return record['data'], record['filename']
+    try:
+        with open(record['path'], 'rb') as f:
+            return f.read(), record['filename']
+    except OSError:
+        _artifacts().pop(key, None)
+        return None, None
+
+def drop_artifact(key):
+    """Releases an artifact from memory and disk."""
+    record = _artifacts().pop(key, None)
+    if record and record['path']:
+        try: os.unlink(record['path'])
+        except OSError: pass
+
+def evict_stale_artifacts():
+    """Drops artifacts older than ARTIFACT_TTL_SECONDS."""
+    now = time.time()
+    for key, record in list(_artifacts().items()):
+        if now - record['created'] > ARTIFACT_TTL_SECONDS:
+            drop_artifact(key)
+
+def sweep_orphaned_artifacts():
+    """
+    Deletes spilled artifact files older than ARTIFACT_TTL_SECONDS. Sessions that end
+    (tab closed, expired, server restarted) never drop their artifacts, and no live
+    session keeps an artifact that old.
+    """
+    cutoff = time.time() - ARTIFACT_TTL_SECONDS
+    directory = tempfile.gettempdir()
+    for name in os.listdir(directory):
+        if not name.startswith(ARTIFACT_SPILL_PREFIX):
+            continue
+        path = os.path.join(directory, name)
+        try:
+            if os.path.isfile(path) and os.path.getmtime(path) < cutoff:
+                os.unlink(path)
+        except OSError:
+            pass
+
+@st.cache_resource(ttl=ARTIFACT_TTL_SECONDS)
+def artifact_sweep():
+    # Runs when the server starts and then at most once per TTL, for all sessions
+    sweep_orphaned_artifacts()
+    return time.time()
+
+# Report data kept in session_state besides the artifacts (all plain data)
+SESSION_DATA_KEYS = ('monthly_stats', 'store_coverage', 'week_scenario', 'employee_costs', 'employee_monthly_costs')
+
+def _payload_size(value):
+    """Bytes of a stored value as pickled, which counts nested data (sys.getsizeof does not)."""
+    try:
+        return len(pickle.dumps(value, protocol=pickle.HIGHEST_PROTOCOL))
+    except Exception:
+        return 0
+
+def enforce_session_memory_limit():
+    """Spills the oldest in-memory artifacts to disk until the session fits its budget."""
+    usage = session_memory_usage()
+    used = usage['uploads'] + usage['stats'] + usage['artifacts_memory']
+    in_memory = sorted((r for r in _artifacts().values() if r['data'] is not None), key=lambda r: r['created'])
+    for record in in_memory:
+        if used <= SESSION_MEMORY_LIMIT_BYTES:
+            break
+        used -= record['size']
+        _spill_artifact(record, record['data'])
+
+def session_memory_usage():
+    """Bytes held by this session: uploads, artifacts (memory/disk) and report data."""
+    uploads = 0
+    for key in ('payroll_upload', 'cost_upload'):
+        for f in st.session_state.get(key) or []:
+            uploads += getattr(f, 'size', 0)
+    records = _artifacts().values()
+    stats = sum(_payload_size(st.session_state[key]) for key in SESSION_DATA_KEYS if key in st.session_state)
+    cube = st.session_state.get('cost_cube')
+    if cube:
+        stats += _payload_size(cube.cells)
+    return {
+        'uploads': uploads,
+        'artifacts_memory': sum(len(r['data']) for r in records if r['data'] is not None),
+        'artifacts_disk': sum(r['size'] for r in records if r['path']),
+        'stats': stats,
+    }
+
+# --- Report Cache ---
+@lru_cache(maxsize=1)
+def _source_digest():
+    # Results cached on disk by an older app.py are not reused
+    with open(os.path.abspath(__file__), 'rb') as f:
+        return content_digest(f.read())
+
+def report_cache_key(kind, uploaded_files, target_month, employee_costs=None):
+    """Digest of everything a report depends on: file names and contents, month, costs and settings."""
+    files = [(f.name, content_digest(f.getvalue())) for f in expand_week_uploads(uploaded_files)]
+    costs = sorted((name, repr(cost)) for name, cost in (employee_costs or {}).items())
+    settings = [READER_ENGINE, PAYROLL_OUTPUT_MODE, _source_digest()]
+    payload = json.dumps([kind, files, target_month, costs, settings], ensure_ascii=False)
+    return content_digest(payload.encode('utf-8'))
+
+class ReportCache:
+    """Generated reports kept pickled in a size-bounded LRU, optionally mirrored to disk.
+
+    Results must be plain data: classes defined in app.py are recreated on every
+    Streamlit rerun, so their instances cannot be pickled reliably.
+    """
+
+    def __init__(self, max_bytes=REPORT_CACHE_BYTES, directory=REPORT_CACHE_DIR):
+        self.max_bytes = max_bytes
+        self.directory = directory
+        self.entries = OrderedDict()   # key -> (size, pickled result)
+        self.size = 0
+        self.lock = threading.Lock()
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+
+    def _path(self, key):
+        return os.path.join(self.directory, f"{key}.pickle")
+
+    def get(self, key):
+        """The cached result for key, or None."""
+        with self.lock:
+            entry = self.entries.get(key)
+            if entry is not None:
+                self.entries.move_to_end(key)
+                return pickle.loads(entry[1])
+        if self.directory:
+            try:
+                with open(self._path(key), 'rb') as f:
+                    blob = f.read()
+                result = pickle.loads(blob)
+            except (OSError, pickle.UnpicklingError, EOFError):
+                return None
+            self._remember(key, blob)
+            return result
+        return None
+
+    def put(self, key, result):
+        blob = pickle.dumps(result, protocol=pickle.HIGHEST_PROTOCOL)
+        if len(blob) > self.max_bytes:
+            return
+        self._remember(key, blob)
+        if self.directory:
+            try:
+                _write_atomic(self._path(key), blob)
+                self._prune_disk()
+            except OSError:
+                pass
+
+    def _remember(self, key, blob):
+        with self.lock:
+            if key in self.entries:
+                self.size -= self.entries.pop(key)[0]
+            self.entries[key] = (len(blob), blob)
+            self.size += len(blob)
+            while self.size > self.max_bytes:
+                self.size -= self.entries.popitem(last=False)[1][0]
+
+    def _prune_disk(self):
+        # Same bound on disk: drop the least recently written files. Other sessions
+        # (or processes) prune the same folder, so a file may vanish at any step.
+        files = []
+        for name in os.listdir(self.directory):
+            if name.endswith('.pickle'):
+                path = os.path.join(self.directory, name)
+                try:
+                    stat = os.stat(path)
+                except FileNotFoundError:
+                    continue
+                files.append((stat.st_mtime, stat.st_size, path))
+        total = sum(size for _, size, _ in files)
+        for _, size, path in sorted(files):
+            if total <= self.max_bytes:
+                break
+            try:
+                os.unlink(path)
+            except FileNotFoundError:
+                pass
+            total -= size
+
+@st.cache_resource
+def report_cache():
+    return ReportCache()
+
+def cached_report(kind, uploaded_files, target_month, build, employee_costs=None):
+    """Returns build()'s result dict for these inputs, building it only on a cache miss."""
+    cache = report_cache()
+    key = report_cache_key(kind, uploaded_files, target_month, employee_costs)
+    result = cache.get(key)
+    if result is None:
+        result = build()
+        cache.put(key, result)
+    return result
+
+def build_payroll_report(uploaded_files, target_month):
+    run = RunCheckpoint.for_uploads(uploaded_files, target_month)
+    saved = run.load_output('payroll')
+    if saved is None:
+        with run.open_weeks(uploaded_files) as (week_list, warnings):
+            saved = _finish_run_payroll(run, week_list, warnings, target_month)
+    return {'payroll_data': saved['data'], 'payroll_filename': saved['filename'], 'monthly_stats': saved['monthly_stats'],
+            'monthly_totals': saved['monthly_totals'], 'warnings': saved['warnings'], 'coverage': saved['coverage'],
+            'year': saved['year'], 'run_id': run.run_id}
+
+def build_cost_report(uploaded_files, employee_costs, target_month):
+    run = RunCheckpoint.for_uploads(uploaded_files, target_month)
+    saved = run.load_output('costs')
+    if saved is None or saved['employee_costs'] != employee_costs:
+        with run.open_weeks(uploaded_files) as (week_list, _):
+            output, location_costs, debug_colors, cube = process_cost_analysis(None, employee_costs, target_month, week_list=week_list)
+        saved = run.save_output('costs', output.getvalue(), cost_report_filename(target_month), {'location_costs': location_costs,
+                                'cost_cube_cells': cube.cells, 'employee_costs': employee_costs})
+    return {'cost_data': saved['data'], 'location_costs': saved['location_costs'],
+            'cost_cube_cells': saved['cost_cube_cells'], 'run_id': run.run_id}
+
+def build_monthly_reports(uploaded_files, employee_costs, target_month):
+    run = RunCheckpoint.for_uploads(uploaded_files, target_month)
+    with run.open_weeks(uploaded_files) as (week_list, warnings):
+        monthly, resumed_weeks = run.payroll_progress()
+        reports = run_monthly_reports(None, target_month, employee_costs, week_list=week_list, aggregates=monthly,
+                                      week_done=run.save_week_stats, resumed_weeks=resumed_weeks)
+        year = payroll_year(week_list, target_month)
+    coverage = reports['coverage']
+    run.save_output('payroll', reports['payroll_file'].getvalue(), reports['payroll_filename'],
+                    {'monthly_stats': reports['monthly_stats'], 'monthly_totals': reports['monthly_totals'],
+                     'warnings': warnings, 'coverage': coverage, 'year': year})
+    run.save_output('costs', reports['cost_file'].getvalue(), cost_report_filename(target_month), {'location_costs': reports['location_costs'],
+                    'cost_cube_cells': reports['cost_cube'].cells, 'employee_costs': employee_costs})
+    return {'payroll_data': reports['payroll_file'].getvalue(), 'payroll_filename': reports['payroll_filename'],
+            'monthly_stats': reports['monthly_stats'], 'monthly_totals': reports['monthly_totals'],
+            'cost_data': reports['cost_file'].getvalue(),
+            'location_costs': reports['location_costs'], 'cost_cube_cells': reports['cost_cube'].cells,
+            'coverage': coverage, 'year': year, 'run_id': run.run_id}
+
+def cost_report_filename(target_month):
+    return f"ΚΟΣΤΟΛΟΓΗΣΗ_ΚΑΤΑΣΤΗΜΑΤΑ_{month_names_display.get(target_month, 'OUTPUT').upper()}.xlsx"
+
+# --- Run Checkpoints ---
+# A month-end run lives in RUN_CHECKPOINT_DIR/<run_id>/:
+#   manifest.json          month, uploaded files (name, digest), which files' weeks are saved,
+#                          the number of arranged weeks once all are, payroll progress, outputs
+#   weeks/<digest>-<n>.week  sheet n of an uploaded file, packed (see pack_week) as soon as the
+#                          file is parsed and memory-mapped on resume
+#   weeks/<n>.payroll      month totals of arranged week n, saved as soon as the week finishes
+#   <kind>.xlsx/.pickle    finished outputs ('payroll', 'costs') and their stats
+# The run ID is a digest of the uploads, month and app version: uploading the same
+# files again resumes the run, and ?run=<id> restores it when the session is gone.
+# Sessions with the same uploads share the run: files are written atomically and the
+# manifest is only updated under its data_file_lock.
+class RunCheckpoint:
+    """One month-end run on disk: its loaded weeks, payroll progress and finished outputs."""
+
+    def __init__(self, run_id, directory=RUN_CHECKPOINT_DIR):
+        self.run_id = run_id
+        self.path = os.path.join(directory, run_id)
+
+    @classmethod
+    def for_uploads(cls, uploaded_files, target_month):
+        files = [(f.name, content_digest(f.getvalue())) for f in expand_week_uploads(uploaded_files)]
+        payload = json.dumps([files, target_month, _source_digest()], ensure_ascii=False)
+        run = cls(content_digest(payload.encode('utf-8'))[:16])
+        with data_file_lock(run._manifest_path()):
+            if run.manifest() is None:
+                run._write_manifest({'month': target_month, 'created': time.time(),
+                                     'files': [name for name, _ in files], 'digests': [digest for _, digest in files],
+                                     'parsed': {}, 'weeks': None, 'payroll_weeks': 0, 'outputs': {}})
+        return run
+
+    @classmethod
+    def find(cls, run_id):
+        """The saved run with this ID, or None."""
+        if not run_id or not re.fullmatch(r'[0-9a-f]{16}', run_id):
+            return None
+        run = cls(run_id)
+        return run if run.manifest() is not None else None
+
+    def _manifest_path(self):
+        return os.path.join(self.path, 'manifest.json')
+
+    def manifest(self):
+        try:
+            with open(self._manifest_path(), encoding='utf-8') as f:
+                return json.load(f)
+        except (OSError, ValueError):
+            return None
+
+    def _write_manifest(self, manifest):
+        _write_atomic(self._manifest_path(), json.dumps(manifest, ensure_ascii=False).encode('utf-8'))
+
+    def _update_manifest(self, update):
+        """Applies update(manifest) as one read-modify-write, so concurrent sessions do not lose changes."""
+        with data_file_lock(self._manifest_path()):
+            manifest = self.manifest()
+            update(manifest)
+            self._write_manifest(manifest)
+
+    @contextmanager
+    def open_weeks(self, uploaded_files=None):
+        """(week_list, upload warnings) for a with block.
+
+        Files whose weeks are checkpointed are mapped from disk; the others are parsed from
+        the uploads and checkpointed file by file, so an interrupted run resumes from the
+        first file without a checkpoint. The mappings are closed when the block ends.
+        """
+        manifest = self.manifest()
+        uploads = {content_digest(f.getvalue()): f for f in expand_week_uploads(uploaded_files or [])}
+        upload_index = UploadIndex()
+        opened = []
+        try:
+            parsed_files = []
+            for name, digest in zip(manifest['files'], manifest['digests']):
+                if upload_index.is_duplicate_digest(name, digest):
+                    continue
+                file_weeks = self._map_file_weeks(digest, manifest['parsed'].get(digest), opened)
+                if file_weeks is None:
+                    if digest not in uploads:
+                        raise ValueError(f"The weeks of {name} are not checkpointed")
+                    file_weeks = week_parse_cache().get(uploads[digest])
+                    self._save_file_weeks(digest, file_weeks)
+                parsed_files.append((name, file_weeks))
+            week_list = arrange_weeks(parsed_files, upload_index)
+            if manifest['weeks'] is None:
+                def complete(manifest):
+                    manifest['weeks'] = len(week_list)
+                    manifest['week_names'] = [name for name, _, _ in week_list]
+                self._update_manifest(complete)
+            yield week_list, upload_index.warnings()
+        finally:
+            for ws, mapping in opened:
+                ws.release()
+                mapping.close()
+
+    def _map_file_weeks(self, digest, titles, opened):
+        """[(sheet title, PackedSheet, WeekDates)] of a checkpointed file, or None."""
+        if titles is None:
+            return None
+        file_weeks = []
+        for n, title in enumerate(titles):
+            try:
+                # The sheet reads the mapped file in place; open_weeks closes both
+                with open(os.path.join(self.path, 'weeks', f"{digest}-{n}.week"), 'rb') as f:
+                    mapping = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+                try:
+                    ws = PackedSheet(mapping)
+                except (ValueError, struct.error):
+                    mapping.close()
+                    raise
+            except (OSError, ValueError, struct.error):
+                return None
+            opened.append((ws, mapping))
+            file_weeks.append((title, ws, ws.week))
+        return file_weeks
+
+    def _save_file_weeks(self, digest, file_weeks):
+        for n, (title, ws, week) in enumerate(file_weeks):
+            _write_atomic(os.path.join(self.path, 'weeks', f"{digest}-{n}.week"), pack_week(ws, week))
+
+        def parsed(manifest):
+            manifest['parsed'][digest] = [title for title, _, _ in file_weeks]
+        self._update_manifest(parsed)
+
+    def save_week_stats(self, week_idx, week_stats):
+        """Checkpoints one finished payroll week (process_payroll's week_done)."""
+        _write_atomic(os.path.join(self.path, 'weeks', f"{week_idx}.payroll"), pickle.dumps(week_stats.records()))
+
+        def progress(manifest):
+            if manifest['payroll_weeks'] == week_idx:
+                manifest['payroll_weeks'] = week_idx + 1
+        self._update_manifest(progress)
+
+    def payroll_progress(self):
+        """(Aggregates of the checkpointed payroll weeks, how many): where process_payroll resumes."""
+        monthly = Aggregates(EMPLOYEE_STATS_FIELDS)
+        finished = self.manifest()['payroll_weeks']
+        for week_idx in range(finished):
+            try:
+                with open(os.path.join(self.path, 'weeks', f"{week_idx}.payroll"), 'rb') as f:
+                    records = pickle.load(f)
+            except (OSError, pickle.UnpicklingError, EOFError):
+                return monthly, week_idx
+            monthly.add_records(records)
+        return monthly, finished
+
+    def save_output(self, kind, data, filename, details):
+        """Saves a finished workbook with its (plain) details; returns them as load_output does."""
+        _write_atomic(os.path.join(self.path, f"{kind}.xlsx"), data)
+        _write_atomic(os.path.join(self.path, f"{kind}.pickle"), pickle.dumps(details))
+
+        def finished(manifest):
+            manifest['outputs'][kind] = {'filename': filename, 'finished': time.time()}
+        self._update_manifest(finished)
+        return dict(details, data=data, filename=filename)
+
+    def load_output(self, kind):
+        """{'data', 'filename', **details} of a finished output, or None."""
+        manifest = self.manifest()
+        if not manifest or kind not in manifest['outputs']:
+            return None
+        try:
+            with open(os.path.join(self.path, f"{kind}.xlsx"), 'rb') as f:
+                data = f.read()
+            with open(os.path.join(self.path, f"{kind}.pickle"), 'rb') as f:
+                details = pickle.load(f)
+        except (OSError, pickle.UnpicklingError, EOFError):
+            return None
+        return dict(details, data=data, filename=manifest['outputs'][kind]['filename'])
+
+def _finish_run_payroll(run, week_list, warnings, target_month):
+    """Runs the payroll from the run's first unfinished week and saves the output."""
+    monthly, resumed_weeks = run.payroll_progress()
+    coverage = store_coverage(week_list, target_month)
+    output, filename, monthly_stats = process_payroll(None, target_month, week_list=week_list, aggregates=monthly,
+                                                      coverage=coverage, week_done=run.save_week_stats,
+                                                      resumed_weeks=resumed_weeks)
+    return run.save_output('payroll', output.getvalue(), filename, {'monthly_stats': monthly_stats, 'warnings': warnings,
+                           'monthly_totals': monthly.totals(), 'coverage': coverage,
+                           'year': payroll_year(week_list, target_month)})
+
+def resume_run_payroll(run):
+    """Finishes a run's payroll from its checkpointed weeks, without the uploads."""
+    with run.open_weeks() as (week_list, warnings):
+        return _finish_run_payroll(run, week_list, warnings, run.manifest()['month'])
+
+def evict_stale_runs():
+    """Deletes checkpointed runs older than RUN_RETENTION_SECONDS."""
+    if not os.path.isdir(RUN_CHECKPOINT_DIR):
+        return
+    now = time.time()
+    for run_id in os.listdir(RUN_CHECKPOINT_DIR):
+        run = RunCheckpoint(run_id)
+        manifest = run.manifest()
+        if manifest is None or now - manifest.get('created', 0) > RUN_RETENTION_SECONDS:
+            shutil.rmtree(run.path, ignore_errors=True)
+
+# --- UI Fragments ---
+def reset_week_scenario(grid_key):
+    st.session_state.pop(grid_key, None)
+
+@st.fragment
+def render_week_scenario(run):
+    """Editable grid of one week of the run with the effect of the edits, rerun as a fragment."""
+    manifest = run.manifest()
+    week_names = manifest['week_names']
+    st.markdown('<div class="step-card">', unsafe_allow_html=True)
+    st.markdown('<div class="step-title">🧪 Σενάριο Εβδομάδας (τι θα γινόταν αν...)</div>', unsafe_allow_html=True)
+    week_idx = st.selectbox("Εβδομάδα:", options=list(range(len(week_names))),
+                            format_func=lambda i: week_title(week_names[i]), key="scenario_week")
+    
+    # The baseline is built once per week and priced once per costs; an edit only
+    # recomputes the edited rows
+    daily_costs = st.session_state.get('employee_costs', {})
+    cached = st.session_state.get('week_scenario')
+    if cached is None or cached[0] != (run.run_id, week_idx):
+        with run.open_weeks() as (week_list, _):
+            file_name, ws, week = week_list[week_idx]
+            cached = ((run.run_id, week_idx), week_scenario(file_name, ws, week, manifest['month'], daily_costs))
+        st.session_state['week_scenario'] = cached
+    elif cached[1]['daily_costs'] != daily_costs:
+        price_scenario(cached[1], daily_costs)
+    scenario = cached[1]
+    
+    grid_key = f"scenario_grid_{run.run_id}_{week_idx}"
+    other_month = [label for label, included in zip(scenario['columns'], scenario['included']) if not included]
+    st.data_editor(scenario_grid(scenario), key=grid_key, hide_index=True, use_container_width=True,
+                   disabled=['ΕΡΓΑΖΟΜΕΝΟΣ'] + other_month)
+    st.caption("Γράψε βάρδια (π.χ. `09:00-17:00`), `ΡΕΠΟ`, `Α` ή άφησε το κελί κενό. Την Κυριακή το κατάστημα "
+               "γράφεται σε αγκύλες, π.χ. `10:00-18:00 [ΑΙΓΑΛΕΩ]`. Οι ημέρες άλλου μήνα δεν αλλάζουν.")
+    
+    started = time.perf_counter()
+    result = evaluate_scenario(scenario, st.session_state.get(grid_key, {}).get('edited_rows', {}))
+    elapsed_ms = (time.perf_counter() - started) * 1000
+    
+    if not result['changes']:
+        st.info("ℹ️ Άλλαξε κελιά στον πίνακα για να δεις αμέσως ώρες, υπερεργασία, υπερωρίες και κόστος καταστημάτων.")
+    else:
+        st.markdown("**✏️ Αλλαγές στο πρόγραμμα**")
+        st.dataframe([{'ΕΡΓΑΖΟΜΕΝΟΣ': scenario['names'][row], 'ΚΕΛΙ': scenario['columns'][i],
+                       'ΠΡΙΝ': before or '—', 'ΜΕΤΑ': after or '—'} for row, i, before, after in result['changes']],
+                     use_container_width=True, hide_index=True)
+        
+        st.markdown("**👥 Επίδραση στους εργαζόμενους**")
+        employee_rows = []
+        for row in result['changed']:
+            before, after = scenario['stats'][row], result['stats'][row]
+            employee_rows.append({
+                'ΕΡΓΑΖΟΜΕΝΟΣ': scenario['names'][row],
+                'ΗΜΕΡΕΣ ΕΡΓΑΣΙΑΣ': f"{before['days_worked']} → {after['days_worked']}",
+                'ΩΡΕΣ/ΕΒΔΟ': f"{before['hours']:.1f} → {after['hours']:.1f}",
+                'ΥΠΕΡΕΡΓΑΣΙΑ (h)': f"{before['overwork']:.1f} → {after['overwork']:.1f}",
+                'ΥΠΕΡΩΡΙΕΣ(h)': f"{before['overtime']:.1f} → {after['overtime']:.1f}",
+            })
+        st.dataframe(employee_rows, use_container_width=True, hide_index=True)
+        
+        st.markdown("**🏪 Καταστήματα (εβδομάδα)**")
+        s_cols = st.columns(len(result['stores']))
+        for idx, (store, ((hours, cost), (new_hours, new_cost))) in enumerate(result['stores'].items()):
+            with s_cols[idx]:
+                if daily_costs:
+                    st.metric(store, f"{new_cost:,.2f}€", f"{new_cost - cost:+,.2f}€" if abs(new_cost - cost) >= 0.005 else None)
+                else:
+                    st.metric(store, f"{new_hours:.1f}h", f"{new_hours - hours:+.1f}h" if abs(new_hours - hours) >= 0.05 else None)
+        if not daily_costs:
+            st.caption("Για κόστος ανά κατάστημα συμπλήρωσε τα μηνιαία κόστη στην καρτέλα «🏪 Κοστολόγηση».")
+        st.caption(f"⚡ Επανυπολογίστηκαν {len(result['changed'])} από {len(scenario['names'])} εργαζόμενους "
+                   f"σε {elapsed_ms:.1f} ms.")
+        st.button("↩️ Επαναφορά αρχικού προγράμματος", key="scenario_reset",
+                  on_click=reset_week_scenario, args=(grid_key,))
+    st.markdown('</div>', unsafe_allow_html=True)
+
+def _apply_monthly_costs(employee_list, rows, source):
+    """Sets the cost inputs from (name, monthly cost) rows in one step and records a report."""
+    matched, unmatched = match_cost_table(rows, employee_list)
+    for employee_name, monthly_cost in matched.items():
+        st.session_state[f"cost_{employee_name}"] = float(monthly_cost)
+    st.session_state['cost_import_report'] = {
+        'source': source,
+        'matched': len(matched),
+        'unmatched': unmatched,
+        'missing': [name for name in employee_list if name not in matched],
+    }
+
+def apply_cost_table_upload(employee_list):
+    uploaded = st.session_state.get('cost_table_upload')
+    if not uploaded:
+        st.session_state['cost_import_report'] = {'error': "Δεν επιλέχθηκε αρχείο κόστους."}
+        return
+    try:
+        rows = read_cost_table(uploaded)
+    except Exception as e:
+        st.session_state['cost_import_report'] = {'error': f"Το αρχείο δεν διαβάστηκε: {e}"}
+        return
+    _apply_monthly_costs(employee_list, rows, uploaded.name)
+
+def apply_saved_cost_table(employee_list, month):
+    table = load_cost_tables().get(month, {})
+    _apply_monthly_costs(employee_list, list(table.items()), month_names_display[month])
+
+@st.fragment
+def render_cost_entry(employee_list, work_days, store_cells, target_month):
+    """Per-employee monthly cost inputs with a live store preview, rerun as a fragment."""
+    st.markdown('<div class="step-card">', unsafe_allow_html=True)
+    st.markdown(f'<div class="step-title">💰 Βήμα 2: Μηνιαίο Κόστος ανά Εργαζόμενο ({len(employee_list)} συνολικά)</div>', unsafe_allow_html=True)
+    
+    with st.expander("📥 Μαζική εισαγωγή κόστους"):
+        st.file_uploader(
+            "Αρχείο με δύο στήλες: Ονοματεπώνυμο, Μηνιαίο Κόστος",
+            type=['xlsx', 'csv', 'tsv'], key="cost_table_upload"
+        )
+        previous_month = 12 if target_month == 1 else target_month - 1
+        saved_tables = load_cost_tables()
+        col_i1, col_i2 = st.columns(2)
+        with col_i1:
+            st.button("✅ Εφαρμογή αρχείου", use_container_width=True, key="apply_cost_table",
+                      on_click=apply_cost_table_upload, args=(employee_list,))
+        with col_i2:
+            st.button(f"↩️ Κόστη {month_names_display[previous_month]}", use_container_width=True, key="apply_saved_costs",
+                      disabled=previous_month not in saved_tables,
+                      on_click=apply_saved_cost_table, args=(employee_list, previous_month))
+        
+        report = st.session_state.pop('cost_import_report', None)
+        if report and 'error' in report:
+            st.error(f"❌ {report['error']}")
+        elif report:
+            st.success(f"✅ Εφαρμόστηκαν **{report['matched']}** κόστη από «{report['source']}».")
+            if report['unmatched']:
+                st.warning("⚠️ Δεν βρέθηκαν στο πρόγραμμα: " + ", ".join(report['unmatched']))
+            if report['missing']:
+                st.info("ℹ️ Χωρίς κόστος στο αρχείο: " + ", ".join(report['missing']))
+    
+    employee_costs = {}
+    monthly_costs = {}
+    cols = st.columns(3) # Use 3 columns for better spacing
+    for idx, employee_name in enumerate(employee_list):
+        col = cols[idx % 3]
+        with col:
+            days = work_days.get(employee_name, 0)
+            monthly_cost = st.number_input(
+                f"{employee_name} ({days}ημ)",
+                min_value=0.0, step=10.0, format="%.2f",
+                key=f"cost_{employee_name}"
+            )
+            monthly_costs[employee_name] = monthly_cost
+            if monthly_cost > 0 and days > 0:
+                daily_cost = monthly_cost / days
+                employee_costs[employee_name] = daily_cost
+                st.caption(f"→ {daily_cost:.2f}€ / ημέρα")
+            elif days == 0 and monthly_cost > 0:
+                employee_costs[employee_name] = 0.0
+                st.error("Σφάλμα: 0 ημέρες.")
+    st.session_state['employee_costs'] = employee_costs
+    st.session_state['employee_monthly_costs'] = monthly_costs
+    
+    # Live preview: daily cost × cells charged to each store (same split as the report)
+    preview = {store: 0.0 for store in STORE_COLORS}
+    for employee_name, daily_cost in employee_costs.items():
+        for store, cells in store_cells.get(employee_name, {}).items():
+            preview[store] += daily_cost * cells
+    preview_total = sum(preview.values())
+    if preview_total > 0:
+        st.markdown("**👀 Προεπισκόπηση Κόστους ανά Κατάστημα**")
+        p_cols = st.columns(len(preview))
+        for idx, (store, value) in enumerate(preview.items()):
+            with p_cols[idx]:
+                st.metric(store, f"{value:,.2f}€", f"{value / preview_total * 100:.1f}%")
+    st.markdown('</div>', unsafe_allow_html=True)
 
 # === STREAMLIT UI ===
 # === STREAMLIT UI ===
-st.set_page_config(
-    page_title="ThikiShop Μισθοδοσία & Κοστολόγηση", 
-    page_icon="✨", 
-    layout="wide",
-    initial_sidebar_state="expanded"
-)
-
-# Modern Custom CSS
-st.markdown("""
+def render_page():
+    """The Streamlit page; only runs when app.py is the script, so importing it has no side effects."""
+    st.set_page_config(
+        page_title="ThikiShop Μισθοδοσία & Κοστολόγηση", 
+        page_icon="✨", 
+        layout="wide",
+        initial_sidebar_state="expanded"
+    )
+
+    # Release generated files this session no longer needs
+    evict_stale_artifacts()
+    artifact_sweep()
+    evict_stale_runs()
+
+    # Modern Custom CSS
+    st.markdown("""
 <style>
     @import url('https://fonts.googleapis.com/css2?family=Inter:wght@300;400;600;700&display=swap');
     
@@ -979,6 +3253,23 @@ st.markdown("""
         background-color: #334155;
     }
     
+    /* Coverage heatmap */
+    .coverage-heatmap {
+        overflow-x: auto;
+    }
+    
+    .coverage-heatmap table {
+        border-collapse: collapse;
+        font-size: 0.7rem;
+    }
+    
+    .coverage-heatmap th, .coverage-heatmap td {
+        border: 1px solid rgba(255, 255, 255, 0.08);
+        padding: 1px 4px;
+        text-align: center;
+        min-width: 1.6rem;
+    }
+    
     /* Footer */
     .modern-footer {
         text-align: center;
@@ -1017,225 +3308,384 @@ st.markdown("""
 </style>
 """, unsafe_allow_html=True)
 
-# --- SIDEBAR (Instructions) ---
-with st.sidebar:
-    st.markdown("<h2 style='text-align: center; color: #1e3c72;'>📖 Οδηγίες</h2>", unsafe_allow_html=True)
-    st.markdown("---")
-    
-    st.markdown("### 1️⃣ Ανέβασμα")
-    st.info("Σύρε και άφησε τα εβδομαδιαία προγράμματα `(ΕΠΙΘ).xlsx` στο αντίστοιχο πεδίο.")
-    
-    st.markdown("### 2️⃣ Επιλογή Μήνα")
-    st.info("Επίλεξε τον μήνα για τον οποίο θέλεις να τρέξει ο υπολογισμός.")
-    
-    st.markdown("### 3️⃣ Εξαγωγή")
-    st.info("Πάτα **«Δημιουργία»** για να υπολογιστούν αυτόματα Υπερεργασίες, Υπερωρίες και Συνολικό Κόστος.")
-    
-    st.markdown("---")
-    st.markdown("**💡 Έξυπνοι Υπολογισμοί:**")
-    st.markdown("- **Κανονικό:** 40 ώρες\n- **Κομμένη Εβδ.:** Αναλογικά\n- **Κόστος:** Ανά Κατάστημα")
-    
-    st.markdown("<div style='margin-top: 50px; text-align: center; font-size: 12px; color: #a0aec0;'>Version 2.0.0 Pro</div>", unsafe_allow_html=True)
+    # --- SIDEBAR (Instructions) ---
+    with st.sidebar:
+        st.markdown("<h2 style='text-align: center; color: #1e3c72;'>📖 Οδηγίες</h2>", unsafe_allow_html=True)
+        st.markdown("---")
+        
+        st.markdown("### 1️⃣ Ανέβασμα")
+        st.info("Σύρε και άφησε τα εβδομαδιαία προγράμματα `(ΕΠΙΘ).xlsx` (ή εξαγωγές `.csv`/`.tsv`, ή ένα `.zip` με όλες τις εβδομάδες) στο αντίστοιχο πεδίο.")
+        
+        st.markdown("### 2️⃣ Επιλογή Μήνα")
+        st.info("Επίλεξε τον μήνα για τον οποίο θέλεις να τρέξει ο υπολογισμός.")
+        
+        st.markdown("### 3️⃣ Εξαγωγή")
+        st.info("Πάτα **«Δημιουργία»** για να υπολογιστούν αυτόματα Υπερεργασίες, Υπερωρίες και Συνολικό Κόστος.")
+        
+        st.markdown("---")
+        st.markdown("**💡 Έξυπνοι Υπολογισμοί:**")
+        st.markdown("- **Κανονικό:** 40 ώρες\n- **Κομμένη Εβδ.:** Αναλογικά\n- **Κόστος:** Ανά Κατάστημα")
+        
+        usage = session_memory_usage()
+        in_memory_mb = (usage['uploads'] + usage['artifacts_memory'] + usage['stats']) / (1024 * 1024)
+        st.caption(f"🧠 Μνήμη συνεδρίας: {in_memory_mb:.1f} MB (+{usage['artifacts_disk'] / (1024 * 1024):.1f} MB στον δίσκο)")
+        
+        st.markdown("<div style='margin-top: 50px; text-align: center; font-size: 12px; color: #a0aec0;'>Version 2.0.0 Pro</div>", unsafe_allow_html=True)
 
-# --- HERO SECTION ---
-st.markdown("""
+    # --- HERO SECTION ---
+    st.markdown("""
 <div class="hero-container">
     <div class="hero-title">✨ ThikiShop Insights</div>
     <div class="hero-subtitle">Υπερσύγχρονο Σύστημα Αυτοματοποιημένης Μισθοδοσίας & Κοστολόγησης</div>
 </div>
 """, unsafe_allow_html=True)
 
-# Tabs
-tab1, tab2 = st.tabs(["💶 Μισθοδοσία (Εργαζόμενοι)", "🏪 Κοστολόγηση"])
-
-month_names_display = {
-    1: 'Ιανουάριος', 2: 'Φεβρουάριος', 3: 'Μάρτιος', 4: 'Απρίλιος',
-    5: 'Μάιος', 6: 'Ιούνιος', 7: 'Ιούλιος', 8: 'Αύγουστος',
-    9: 'Σεπτέμβριος', 10: 'Οκτώβριος', 11: 'Νοέμβριος', 12: 'Δεκέμβριος'
-}
+    # Tabs
+    tab1, tab2 = st.tabs(["💶 Μισθοδοσία (Εργαζόμενοι)", "🏪 Κοστολόγηση"])
 
-# === TAB 1: PAYROLL ===
-with tab1:
-    st.markdown('<div class="step-card">', unsafe_allow_html=True)
-    st.markdown('<div class="step-title">📁 Βήμα 1: Ανέβασμα Προγραμμάτων</div>', unsafe_allow_html=True)
-    uploaded_files = st.file_uploader(
-        "Σύρε τα αρχεία Excel εδώ (ΕΠΙΘ).xlsx",
-        type=['xlsx'],
-        accept_multiple_files=True,
-        help="Μπορείς να επιλέξεις πολλά αρχεία ταυτόχρονα.",
-        key="payroll_upload"
-    )
-    if uploaded_files:
-        st.success(f"✅ Ανέβηκαν **{len(uploaded_files)}** αρχεία επιτυχώς!")
-    st.markdown('</div>', unsafe_allow_html=True)
-    
-    st.markdown('<div class="step-card">', unsafe_allow_html=True)
-    st.markdown('<div class="step-title">📅 Βήμα 2: Επιλογή & Εκτέλεση</div>', unsafe_allow_html=True)
-    
-    col_select, col_btn = st.columns([1, 1])
-    with col_select:
-        selected_month = st.selectbox(
-            "Μήνας Υπολογισμού:",
-            options=list(month_names_display.keys()),
-            format_func=lambda x: month_names_display[x],
-            index=10,
-            key="payroll_month"
+    # === TAB 1: PAYROLL ===
+    with tab1:
+        st.markdown('<div class="step-card">', unsafe_allow_html=True)
+        st.markdown('<div class="step-title">📁 Βήμα 1: Ανέβασμα Προγραμμάτων</div>', unsafe_allow_html=True)
+        uploaded_files = st.file_uploader(
+            "Σύρε τα αρχεία Excel εδώ (ΕΠΙΘ).xlsx",
+            type=['xlsx', 'csv', 'tsv', 'zip'],
+            accept_multiple_files=True,
+            help="Μπορείς να επιλέξεις πολλά αρχεία ταυτόχρονα, ένα .zip με όλες τις εβδομάδες ή ένα Excel με ένα φύλλο ανά εβδομάδα. Δέχεται και εξαγωγές CSV/TSV με την ίδια διάταξη.",
+            key="payroll_upload"
         )
-    with col_btn:
-        st.write("") # Vertical alignment
-        st.write("") # Vertical alignment
-        generate_btn = st.button("🚀 Δημιουργία Μισθοδοσίας", use_container_width=True, key="gen_payroll")
-    st.markdown('</div>', unsafe_allow_html=True)
-    
-    if generate_btn:
-        if not uploaded_files:
-            st.error("❌ Παρακαλώ ανέβασε τουλάχιστον ένα αρχείο!")
-        else:
-            with st.spinner(f"⏳ Επεξεργασία δεδομένων... Παρακαλώ περιμένετε..."):
-                try:
-                    output_file, filename, monthly_stats = process_payroll(uploaded_files, selected_month)
-                    
-                    st.session_state['payroll_file'] = output_file
-                    st.session_state['payroll_filename'] = filename
-                    st.session_state['monthly_stats'] = monthly_stats
-                    
-                    st.success(f"🎉 **Επιτυχία!** Το αρχείο '{filename}' είναι έτοιμο!")
-                    
-                    if monthly_stats:
-                        st.markdown("### 📊 Συνοπτικά Στατιστικά Μήνα")
-                        total_employees = len(monthly_stats)
-                        total_days = sum(s['days_worked'] for s in monthly_stats.values())
-                        total_overwork = sum(s['overwork'] for s in monthly_stats.values())
-                        total_overtime = sum(s['overtime'] for s in monthly_stats.values())
+        if uploaded_files:
+            # Parsing starts now, while the month is being chosen
+            prefetch_week_uploads(uploaded_files)
+            st.success(f"✅ Ανέβηκαν **{len(expand_week_uploads(uploaded_files))}** αρχεία επιτυχώς!")
+        st.markdown('</div>', unsafe_allow_html=True)
+        
+        st.markdown('<div class="step-card">', unsafe_allow_html=True)
+        st.markdown('<div class="step-title">📅 Βήμα 2: Επιλογή & Εκτέλεση</div>', unsafe_allow_html=True)
+        
+        col_select, col_btn = st.columns([1, 1])
+        with col_select:
+            selected_month = st.selectbox(
+                "Μήνας Υπολογισμού:",
+                options=list(month_names_display.keys()),
+                format_func=lambda x: month_names_display[x],
+                index=10,
+                key="payroll_month"
+            )
+        with col_btn:
+            st.write("") # Vertical alignment
+            st.write("") # Vertical alignment
+            generate_btn = st.button("🚀 Δημιουργία Μισθοδοσίας", use_container_width=True, key="gen_payroll")
+        st.markdown('</div>', unsafe_allow_html=True)
+        
+        if generate_btn:
+            if not uploaded_files:
+                st.error("❌ Παρακαλώ ανέβασε τουλάχιστον ένα αρχείο!")
+            else:
+                with st.spinner(f"⏳ Επεξεργασία δεδομένων... Παρακαλώ περιμένετε..."):
+                    try:
+                        report = cached_report('payroll', uploaded_files, selected_month,
+                                               lambda: build_payroll_report(uploaded_files, selected_month))
+                        output_file = io.BytesIO(report['payroll_data'])
+                        filename, monthly_stats = report['payroll_filename'], report['monthly_stats']
+                        for warning in report['warnings']:
+                            st.warning(f"⚠️ {warning}")
                         
-                        col1, col2, col3, col4 = st.columns(4)
-                        with col1:
-                            st.metric("👥 Εργαζόμενοι", total_employees)
-                        with col2:
-                            st.metric("📅 Ημέρες", total_days)
-                        with col3:
-                            st.metric("⚡ Υπερεργασία (h)", f"{total_overwork:.1f}")
-                        with col4:
-                            st.metric("🔥 Υπερωρίες (h)", f"{total_overtime:.1f}")
-                    
-                    st.markdown("<br>", unsafe_allow_html=True)
+                        store_artifact('payroll_file', report['payroll_data'], filename)
+                        st.session_state['monthly_stats'] = monthly_stats
+                        st.session_state['store_coverage'] = report['coverage']
+                        # Bookmarkable: ?run=<id> brings the results back after the session is lost
+                        st.query_params['run'] = report['run_id']
+                        
+                        st.success(f"🎉 **Επιτυχία!** Το αρχείο '{filename}' είναι έτοιμο!")
+                        
+                        if monthly_stats:
+                            st.markdown("### 📊 Συνοπτικά Στατιστικά Μήνα")
+                            monthly_totals = report['monthly_totals']
+                            total_employees = len(monthly_stats)
+                            total_days = monthly_totals['days_worked']
+                            total_overwork = monthly_totals['overwork']
+                            total_overtime = monthly_totals['overtime']
+                            
+                            col1, col2, col3, col4 = st.columns(4)
+                            with col1:
+                                st.metric("👥 Εργαζόμενοι", total_employees)
+                            with col2:
+                                st.metric("📅 Ημέρες", total_days)
+                            with col3:
+                                st.metric("⚡ Υπερεργασία (h)", f"{total_overwork:.1f}")
+                            with col4:
+                                st.metric("🔥 Υπερωρίες (h)", f"{total_overtime:.1f}")
+                            
+                            # Year to date, from the months generated so far this year
+                            payroll_ledger = record_payroll_month(report['year'], selected_month, monthly_stats)
+                            for name, overtime_ytd, share in payroll_ledger.limit_warnings(report['year'], selected_month, monthly_stats):
+                                message = (f"**{name}**: {overtime_ytd:.1f}h υπερωρίες από 1/1/{report['year']} "
+                                           f"({share:.0%} του ετήσιου ορίου {ANNUAL_OVERTIME_LIMIT_HOURS}h)")
+                                if share >= 1:
+                                    st.error(f"⛔ {message}")
+                                else:
+                                    st.warning(f"⚠️ {message}")
+                            with st.expander(f"📒 Από την αρχή του {report['year']} "
+                                             f"({len(payroll_ledger.recorded_months(report['year']))} μήνες στο ιστορικό)"):
+                                ytd_rows = []
+                                for name in monthly_stats:
+                                    ytd = payroll_ledger.year_to_date(report['year'], selected_month, name)
+                                    ytd_rows.append({'ΕΡΓΑΖΟΜΕΝΟΣ': name, 'ΗΜΕΡΕΣ': ytd['days_worked'],
+                                                     'ΥΠΕΡΕΡΓΑΣΙΑ (h)': round(ytd['overwork'], 1),
+                                                     'ΥΠΕΡΩΡΙΕΣ (h)': round(ytd['overtime'], 1), 'ΚΥΡΙΑΚΕΣ': ytd['sundays'],
+                                                     'ΟΡΙΟ ΥΠΕΡΩΡΙΩΝ': f"{ytd['overtime'] / ANNUAL_OVERTIME_LIMIT_HOURS:.0%}"})
+                                st.dataframe(ytd_rows, use_container_width=True, hide_index=True)
+                        
+                        st.markdown("<br>", unsafe_allow_html=True)
+                        st.download_button(
+                            label="📥 Λήψη Αρχείου Μισθοδοσίας",
+                            data=output_file,
+                            file_name=filename,
+                            mime="application/vnd.openxmlformats-officedocument.spreadsheetml.sheet",
+                            use_container_width=True,
+                            on_click=drop_artifact, args=('payroll_file',)
+                        )
+                        
+                    except Exception as e:
+                        st.error(f"❌ **Σφάλμα:** {str(e)}")
+                        st.exception(e)
+        else:
+            # Last generated file survives reruns until it is downloaded or expires
+            payroll_data, payroll_filename = load_artifact('payroll_file')
+            if payroll_data:
+                st.download_button(
+                    label=f"📥 Λήψη Αρχείου Μισθοδοσίας ({payroll_filename})",
+                    data=payroll_data,
+                    file_name=payroll_filename,
+                    mime="application/vnd.openxmlformats-officedocument.spreadsheetml.sheet",
+                    use_container_width=True,
+                    on_click=drop_artifact, args=('payroll_file',)
+                )
+            saved_run = RunCheckpoint.find(st.query_params.get('run')) if not payroll_data else None
+            if saved_run and 'monthly_stats' not in st.session_state:
+                # A new session opened with ?run=<id>: offer what the run had finished
+                manifest = saved_run.manifest()
+                st.markdown('<div class="step-card">', unsafe_allow_html=True)
+                st.markdown(f'<div class="step-title">♻️ Αποθηκευμένη εκτέλεση ({month_names_display.get(manifest["month"], "")})</div>', unsafe_allow_html=True)
+                st.caption(f"{len(manifest['files'])} αρχεία · "
+                           f"{datetime.datetime.fromtimestamp(manifest['created']).strftime('%d/%m/%Y %H:%M')}")
+                saved_payroll = saved_run.load_output('payroll')
+                if saved_payroll is None and manifest.get('weeks') is not None:
+                    st.info("Οι εβδομάδες έχουν διαβαστεί, η μισθοδοσία δεν ολοκληρώθηκε.")
+                    if st.button("▶️ Συνέχεια υπολογισμού", use_container_width=True, key="resume_run"):
+                        with st.spinner("⏳ Συνέχεια από το αποθηκευμένο σημείο..."):
+                            saved_payroll = resume_run_payroll(saved_run)
+                elif saved_payroll is None:
+                    st.warning("⚠️ Η εκτέλεση διακόπηκε πριν διαβαστούν τα αρχεία. Ανέβασέ τα ξανά.")
+                if saved_payroll:
+                    saved_totals = saved_payroll['monthly_totals']
+                    st.caption(f"👥 {len(saved_payroll['monthly_stats'])} εργαζόμενοι · "
+                               f"⚡ {saved_totals['overwork']:.1f}h υπερεργασία · "
+                               f"🔥 {saved_totals['overtime']:.1f}h υπερωρίες")
                     st.download_button(
-                        label="📥 Λήψη Αρχείου Μισθοδοσίας",
-                        data=output_file,
-                        file_name=filename,
+                        label=f"📥 Λήψη Αρχείου Μισθοδοσίας ({saved_payroll['filename']})",
+                        data=saved_payroll['data'],
+                        file_name=saved_payroll['filename'],
                         mime="application/vnd.openxmlformats-officedocument.spreadsheetml.sheet",
-                        use_container_width=True
+                        use_container_width=True,
+                        key="resume_payroll_download"
                     )
-                    
-                except Exception as e:
-                    st.error(f"❌ **Σφάλμα:** {str(e)}")
-                    st.exception(e)
-
-# === TAB 2: COST ANALYSIS ===
-with tab2:
-    st.markdown('<div class="step-card">', unsafe_allow_html=True)
-    st.markdown('<div class="step-title">📁 Βήμα 1: Αρχεία & Μήνας</div>', unsafe_allow_html=True)
-    
-    if 'monthly_stats' in st.session_state and 'payroll_upload' in st.session_state and st.session_state['payroll_upload']:
-        st.info("💡 **Τα αρχεία φορτώθηκαν αυτόματα** από την προηγούμενη καρτέλα (Μισθοδοσία).")
-        cost_uploaded_files = st.session_state['payroll_upload']
-        cost_selected_month = st.session_state.get('payroll_month', 10)
-    else:
-        col1, col2 = st.columns([2, 1])
-        with col1:
-            cost_uploaded_files = st.file_uploader(
-                "Ανέβασε Εβδομαδιαία Προγράμματα (ΕΠΙΘ).xlsx", 
-                type=['xlsx'], accept_multiple_files=True, key="cost_upload"
-            )
-        with col2:
-            cost_selected_month = st.selectbox(
-                "Επιλογή Μήνα:",
-                options=list(month_names_display.keys()),
-                format_func=lambda x: month_names_display[x],
-                index=10, key="cost_month"
-            )
-    st.markdown('</div>', unsafe_allow_html=True)
-
-    if cost_uploaded_files:
-        with st.spinner("🔄 Εύρεση ημερών εργασίας..."):
-            current_work_days = get_monthly_work_days(cost_uploaded_files, cost_selected_month)
+                saved_costs = saved_run.load_output('costs')
+                if saved_costs:
+                    st.download_button(
+                        label=f"📥 Λήψη Κοστολόγησης ({saved_costs['filename']})",
+                        data=saved_costs['data'],
+                        file_name=saved_costs['filename'],
+                        mime="application/vnd.openxmlformats-officedocument.spreadsheetml.sheet",
+                        use_container_width=True,
+                        key="resume_cost_download"
+                    )
+                st.markdown('</div>', unsafe_allow_html=True)
         
-        if current_work_days:
-            employee_list = sorted(list(current_work_days.keys()))
-            
+        # Staffing heatmap of the last payroll run
+        coverage = st.session_state.get('store_coverage')
+        if coverage and coverage['counts']:
             st.markdown('<div class="step-card">', unsafe_allow_html=True)
-            st.markdown(f'<div class="step-title">💰 Βήμα 2: Μηνιαίο Κόστος ανά Εργαζόμενο ({len(employee_list)} συνολικά)</div>', unsafe_allow_html=True)
-            employee_costs = {}
-            cols = st.columns(3) # Use 3 columns for better spacing
-            for idx, employee_name in enumerate(employee_list):
-                col = cols[idx % 3]
-                with col:
-                    days = current_work_days.get(employee_name, 0)
-                    monthly_cost = st.number_input(
-                        f"{employee_name} ({days}ημ)",
-                        min_value=0.0, step=10.0, format="%.2f",
-                        key=f"cost_{employee_name}"
-                    )
-                    if monthly_cost > 0 and days > 0:
-                        daily_cost = monthly_cost / days
-                        employee_costs[employee_name] = daily_cost
-                        st.caption(f"→ {daily_cost:.2f}€ / ημέρα")
-                    elif days == 0 and monthly_cost > 0:
-                        employee_costs[employee_name] = 0.0
-                        st.error("Σφάλμα: 0 ημέρες.")
+            st.markdown('<div class="step-title">🗺️ Κάλυψη Καταστημάτων (άτομα ανά 15λεπτο)</div>', unsafe_allow_html=True)
+            coverage_store = st.radio("Κατάστημα:", options=LAYOUT.stores, horizontal=True, key="coverage_store")
+            st.markdown(coverage_heatmap_html(coverage, coverage_store), unsafe_allow_html=True)
+            st.caption("Κόκκινο: κανείς στο κατάστημα. Όσο πιο έντονο το πράσινο, τόσο περισσότερα άτομα.")
             st.markdown('</div>', unsafe_allow_html=True)
+        
+        # What-if edits on the weeks of the current run (read back from its checkpoint)
+        scenario_run = RunCheckpoint.find(st.query_params.get('run'))
+        if scenario_run and scenario_run.manifest().get('weeks'):
+            render_week_scenario(scenario_run)
+
+    # === TAB 2: COST ANALYSIS ===
+    with tab2:
+        st.markdown('<div class="step-card">', unsafe_allow_html=True)
+        st.markdown('<div class="step-title">📁 Βήμα 1: Αρχεία & Μήνας</div>', unsafe_allow_html=True)
+        
+        if 'monthly_stats' in st.session_state and 'payroll_upload' in st.session_state and st.session_state['payroll_upload']:
+            st.info("💡 **Τα αρχεία φορτώθηκαν αυτόματα** από την προηγούμενη καρτέλα (Μισθοδοσία).")
+            cost_uploaded_files = st.session_state['payroll_upload']
+            cost_selected_month = st.session_state.get('payroll_month', 10)
+        else:
+            col1, col2 = st.columns([2, 1])
+            with col1:
+                cost_uploaded_files = st.file_uploader(
+                    "Ανέβασε Εβδομαδιαία Προγράμματα (ΕΠΙΘ).xlsx", 
+                    type=['xlsx', 'csv', 'tsv', 'zip'], accept_multiple_files=True, key="cost_upload"
+                )
+            with col2:
+                cost_selected_month = st.selectbox(
+                    "Επιλογή Μήνα:",
+                    options=list(month_names_display.keys()),
+                    format_func=lambda x: month_names_display[x],
+                    index=10, key="cost_month"
+                )
+            if cost_uploaded_files:
+                prefetch_week_uploads(cost_uploaded_files)
+        st.markdown('</div>', unsafe_allow_html=True)
+
+        if cost_uploaded_files:
+            with st.spinner("🔄 Εύρεση ημερών εργασίας..."):
+                cost_upload_index = UploadIndex()
+                current_work_days, current_store_cells = scan_cost_inputs(cost_uploaded_files, cost_selected_month, upload_index=cost_upload_index)
+            for warning in cost_upload_index.warnings():
+                st.warning(f"⚠️ {warning}")
             
-            st.markdown('<div class="step-card">', unsafe_allow_html=True)
-            st.markdown('<div class="step-title">🚀 Βήμα 3: Παραγωγή Αναφοράς</div>', unsafe_allow_html=True)
-            col_b1, col_b2, col_b3 = st.columns([1, 2, 1])
-            with col_b2:
-                generate_cost_btn = st.button("📊 Κοστολόγηση Καταστημάτων", use_container_width=True, key="gen_cost")
-            
-            if generate_cost_btn:
-                if not employee_costs:
-                    st.error("❌ Δεν δώσατε κανένα μηνιαίο κόστος!")
-                else:
-                    with st.spinner("⏳ Υπολογισμός μεριδίων ανά κατάστημα..."):
-                        try:
-                            cost_file, location_costs, debug_colors = process_cost_analysis(cost_uploaded_files, employee_costs, cost_selected_month)
-                            
-                            st.success("✅ **Η αναφορά ολοκληρώθηκε!**")
-                            
-                            st.markdown("### 🏆 Ανάλυση Κόστους Καταστημάτων")
-                            total_cost = sum(location_costs.values())
-                            
-                            if total_cost > 0:
-                                locs = ["ΡΕΝΤΗΣ", "ΑΙΓΑΛΕΩ", "ΠΕΙΡΑΙΑΣ", "ΠΕΡΙΣΤΕΡΙ"]
-                                m_cols = st.columns(4)
-                                for idx, loc in enumerate(locs):
-                                    c_val = location_costs.get(loc, 0)
-                                    p_val = (c_val / total_cost * 100)
-                                    with m_cols[idx]:
-                                        st.metric(loc, f"{c_val:,.2f}€", f"{p_val:.1f}%")
+            if current_work_days:
+                employee_list = sorted(list(current_work_days.keys()))
+                
+                # Editing a cost only reruns this panel, not the whole page
+                render_cost_entry(employee_list, current_work_days, current_store_cells, cost_selected_month)
+                employee_costs = st.session_state.get('employee_costs', {})
+                
+                st.markdown('<div class="step-card">', unsafe_allow_html=True)
+                st.markdown('<div class="step-title">🚀 Βήμα 3: Παραγωγή Αναφοράς</div>', unsafe_allow_html=True)
+                col_b1, col_b2 = st.columns(2)
+                with col_b1:
+                    generate_cost_btn = st.button("📊 Κοστολόγηση Καταστημάτων", use_container_width=True, key="gen_cost")
+                with col_b2:
+                    generate_all_btn = st.button(
+                        "🧾 Μισθοδοσία + Κοστολόγηση", use_container_width=True, key="gen_all",
+                        help="Και τα δύο αρχεία με ένα μόνο διάβασμα των προγραμμάτων."
+                    )
+                
+                if generate_cost_btn or generate_all_btn:
+                    if not employee_costs:
+                        st.error("❌ Δεν δώσατε κανένα μηνιαίο κόστος!")
+                    else:
+                        with st.spinner("⏳ Υπολογισμός μεριδίων ανά κατάστημα..."):
+                            try:
+                                if generate_all_btn:
+                                    reports = cached_report('monthly', cost_uploaded_files, cost_selected_month,
+                                                            lambda: build_monthly_reports(cost_uploaded_files, employee_costs, cost_selected_month),
+                                                            employee_costs)
+                                    store_artifact('payroll_file', reports['payroll_data'], reports['payroll_filename'])
+                                    st.session_state['monthly_stats'] = reports['monthly_stats']
+                                    st.session_state['store_coverage'] = reports['coverage']
+                                    record_payroll_month(reports['year'], cost_selected_month, reports['monthly_stats'])
+                                else:
+                                    reports = cached_report('costs', cost_uploaded_files, cost_selected_month,
+                                                            lambda: build_cost_report(cost_uploaded_files, employee_costs, cost_selected_month),
+                                                            employee_costs)
+                                st.query_params['run'] = reports['run_id']
+                                cost_file = io.BytesIO(reports['cost_data'])
+                                location_costs, cost_cube = reports['location_costs'], CostCube(reports['cost_cube_cells'])
+                                st.session_state['cost_cube'] = cost_cube
+                                save_cost_table(cost_selected_month, st.session_state.get('employee_monthly_costs', {}))
+                                
+                                st.success("✅ **Η αναφορά ολοκληρώθηκε!**")
+                                
+                                st.markdown("### 🏆 Ανάλυση Κόστους Καταστημάτων")
+                                total_cost = sum(location_costs.values())
+                                
+                                if total_cost > 0:
+                                    locs = LAYOUT.stores
+                                    m_cols = st.columns(len(locs))
+                                    for idx, loc in enumerate(locs):
+                                        c_val = location_costs.get(loc, 0)
+                                        p_val = (c_val / total_cost * 100)
+                                        with m_cols[idx]:
+                                            st.metric(loc, f"{c_val:,.2f}€", f"{p_val:.1f}%")
+                                    
+                                    st.markdown("<br>", unsafe_allow_html=True)
+                                    st.info(f"**💰 Ταμείο - Συνολικό Κόστος Μήνα:** {total_cost:,.2f}€")
+                                else:
+                                    st.warning("⚠️ Προσοχή! Το σύνολο είναι 0€.")
+                                
+                                filename = cost_report_filename(cost_selected_month)
+                                store_artifact('cost_file', cost_file.getvalue(), filename)
                                 
                                 st.markdown("<br>", unsafe_allow_html=True)
-                                st.info(f"**💰 Ταμείο - Συνολικό Κόστος Μήνα:** {total_cost:,.2f}€")
-                            else:
-                                st.warning("⚠️ Προσοχή! Το σύνολο είναι 0€.")
-                            
-                            filename = f"ΚΟΣΤΟΛΟΓΗΣΗ_ΚΑΤΑΣΤΗΜΑΤΑ_{month_names_display.get(cost_selected_month, 'OUTPUT').upper()}.xlsx"
-                            
-                            st.markdown("<br>", unsafe_allow_html=True)
-                            st.download_button(
-                                label="📥 Λήψη Κοστολόγησης",
-                                data=cost_file,
-                                file_name=filename,
-                                mime="application/vnd.openxmlformats-officedocument.spreadsheetml.sheet",
-                                use_container_width=True
-                            )
-                        except Exception as e:
-                            st.error(f"❌ **Σφάλμα:** {str(e)}")
-                            st.exception(e)
-            st.markdown('</div>', unsafe_allow_html=True)
+                                st.download_button(
+                                    label="📥 Λήψη Κοστολόγησης",
+                                    data=cost_file,
+                                    file_name=filename,
+                                    mime="application/vnd.openxmlformats-officedocument.spreadsheetml.sheet",
+                                    use_container_width=True,
+                                    on_click=drop_artifact, args=('cost_file',)
+                                )
+                                if generate_all_btn:
+                                    st.download_button(
+                                        label="📥 Λήψη Αρχείου Μισθοδοσίας",
+                                        data=reports['payroll_data'],
+                                        file_name=reports['payroll_filename'],
+                                        mime="application/vnd.openxmlformats-officedocument.spreadsheetml.sheet",
+                                        use_container_width=True,
+                                        on_click=drop_artifact, args=('payroll_file',)
+                                    )
+                            except Exception as e:
+                                st.error(f"❌ **Σφάλμα:** {str(e)}")
+                                st.exception(e)
+                else:
+                    cost_data, cost_filename = load_artifact('cost_file')
+                    if cost_data:
+                        st.download_button(
+                            label=f"📥 Λήψη Κοστολόγησης ({cost_filename})",
+                            data=cost_data,
+                            file_name=cost_filename,
+                            mime="application/vnd.openxmlformats-officedocument.spreadsheetml.sheet",
+                            use_container_width=True,
+                            on_click=drop_artifact, args=('cost_file',)
+                        )
+                st.markdown('</div>', unsafe_allow_html=True)
+                
+                # Drill-down from the last cost run's cube (no workbook access)
+                cost_cube = st.session_state.get('cost_cube')
+                if cost_cube and cost_cube.cells:
+                    st.markdown('<div class="step-card">', unsafe_allow_html=True)
+                    st.markdown('<div class="step-title">🔎 Ανάλυση σε Βάθος</div>', unsafe_allow_html=True)
+                    col_f1, col_f2, col_f3, col_f4 = st.columns(4)
+                    with col_f1:
+                        drill_stores = st.multiselect("Καταστήματα:", options=cost_cube.values('store'), key="drill_stores")
+                    with col_f2:
+                        drill_employees = st.multiselect("Εργαζόμενοι:", options=sorted(cost_cube.values('employee')), key="drill_employees")
+                    with col_f3:
+                        drill_rows = st.selectbox(
+                            "Ανάλυση ανά:", options=['employee', 'week', 'weekday'],
+                            format_func=lambda d: CUBE_DIMENSION_LABELS[d], key="drill_rows"
+                        )
+                    with col_f4:
+                        drill_measure = st.selectbox(
+                            "Μέγεθος:", options=list(CUBE_MEASURE_LABELS),
+                            format_func=lambda m: CUBE_MEASURE_LABELS[m], key="drill_measure"
+                        )
+                    
+                    drill_table = cost_cube.pivot(drill_rows, 'store', drill_measure, {'store': drill_stores, 'employee': drill_employees})
+                    if drill_table:
+                        row_label = CUBE_DIMENSION_LABELS[drill_rows]
+                        st.dataframe(drill_table, use_container_width=True, hide_index=True)
+                        st.bar_chart(drill_table, x=row_label, y=[k for k in drill_table[0] if k not in (row_label, 'ΣΥΝΟΛΟ')], stack=True)
+                    else:
+                        st.info("Δεν υπάρχουν δεδομένα για τα φίλτρα που επιλέχθηκαν.")
+                    st.markdown('</div>', unsafe_allow_html=True)
 
-# --- MODERN FOOTER ---
-st.markdown("""
+    # --- MODERN FOOTER ---
+    st.markdown("""
 <div class="modern-footer">
     ThikiShop Pro Analytics &copy; 2026 | Built for performance & aesthetic. 
 </div>
 """, unsafe_allow_html=True)
+
+if __name__ == "__main__":
+    render_page()
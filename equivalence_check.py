@@ -0,0 +1,421 @@
+"""
+Differential check of the payroll engines against a frozen reference app.py.
+
+Runs the reference implementation (a git revision or a file) and the current
+app.py with each candidate engine over generated week files and/or a folder of
+real anonymized ones, then diffs monthly_stats, worked days, location_costs and
+the cell values of both output workbooks.
+
+    python equivalence_check.py --weeks anonymized/ --months 10 11 12
+
+The default reference is reference/app.py, a checked-in copy of the app.py the
+engines were first checked against, so the baseline does not move with new commits.
+"""
+import argparse
+import csv
+import datetime
+import importlib.util
+import io
+import logging
+import os
+import random
+import subprocess
+import sys
+import tempfile
+import warnings
+import zipfile
+
+import openpyxl
+from openpyxl.styles import PatternFill
+from openpyxl.utils.cell import coordinate_from_string
+
+APP_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), "app.py")
+REFERENCE_PATH = os.path.join(os.path.dirname(APP_PATH), "reference", "app.py")
+
+# Candidate engines: keyword arguments for the current app.py ("combined" uses run_monthly_reports).
+# 'uploads' re-packages the same weeks for another ingestion path before running the defaults.
+CANDIDATES = {
+    'native': {'engine': 'native'},
+    'openpyxl': {'engine': 'openpyxl'},
+    'cells': {'output_mode': 'cells'},
+    'combined': {},
+    'csv': {'uploads': 'csv'},
+    'zip': {'uploads': 'zip'},
+    'multisheet': {'uploads': 'multisheet'},
+}
+
+COST_TOLERANCE = 1e-6
+
+# --- Generated Week Files ---
+GEN_MONTHS = {
+    1: 'ΙΑΝΟΥΑΡΙΟΥ', 2: 'ΦΕΒΡΟΥΑΡΙΟΥ', 3: 'ΜΑΡΤΙΟΥ', 4: 'ΑΠΡΙΛΙΟΥ', 5: 'ΜΑΪΟΥ', 6: 'ΙΟΥΝΙΟΥ',
+    7: 'ΙΟΥΛΙΟΥ', 8: 'ΑΥΓΟΥΣΤΟΥ', 9: 'ΣΕΠΤΕΜΒΡΙΟΥ', 10: 'ΟΚΤΩΒΡΙΟΥ', 11: 'ΝΟΕΜΒΡΙΟΥ', 12: 'ΔΕΚΕΜΒΡΙΟΥ'
+}
+GEN_SHORT_MONTHS = {
+    1: 'ΙΑΝ', 2: 'ΦΕΒ', 3: 'ΜΑΡ', 4: 'ΑΠΡ', 5: 'ΜΑΙ', 6: 'ΙΟΥΝ',
+    7: 'ΙΟΥΛ', 8: 'ΑΥΓ', 9: 'ΣΕΠ', 10: 'ΟΚΤ', 11: 'ΝΟΕ', 12: 'ΔΕΚ'
+}
+GEN_DAYS = ['ΔΕΥΤΕΡΑ', 'ΤΡΙΤΗ', 'ΤΕΤΑΡΤΗ', 'ΠΕΜΠΤΗ', 'ΠΑΡΑΣΚΕΥΗ', 'ΣΑΒΒΑΤΟ', 'ΚΥΡΙΑΚΗ']
+GEN_STORES = [('ΡΕΝΤΗΣ', 'FCE4D6'), ('ΑΙΓΑΛΕΩ', 'E2EFDA'), ('ΠΕΙΡΑΙΑΣ', 'DDEBF7'), ('ΠΕΡΙΣΤΕΡΙ', 'F4B084')]
+# Includes the half-time employee and every special value the parsers know about
+GEN_NAMES = ['ΗΛΙΑΣ ΚΑΨΑΛΗΣ (4ΩΡΟΣ)', 'ΕΡΓΑΖΟΜΕΝΟΣ Α (8ΩΡΟΣ)', 'ΕΡΓΑΖΟΜΕΝΟΣ Β', 'ΕΡΓΑΖΟΜΕΝΟΣ Γ',
+             'ΕΡΓΑΖΟΜΕΝΟΣ Δ', 'ΕΡΓΑΖΟΜΕΝΟΣ Ε', 'ΕΡΓΑΖΟΜΕΝΟΣ ΣΤ']
+GEN_SHIFTS = ['09:00-17:00', '10:00-18:00', '14:00-22:00', '09:00-15:00', '08:30-17:30', '12:00-21:00',
+              '07:00-19:00', 'Α', 'ΑΔΕΙΑ', 'ΑΡΓΙΑ', 'RR', 'ΡΕΠΟ', 'ΑΝΑΡΡΩΤΙΚΗ']
+GEN_DATE_STYLES = ['greek', 'slash', 'datetime']
+
+class WeekUpload(io.BytesIO):
+    """Minimal stand-in for a Streamlit UploadedFile (a BytesIO with a name and size)."""
+
+    def __init__(self, name, data):
+        super().__init__(data)
+        self.name = name
+        self.size = len(data)
+
+def generate_week(monday, seed, date_style='greek'):
+    """One (ΕΠΙΘ).xlsx week in the shop's layout with random shifts."""
+    rnd = random.Random(seed)
+    wb = openpyxl.Workbook()
+    ws = wb.active
+    ws.cell(row=1, column=1).value = 'ΟΝΟΜΑ'
+    col = 2
+    for day_idx in range(7):
+        span = 1 if day_idx == 6 else 4
+        day = monday + datetime.timedelta(days=day_idx)
+        ws.cell(row=1, column=col).value = GEN_DAYS[day_idx]
+        if date_style == 'greek':
+            ws.cell(row=2, column=col).value = f"{day.day} {GEN_MONTHS[day.month]} {day.year}"
+        elif date_style == 'slash':
+            ws.cell(row=2, column=col).value = day.strftime('%d/%m/%Y')
+        else:
+            ws.cell(row=2, column=col).value = datetime.datetime(day.year, day.month, day.day)
+        for k in range(span):
+            ws.cell(row=3, column=col + k).value = GEN_STORES[k][0] if span == 4 else 'ΚΑΤΑΣΤΗΜΑ'
+        ws.merge_cells(start_row=1, start_column=col, end_row=1, end_column=col + span - 1)
+        ws.merge_cells(start_row=2, start_column=col, end_row=2, end_column=col + span - 1)
+        col += span
+
+    for row, name in enumerate(GEN_NAMES, start=4):
+        ws.cell(row=row, column=1).value = name
+        col = 2
+        for day_idx in range(7):
+            span = 1 if day_idx == 6 else 4
+            if rnd.random() < 0.8:
+                k = rnd.randrange(span)
+                store = GEN_STORES[k] if span == 4 else rnd.choice(GEN_STORES)
+                cell = ws.cell(row=row, column=col + k)
+                cell.value = rnd.choice(GEN_SHIFTS)
+                cell.fill = PatternFill(start_color=store[1], fill_type='solid')
+            col += span
+
+    output = io.BytesIO()
+    wb.save(output)
+    sunday = monday + datetime.timedelta(days=6)
+    name = f"{monday.day}_{GEN_SHORT_MONTHS[monday.month]} - {sunday.day}_{GEN_SHORT_MONTHS[sunday.month]}(ΕΠΙΘ).xlsx"
+    return WeekUpload(name, output.getvalue())
+
+def generate_month(year, month, seed, date_style):
+    """Every week touching the month, including the cut weeks at both ends."""
+    monday = datetime.date(year, month, 1)
+    monday -= datetime.timedelta(days=monday.weekday())
+    weeks = []
+    while monday.year < year or (monday.year == year and monday.month <= month):
+        weeks.append(generate_week(monday, seed + len(weeks), date_style))
+        monday += datetime.timedelta(days=7)
+    return weeks
+
+def read_week_folder(path):
+    """Week files (xlsx/csv/tsv/zip) from a folder of real, anonymized schedules."""
+    uploads = []
+    for name in sorted(os.listdir(path)):
+        if name.lower().endswith(('.xlsx', '.csv', '.tsv', '.zip')):
+            with open(os.path.join(path, name), 'rb') as f:
+                uploads.append(WeekUpload(name, f.read()))
+    return uploads
+
+# --- Re-packaged Uploads ---
+MULTISHEET_BOOK = "ΜΗΝΑΣ(ΕΠΙΘ).xlsx"
+
+def _is_xlsx(upload):
+    return upload.name.lower().endswith('.xlsx')
+
+def _sunday_store(cell):
+    color = cell.fill.start_color.rgb if cell.fill and cell.fill.fill_type else None
+    for store, store_color in GEN_STORES:
+        if isinstance(color, str) and color.upper().endswith(store_color):
+            return store
+    return None
+
+def csv_uploads(uploads):
+    """Each xlsx week as a CSV export, the Sunday store given as a [STORE] marker.
+
+    None when a week has non-text cells (e.g. real dates), which CSV cannot carry.
+    """
+    converted = []
+    for upload in uploads:
+        if not _is_xlsx(upload):
+            converted.append(upload)
+            continue
+        ws = openpyxl.load_workbook(io.BytesIO(upload.getvalue())).active
+        sunday_col = ws.max_column if ws.max_column < 26 else 26
+        text = io.StringIO()
+        writer = csv.writer(text)
+        for row in ws.iter_rows(max_col=sunday_col):
+            values = []
+            for cell in row:
+                if cell.value is not None and not isinstance(cell.value, str):
+                    return None
+                value = cell.value or ''
+                if cell.row >= 4 and cell.column == sunday_col and value:
+                    store = _sunday_store(cell)
+                    value = f"{value} [{store}]" if store else value
+                values.append(value)
+            writer.writerow(values)
+        converted.append(WeekUpload(upload.name[:-len('.xlsx')] + '.csv', text.getvalue().encode('utf-8')))
+    return converted
+
+def zip_uploads(uploads):
+    """All weeks in one zip archive, as a month is often sent by email."""
+    output = io.BytesIO()
+    with zipfile.ZipFile(output, 'w', zipfile.ZIP_DEFLATED) as archive:
+        for upload in uploads:
+            archive.writestr(upload.name, upload.getvalue())
+    return [WeekUpload("ΜΗΝΑΣ.zip", output.getvalue())]
+
+def multisheet_uploads(app, uploads):
+    """All xlsx weeks as sheets of one workbook, each sheet titled after its week file."""
+    book = openpyxl.Workbook()
+    book.remove(book.active)
+    others = []
+    for upload in uploads:
+        if not _is_xlsx(upload):
+            others.append(upload)
+            continue
+        source = openpyxl.load_workbook(io.BytesIO(upload.getvalue())).active
+        ws = book.create_sheet(app.week_title(upload.name)[:31])
+        for row in source.iter_rows():
+            for cell in row:
+                target = ws.cell(row=cell.row, column=cell.column)
+                target.value = cell.value
+                if cell.has_style:
+                    target.fill = PatternFill(start_color=cell.fill.start_color.rgb, fill_type=cell.fill.fill_type)
+        for merged in source.merged_cells.ranges:
+            ws.merge_cells(str(merged))
+    output = io.BytesIO()
+    book.save(output)
+    return [WeekUpload(MULTISHEET_BOOK, output.getvalue())] + others
+
+def repackage_uploads(app, form, uploads):
+    """The uploads for an ingestion candidate, or None if the form does not apply."""
+    if form == 'csv':
+        return csv_uploads(uploads)
+    if form == 'zip':
+        return zip_uploads(uploads)
+    return multisheet_uploads(app, uploads)
+
+def strip_book_prefix(app, sheets):
+    """Week titles of a multi-sheet book read "<book> - <week>"; drops the book part."""
+    prefix = f"{app.week_title(MULTISHEET_BOOK)} - "
+    return {
+        title: {coordinate: value[len(prefix):] if isinstance(value, str) and value.startswith(prefix) else value
+                for coordinate, value in cells.items()}
+        for title, cells in sheets.items()
+    }
+
+# --- Loading Implementations ---
+def load_app(path, module_name):
+    """Imports an app.py as a module (the reference copy still runs its Streamlit page headless, which is ignored)."""
+    logging.disable(logging.CRITICAL)
+    warnings.filterwarnings('ignore')
+    spec = importlib.util.spec_from_file_location(module_name, path)
+    module = importlib.util.module_from_spec(spec)
+    sys.modules[module_name] = module
+    spec.loader.exec_module(module)
+    return module
+
+def load_reference(reference):
+    """The reference app.py from a file path or a git revision."""
+    if os.path.isfile(reference):
+        return load_app(reference, "reference_app")
+    source = subprocess.run(
+        ["git", "show", f"{reference}:app.py"], cwd=os.path.dirname(APP_PATH),
+        capture_output=True, check=True
+    ).stdout
+    with tempfile.NamedTemporaryFile(delete=False, suffix='.py') as tmp:
+        tmp.write(source)
+    try:
+        return load_app(tmp.name, "reference_app")
+    finally:
+        os.unlink(tmp.name)
+
+def _reset_shared_caches(module):
+    # st.cache_resource is keyed by source, so two copies of app.py would share parsed weeks
+    if hasattr(module, 'week_parse_cache'):
+        module.week_parse_cache.clear()
+
+# --- Running & Diffing ---
+def run_reference(app, uploads, month):
+    """Reference results: the three entry points called as the UI calls them."""
+    _reset_shared_caches(app)
+    payroll_file, _, monthly_stats = app.process_payroll(uploads, month)
+    work_days = app.get_monthly_work_days(uploads, month)
+    employee_costs = test_costs(work_days)
+    cost_file, location_costs = app.process_cost_analysis(uploads, employee_costs, month)[:2]
+    return {
+        'monthly_stats': monthly_stats, 'work_days': work_days, 'location_costs': location_costs,
+        'payroll_file': payroll_file, 'cost_file': cost_file, 'employee_costs': employee_costs,
+    }
+
+def run_candidate(app, candidate, uploads, month, employee_costs):
+    """Candidate results for one engine of the current app.py; None if it does not apply to the uploads."""
+    _reset_shared_caches(app)
+    if candidate == 'combined':
+        reports = app.run_monthly_reports(uploads, month, employee_costs)
+        return {key: reports[key] for key in ('monthly_stats', 'work_days', 'location_costs', 'payroll_file', 'cost_file')}
+    kwargs = dict(CANDIDATES[candidate])
+    form = kwargs.pop('uploads', None)
+    if form:
+        uploads = repackage_uploads(app, form, uploads)
+        if uploads is None:
+            return None
+    payroll_file, _, monthly_stats = app.process_payroll(uploads, month, **kwargs)
+    read_kwargs = {'engine': kwargs['engine']} if 'engine' in kwargs else {}
+    work_days = app.get_monthly_work_days(uploads, month, **read_kwargs)
+    cost_file, location_costs = app.process_cost_analysis(uploads, employee_costs, month, **read_kwargs)[:2]
+    return {
+        'monthly_stats': monthly_stats, 'work_days': work_days, 'location_costs': location_costs,
+        'payroll_file': payroll_file, 'cost_file': cost_file, 'book_prefix': form == 'multisheet',
+    }
+
+def test_costs(work_days):
+    """Deterministic daily costs, derived from monthly costs the way the cost tab does."""
+    costs = {}
+    for idx, (name, days) in enumerate(sorted(work_days.items())):
+        if days > 0:
+            costs[name] = (900.0 + 37.5 * idx) / days
+    return costs
+
+def workbook_values(file_obj):
+    """{sheet: {coordinate: value}} with empty strings treated as empty cells."""
+    wb = openpyxl.load_workbook(io.BytesIO(file_obj.getvalue()))
+    values = {}
+    for ws in wb.worksheets:
+        sheet = {}
+        for row in ws.iter_rows():
+            for cell in row:
+                if cell.value is not None and cell.value != "":
+                    sheet[cell.coordinate] = cell.value
+        values[ws.title] = sheet
+    return values
+
+def sheet_blocks(cells):
+    """{"<block> +<row offset>:<column>": value} of a sheet's {coordinate: value}.
+
+    A block is a run of non-empty rows (one week, a summary table), named after its
+    first cell, so the same weeks written in another order still line up.
+    """
+    rows = {}
+    for coordinate, value in cells.items():
+        column, row = coordinate_from_string(coordinate)
+        rows.setdefault(row, {})[column] = value
+    blocks = {}
+    names = set()
+    start = previous = None
+    for row in sorted(rows):
+        if previous is None or row != previous + 1:
+            start = row
+            first = rows[row].get('A', rows[row][min(rows[row], key=lambda c: (len(c), c))])
+            name = str(first)
+            while name in names:
+                name += "'"
+            names.add(name)
+        previous = row
+        for column, value in rows[row].items():
+            blocks[f"{name} +{row - start}:{column}"] = value
+    return blocks
+
+def _close(a, b):
+    if isinstance(a, (int, float)) and isinstance(b, (int, float)):
+        return abs(a - b) <= COST_TOLERANCE
+    return a == b
+
+def diff_mapping(label, expected, actual, limit=10):
+    """Differences between two flat or one-level nested dicts, as readable lines."""
+    lines = []
+    for key in sorted(set(expected) | set(actual), key=str):
+        a, b = expected.get(key), actual.get(key)
+        if isinstance(a, dict) and isinstance(b, dict):
+            lines.extend(diff_mapping(f"{label}[{key}]", a, b, limit))
+        elif not _close(a, b):
+            lines.append(f"{label}[{key}]: reference={a!r} candidate={b!r}")
+    return lines[:limit]
+
+def diff_results(app, expected, actual):
+    lines = []
+    for key in ('monthly_stats', 'work_days', 'location_costs'):
+        lines.extend(diff_mapping(key, expected[key], actual[key]))
+    for key in ('payroll_file', 'cost_file'):
+        expected_sheets = workbook_values(expected[key])
+        # Sheets the reference does not write (e.g. ΚΑΛΥΨΗ) are additions, not differences
+        actual_sheets = {title: cells for title, cells in workbook_values(actual[key]).items() if title in expected_sheets}
+        if actual.get('book_prefix'):
+            actual_sheets = strip_book_prefix(app, actual_sheets)
+        # Compared block by block: weeks are ordered by their dates, the reference by file name
+        lines.extend(diff_mapping(key, {title: sheet_blocks(cells) for title, cells in expected_sheets.items()},
+                                  {title: sheet_blocks(cells) for title, cells in actual_sheets.items()}))
+    return lines
+
+def build_cases(args):
+    """(label, uploads, month) for every generated and real batch."""
+    cases = []
+    for month in args.months:
+        for style_idx, style in enumerate(GEN_DATE_STYLES):
+            for seed in range(args.seeds):
+                uploads = generate_month(args.year, month, seed * 100 + style_idx * 10 + month, style)
+                cases.append((f"generated {args.year}-{month:02d} {style} seed={seed}", uploads, month))
+    # January of the next year starts with a week of late December: date order and file-name order differ
+    cases.append((f"generated {args.year + 1}-01 greek year boundary", generate_month(args.year + 1, 1, 1, 'greek'), 1))
+    if args.weeks:
+        uploads = read_week_folder(args.weeks)
+        for month in args.months:
+            cases.append((f"{args.weeks} month={month}", uploads, month))
+    return cases
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Diff the payroll engines against a frozen reference app.py.")
+    parser.add_argument("--reference", default=REFERENCE_PATH, help="git revision or path of the reference app.py")
+    parser.add_argument("--weeks", help="folder with real, anonymized week files")
+    parser.add_argument("--months", type=int, nargs="+", default=[10, 11, 12])
+    parser.add_argument("--year", type=int, default=2025)
+    parser.add_argument("--seeds", type=int, default=2, help="generated batches per month and date style")
+    parser.add_argument("--candidates", nargs="+", default=list(CANDIDATES), choices=list(CANDIDATES))
+    args = parser.parse_args(argv)
+
+    reference = load_reference(args.reference)
+    current = load_app(APP_PATH, "candidate_app")
+
+    failures = skipped = 0
+    cases = build_cases(args)
+    for label, uploads, month in cases:
+        expected = run_reference(reference, uploads, month)
+        for candidate in args.candidates:
+            try:
+                actual = run_candidate(current, candidate, uploads, month, expected['employee_costs'])
+                if actual is None:
+                    skipped += 1
+                    continue
+                lines = diff_results(current, expected, actual)
+            except Exception as e:
+                lines = [f"error: {e!r}"]
+            if lines:
+                failures += 1
+                print(f"DIFF {candidate} | {label}")
+                for line in lines:
+                    print(f"    {line}")
+
+    runs = len(cases) * len(args.candidates) - skipped
+    print(f"{runs - failures}/{runs} runs match the reference ({args.reference}), {skipped} not applicable.")
+    return 1 if failures else 0
+
+if __name__ == "__main__":
+    sys.exit(main())
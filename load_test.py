@@ -0,0 +1,183 @@
+"""
+Concurrent-user load test for the Streamlit app, driven headlessly with AppTest.
+
+Every simulated user runs the month-end flow in its own session: upload a month
+of synthetic week files, generate the payroll, type a monthly cost for every
+employee in the costing tab and generate the store costing. Sessions run in
+threads of one process, like sessions of one Streamlit server, so the shared
+parse and report caches behave as they do in production.
+
+    python load_test.py --sessions 1 2 4 8 --rounds 2
+
+For each session count it prints latency percentiles per step and for the whole
+flow, throughput (flows per second) and resident memory per session. Run
+checkpoints, cost tables and the overtime ledger go to a temporary data folder
+(THIKISHOP_DATA_DIR), never to the app's own files.
+"""
+import argparse
+import ast
+import contextlib
+import os
+import resource
+import statistics
+import sys
+import tempfile
+import threading
+import time
+
+from streamlit.testing.v1 import AppTest
+
+from equivalence_check import generate_month
+
+APP_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), "app.py")
+XLSX_MIME = "application/vnd.openxmlformats-officedocument.spreadsheetml.sheet"
+STEPS = ['open', 'upload', 'payroll', 'costs', 'costing', 'flow']
+
+@contextlib.contextmanager
+def serialized_ast_parse():
+    """Serializes ast.parse while the test runs.
+
+    Python 3.11 can fail with "AST constructor recursion depth mismatch" when threads
+    parse at the same time, and every page run parses app.py.
+    """
+    original = ast.parse
+    lock = threading.Lock()
+
+    def parse(*args, **kwargs):
+        with lock:
+            return original(*args, **kwargs)
+
+    ast.parse = parse
+    try:
+        yield
+    finally:
+        ast.parse = original
+
+@contextlib.contextmanager
+def temporary_data_dir():
+    """Points the app's persistent files (THIKISHOP_DATA_DIR) at a folder removed afterwards."""
+    previous = os.environ.get('THIKISHOP_DATA_DIR')
+    with tempfile.TemporaryDirectory(prefix='payroll_load_test_') as data_dir:
+        os.environ['THIKISHOP_DATA_DIR'] = data_dir
+        try:
+            yield data_dir
+        finally:
+            if previous is None:
+                os.environ.pop('THIKISHOP_DATA_DIR', None)
+            else:
+                os.environ['THIKISHOP_DATA_DIR'] = previous
+
+def rss_bytes():
+    """Current resident memory of this process (peak on platforms without /proc)."""
+    try:
+        with open('/proc/self/statm') as f:
+            return int(f.read().split()[1]) * os.sysconf('SC_PAGE_SIZE')
+    except OSError:
+        peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+        return peak if sys.platform == 'darwin' else peak * 1024
+
+def run_session(uploads, month, monthly_cost, timeout):
+    """One user's month-end flow. Returns {step: seconds}; raises if the page shows an exception."""
+    timings = {}
+    started = time.perf_counter()
+
+    def step(name, action):
+        t = time.perf_counter()
+        at = action()
+        timings[name] = time.perf_counter() - t
+        if at.exception:
+            raise RuntimeError(f"{name}: {at.exception[0].value}")
+        return at
+
+    at = step('open', lambda: AppTest.from_file(APP_PATH, default_timeout=timeout).run())
+    files = [(f.name, f.getvalue(), XLSX_MIME) for f in uploads]
+    step('upload', lambda: at.file_uploader(key='payroll_upload').set_value(files).run())
+
+    def generate_payroll():
+        at.selectbox(key='payroll_month').set_value(month)
+        return at.button(key='gen_payroll').click().run()
+    step('payroll', generate_payroll)
+
+    def type_costs():
+        for number_input in at.number_input:
+            number_input.set_value(monthly_cost)
+        return at.run()
+    step('costs', type_costs)
+    step('costing', lambda: at.button(key='gen_cost').click().run())
+    timings['flow'] = time.perf_counter() - started
+    return timings
+
+def percentile(values, pct):
+    if not values:
+        return 0.0
+    ordered = sorted(values)
+    index = min(len(ordered) - 1, max(0, round(pct / 100 * len(ordered) + 0.5) - 1))
+    return ordered[index]
+
+def run_level(sessions, rounds, args, seed_base):
+    """Runs `sessions` concurrent users `rounds` times; returns (timings, errors, seconds, rss delta)."""
+    timings = []
+    errors = []
+    lock = threading.Lock()
+    rss_before = rss_bytes()
+
+    def user(user_idx):
+        for round_idx in range(rounds):
+            seed = seed_base + user_idx * 1000 + round_idx if not args.same_files else 0
+            uploads = generate_month(args.year, args.month, seed, 'greek')
+            try:
+                result = run_session(uploads, args.month, args.cost, args.timeout)
+            except Exception as e:
+                with lock:
+                    errors.append(f"{type(e).__name__}: {e}")
+                continue
+            with lock:
+                timings.append(result)
+
+    started = time.perf_counter()
+    threads = [threading.Thread(target=user, args=(i,)) for i in range(sessions)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    elapsed = time.perf_counter() - started
+    return timings, errors, elapsed, rss_bytes() - rss_before
+
+def report_level(sessions, timings, errors, elapsed, rss_delta):
+    flows = len(timings)
+    print(f"\n== {sessions} concurrent session(s): {flows} flows in {elapsed:.1f}s "
+          f"({flows / elapsed if elapsed else 0:.2f} flows/s), {len(errors)} errors")
+    print(f"   {'step':<9}{'p50':>9}{'p90':>9}{'p99':>9}{'max':>9}{'mean':>9}")
+    for name in STEPS:
+        values = [t[name] for t in timings]
+        if values:
+            print(f"   {name:<9}" + "".join(f"{v:>8.2f}s" for v in (
+                percentile(values, 50), percentile(values, 90), percentile(values, 99),
+                max(values), statistics.mean(values))))
+    print(f"   memory: rss {rss_bytes() / 2**20:.0f} MiB, "
+          f"+{rss_delta / 2**20:.1f} MiB this level (~{rss_delta / 2**20 / max(sessions, 1):.1f} MiB/session)")
+    for error in errors[:5]:
+        print(f"   error: {error}")
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Concurrent-user load test for the payroll app.")
+    parser.add_argument("--sessions", type=int, nargs="+", default=[1, 2, 4, 8], help="concurrent session counts to try")
+    parser.add_argument("--rounds", type=int, default=1, help="flows per session at each level")
+    parser.add_argument("--year", type=int, default=2025)
+    parser.add_argument("--month", type=int, default=11)
+    parser.add_argument("--cost", type=float, default=1000.0, help="monthly cost typed for every employee")
+    parser.add_argument("--same-files", action="store_true", help="every user uploads the same files (cache hits)")
+    parser.add_argument("--timeout", type=float, default=300, help="seconds allowed per page run")
+    args = parser.parse_args(argv)
+
+    print(f"Load test of {APP_PATH}, month {args.month}/{args.year}, rss at start {rss_bytes() / 2**20:.0f} MiB")
+    failed = False
+    with temporary_data_dir(), serialized_ast_parse():
+        for level_idx, sessions in enumerate(args.sessions):
+            timings, errors, elapsed, rss_delta = run_level(sessions, args.rounds, args, seed_base=level_idx * 100000)
+            report_level(sessions, timings, errors, elapsed, rss_delta)
+            failed = failed or bool(errors)
+    return 1 if failed else 0
+
+if __name__ == "__main__":
+    sys.exit(main())
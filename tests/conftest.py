@@ -0,0 +1,112 @@
+"""Fixtures shared by the tests: an isolated data folder and generated week schedules."""
+import datetime
+import io
+import os
+import random
+import shutil
+import sys
+import tempfile
+
+import openpyxl
+from openpyxl.styles import Alignment, Font, PatternFill
+import pytest
+
+# app.py reads THIKISHOP_DATA_DIR on import: keep runs, ledgers and cost tables out of the repo
+DATA_DIR = tempfile.mkdtemp(prefix='thikishop_tests_')
+os.environ['THIKISHOP_DATA_DIR'] = DATA_DIR
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import app  # noqa: E402
+
+MONTH_GENITIVE = {month: name for name, month in app.GREEK_MONTHS.items() if name != 'ΜΑΪΟΥ'}
+SHORT_MONTHS = {1: 'ΙΑΝ', 2: 'ΦΕΒ', 3: 'ΜΑΡ', 4: 'ΑΠΡ', 5: 'ΜΑΙ', 6: 'ΙΟΥΝ',
+                7: 'ΙΟΥΛ', 8: 'ΑΥΓ', 9: 'ΣΕΠ', 10: 'ΟΚΤ', 11: 'ΝΟΕ', 12: 'ΔΕΚ'}
+DAY_NAMES = ['ΔΕΥΤΕΡΑ', 'ΤΡΙΤΗ', 'ΤΕΤΑΡΤΗ', 'ΠΕΜΠΤΗ', 'ΠΑΡΑΣΚΕΥΗ', 'ΣΑΒΒΑΤΟ', 'ΚΥΡΙΑΚΗ']
+EMPLOYEES = ['ΗΛΙΑΣ ΚΑΨΑΛΗΣ (4ΩΡΟΣ)', 'ΜΑΡΙΑ ΠΑΠΑ (8ΩΡΟΣ)', 'ΓΙΩΡΓΟΣ ΝΙΚΟΥ', 'ΕΛΕΝΗ ΔΗΜΟΥ',
+             'ΚΩΣΤΑΣ ΛΑΜΠΡΟΥ', 'ΑΝΝΑ ΣΤΕΡΓΙΟΥ']
+SHIFTS = ['09:00-17:00', '10:00-18:00', '14:00-22:00', '09:00-15:00', '08:30-17:30',
+          'Α', 'ΑΔΕΙΑ', 'ΑΡΓΙΑ', 'RR', 'ΡΕΠΟ', 'ΑΝΑΡΡΩΤΙΚΗ']
+
+class WeekUpload(io.BytesIO):
+    """An uploaded file as Streamlit hands it over: bytes with a name."""
+
+    def __init__(self, name, data):
+        super().__init__(data)
+        self.name = name
+
+def week_file_name(monday, ext='.xlsx'):
+    sunday = monday + datetime.timedelta(days=6)
+    return f"{monday.day}_{SHORT_MONTHS[monday.month]} - {sunday.day}_{SHORT_MONTHS[sunday.month]}(ΕΠΙΘ){ext}"
+
+def random_rows(seed, employees=EMPLOYEES):
+    """[(employee, {(day, store index): value})] with about three shifts in four days."""
+    rnd = random.Random(seed)
+    rows = []
+    for name in employees:
+        cells = {}
+        for day in range(7):
+            if rnd.random() < 0.75:
+                store = rnd.randrange(len(app.LAYOUT.stores))
+                cells[(day, store)] = rnd.choice(SHIFTS)
+        rows.append((name, cells))
+    return rows
+
+def fill_week_sheet(ws, monday, rows):
+    """Writes one week in the schedule layout. A Sunday cell's store is its fill colour."""
+    ws.cell(row=1, column=1).value = 'ΟΝΟΜΑ'
+    ws.cell(row=1, column=1).font = Font(name='Calibri', size=11, bold=True)
+    for day, day_cols in enumerate(app.LAYOUT.day_columns):
+        first, last = day_cols[0].col, day_cols[-1].col
+        date = monday + datetime.timedelta(days=day)
+        title = ws.cell(row=1, column=first)
+        title.value = DAY_NAMES[day]
+        title.font = Font(name='Arial', size=10)
+        title.alignment = Alignment(horizontal='center', vertical='center', wrap_text=True)
+        title.fill = PatternFill(start_color='D9D9D9', fill_type='solid')
+        ws.cell(row=2, column=first).value = f"{date.day} {MONTH_GENITIVE[date.month]} {date.year}"
+        for layout_col in day_cols:
+            ws.cell(row=3, column=layout_col.col).value = layout_col.store or 'ΚΑΤΑΣΤΗΜΑ'
+        ws.merge_cells(start_row=1, start_column=first, end_row=1, end_column=last)
+        ws.merge_cells(start_row=2, start_column=first, end_row=2, end_column=last)
+    for r, (name, cells) in enumerate(rows, start=app.LAYOUT.first_data_row):
+        ws.cell(row=r, column=1).value = name
+        for (day, store), value in cells.items():
+            day_cols = app.LAYOUT.day_columns[day]
+            layout_col = day_cols[store] if len(day_cols) > 1 else day_cols[0]
+            cell = ws.cell(row=r, column=layout_col.col)
+            cell.value = value
+            cell.fill = PatternFill(start_color=app.STORE_COLORS[app.LAYOUT.stores[store]], fill_type='solid')
+
+def workbook_bytes(wb):
+    buffer = io.BytesIO()
+    wb.save(buffer)
+    return buffer.getvalue()
+
+@pytest.fixture
+def make_week():
+    """make_week(monday, rows=None, seed=0, name=None): a week .xlsx upload (random rows by default)."""
+    def make(monday, rows=None, seed=0, name=None):
+        wb = openpyxl.Workbook()
+        wb.active.title = 'ΠΡΟΓΡΑΜΜΑ'
+        fill_week_sheet(wb.active, monday, random_rows(seed) if rows is None else rows)
+        return WeekUpload(name or week_file_name(monday), workbook_bytes(wb))
+    return make
+
+@pytest.fixture
+def november_uploads(make_week):
+    """The five week files of November 2025 (27/10 to 30/11)."""
+    first_monday = datetime.date(2025, 10, 27)
+    return [make_week(first_monday + datetime.timedelta(weeks=i), seed=i) for i in range(5)]
+
+@pytest.fixture(autouse=True)
+def empty_data_dir():
+    yield
+    for entry in os.listdir(DATA_DIR):
+        path = os.path.join(DATA_DIR, entry)
+        if os.path.isdir(path):
+            shutil.rmtree(path, ignore_errors=True)
+        else:
+            os.unlink(path)
+
+def pytest_sessionfinish(session, exitstatus):
+    shutil.rmtree(DATA_DIR, ignore_errors=True)
@@ -0,0 +1,44 @@
+import app
+
+FIELDS = {'hours': 'd', 'days': 'q'}
+
+def test_keys_get_ids_in_first_seen_order():
+    agg = app.Aggregates(FIELDS, keys=['Β', 'Α'])
+    assert [agg.key_id(key) for key in ('Α', 'Γ', 'Β', 'Γ')] == [1, 2, 0, 2]
+    assert agg.keys == ['Β', 'Α', 'Γ'] and len(agg) == 3
+    assert agg.records() == {key: {'hours': 0.0, 'days': 0} for key in ('Β', 'Α', 'Γ')}
+
+def test_merge_and_records_add_by_key():
+    first = app.Aggregates(FIELDS)
+    first.columns['hours'][first.key_id('Α')] += 8.5
+    first.columns['days'][first.key_id('Α')] += 1
+    second = app.Aggregates(FIELDS, keys=['Β', 'Α'])
+    second.columns['hours'][second.key_id('Α')] += 1.5
+    second.columns['days'][second.key_id('Β')] += 2
+    assert first.merge(second) is first
+    assert first.records() == {'Α': {'hours': 10.0, 'days': 1}, 'Β': {'hours': 0.0, 'days': 2}}
+    assert first.add_records(second.records()).records() == {'Α': {'hours': 11.5, 'days': 1},
+                                                             'Β': {'hours': 0.0, 'days': 4}}
+
+def test_totals_and_columns_keep_their_types():
+    agg = app.Aggregates(FIELDS).add_records({'Α': {'hours': 4.25, 'days': 1}, 'Β': {'hours': 2.0, 'days': 3}})
+    assert agg.totals() == {'hours': 6.25, 'days': 4}
+    assert type(agg.totals()['days']) is int and type(agg.totals()['hours']) is float
+    assert agg.column('days') == {'Α': 1, 'Β': 3}
+
+def test_weeks_merge_into_the_payroll_month(november_uploads):
+    week_list = app.load_weeks(november_uploads)
+    weeks = []
+    monthly = app.Aggregates(app.EMPLOYEE_STATS_FIELDS)
+    stats = app.process_payroll(None, 11, week_list=week_list, aggregates=monthly,
+                                week_done=lambda week_idx, week_stats: weeks.append(week_stats))[2]
+    assert len(weeks) == len(week_list)
+    merged = app.Aggregates(app.EMPLOYEE_STATS_FIELDS)
+    for week_stats in weeks:
+        merged.merge(week_stats)
+    assert merged.records() == monthly.records() == stats
+    # Checkpointed weeks come back as records()
+    resumed = app.Aggregates(app.EMPLOYEE_STATS_FIELDS)
+    for week_stats in weeks:
+        resumed.add_records(week_stats.records())
+    assert resumed.records() == stats
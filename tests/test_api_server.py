@@ -0,0 +1,88 @@
+import http.client
+import io
+import json
+import threading
+import uuid
+
+import openpyxl
+import pytest
+
+import api_server
+import app
+
+@pytest.fixture(scope='module')
+def api():
+    server = api_server.PayrollAPIServer(('127.0.0.1', 0), workers=1, quiet=True)
+    thread = threading.Thread(target=server.serve_forever, daemon=True)
+    thread.start()
+    yield server.server_address[1]
+    server.shutdown()
+    server.server_close()
+
+def post(port, path, files, fields=None):
+    """POSTs week files (and text fields) as multipart/form-data; returns (status, JSON body)."""
+    boundary = uuid.uuid4().hex
+    parts = [f'--{boundary}\r\nContent-Disposition: form-data; name="weeks"; filename="{f.name}"\r\n\r\n'.encode('utf-8')
+             + f.getvalue() + b'\r\n' for f in files]
+    parts += [f'--{boundary}\r\nContent-Disposition: form-data; name="{name}"\r\n\r\n{value}\r\n'.encode('utf-8')
+              for name, value in (fields or {}).items()]
+    body = b''.join(parts) + f'--{boundary}--\r\n'.encode('utf-8')
+    connection = http.client.HTTPConnection('127.0.0.1', port, timeout=120)
+    try:
+        connection.request('POST', path, body=body, headers={'Content-Type': f'multipart/form-data; boundary={boundary}'})
+        response = connection.getresponse()
+        return response.status, json.loads(response.read())
+    finally:
+        connection.close()
+
+def named(name, data):
+    upload = io.BytesIO(data)
+    upload.name = name
+    return upload
+
+def test_payroll_matches_the_app(api, november_uploads):
+    status, payload = post(api, '/payroll?month=11', november_uploads)
+    assert status == 200
+    expected = app.process_payroll(None, 11, week_list=app.load_weeks(november_uploads))[2]
+    assert payload['monthly_stats'] == json.loads(json.dumps(expected, ensure_ascii=False))
+
+@pytest.mark.parametrize('upload, message', [
+    (named('a.pdf', b'%PDF-1.4'), 'δεν είναι αρχείο xlsx/csv/tsv/zip'),
+    (named('broken.xlsx', b'garbage'), 'δεν διαβάστηκε'),
+    (named('empty.zip', b'PK\x05\x06' + b'\x00' * 18), 'δεν περιέχει αρχεία εβδομάδων'),
+])
+def test_unreadable_files_are_client_errors(api, november_uploads, upload, message):
+    status, payload = post(api, '/payroll?month=11', [upload] + november_uploads)
+    assert status == 400
+    assert message in payload['error']
+
+def test_workbook_without_dates_is_a_client_error(api, november_uploads):
+    wb = openpyxl.Workbook()
+    wb.active['A1'] = 'τιμολόγιο'
+    buffer = io.BytesIO()
+    wb.save(buffer)
+    status, payload = post(api, '/payroll?month=11', [named('invoice.xlsx', buffer.getvalue())] + november_uploads)
+    assert status == 400
+    assert 'δεν είναι πρόγραμμα εβδομάδας' in payload['error']
+
+def test_costs_are_matched_like_the_costing_tab(api, november_uploads):
+    names = list(app.process_payroll(None, 11, week_list=app.load_weeks(november_uploads))[2])
+    # Case, accents and trailing spaces do not matter; unknown names are reported
+    costs = {names[0].lower().replace('α', 'ά') + '  ': 1000.0, 'ΚΑΠΟΙΟΣ ΑΛΛΟΣ': 500.0}
+    status, payload = post(api, '/costs?month=11', november_uploads, {'costs': json.dumps(costs, ensure_ascii=False)})
+    assert status == 200
+    assert payload['unknown_employees'] == ['ΚΑΠΟΙΟΣ ΑΛΛΟΣ']
+    week_list = app.load_weeks(november_uploads, data_only=True)
+    days = app.scan_cost_inputs(None, 11, week_list=week_list)[0][names[0]]
+    expected = app.process_cost_analysis(None, {names[0]: 1000.0 / days}, 11, week_list=app.load_weeks(november_uploads))[1]
+    assert payload['total'] == pytest.approx(sum(expected.values()))
+
+@pytest.mark.parametrize('path, costs', [
+    ('/costs?month=11', {'ΓΙΩΡΓΟΣ ΝΙΚΟΥ': -5}),
+    ('/costs?month=11', {}),
+    ('/costs?month=13', {'ΓΙΩΡΓΟΣ ΝΙΚΟΥ': 100}),
+])
+def test_bad_costs_or_month_are_client_errors(api, november_uploads, path, costs):
+    status, payload = post(api, path, november_uploads, {'costs': json.dumps(costs, ensure_ascii=False)})
+    assert status == 400
+    assert payload['error']
@@ -0,0 +1,86 @@
+import os
+import tempfile
+
+import pytest
+
+import app
+
+@pytest.fixture(autouse=True)
+def session(monkeypatch, tmp_path):
+    """A fresh session_state, with spilled files in a private temp folder."""
+    state = {}
+    monkeypatch.setattr(app.st, 'session_state', state)
+    monkeypatch.setattr(tempfile, 'tempdir', str(tmp_path))
+    return state
+
+def spilled_files(tmp_path):
+    return sorted(name for name in os.listdir(tmp_path) if name.startswith(app.ARTIFACT_SPILL_PREFIX))
+
+def test_small_artifacts_stay_in_memory_and_large_ones_spill(monkeypatch, tmp_path):
+    monkeypatch.setattr(app, 'ARTIFACT_SPILL_BYTES', 100)
+    app.store_artifact('payroll_file', b'p' * 50, 'ΜΙΣΘΟΔΟΣΙΑ.xlsx')
+    app.store_artifact('cost_file', b'c' * 500, 'ΚΟΣΤΟΛΟΓΗΣΗ.xlsx')
+    assert app.load_artifact('payroll_file') == (b'p' * 50, 'ΜΙΣΘΟΔΟΣΙΑ.xlsx')
+    assert app.load_artifact('cost_file') == (b'c' * 500, 'ΚΟΣΤΟΛΟΓΗΣΗ.xlsx')
+    assert len(spilled_files(tmp_path)) == 1
+    usage = app.session_memory_usage()
+    assert (usage['artifacts_memory'], usage['artifacts_disk']) == (50, 500)
+
+def test_download_drops_the_artifact_and_its_file(monkeypatch, tmp_path):
+    monkeypatch.setattr(app, 'ARTIFACT_SPILL_BYTES', 100)
+    app.store_artifact('cost_file', b'c' * 500, 'ΚΟΣΤΟΛΟΓΗΣΗ.xlsx')
+    app.drop_artifact('cost_file')
+    assert app.load_artifact('cost_file') == (None, None)
+    assert spilled_files(tmp_path) == []
+    # Storing again under the same key replaces the old file
+    app.store_artifact('cost_file', b'c' * 500, 'ΚΟΣΤΟΛΟΓΗΣΗ.xlsx')
+    app.store_artifact('cost_file', b'd' * 500, 'ΚΟΣΤΟΛΟΓΗΣΗ.xlsx')
+    assert len(spilled_files(tmp_path)) == 1
+
+def test_spilled_file_that_is_gone_reads_as_missing(monkeypatch, tmp_path):
+    monkeypatch.setattr(app, 'ARTIFACT_SPILL_BYTES', 100)
+    app.store_artifact('cost_file', b'c' * 500, 'ΚΟΣΤΟΛΟΓΗΣΗ.xlsx')
+    os.unlink(os.path.join(tmp_path, spilled_files(tmp_path)[0]))
+    assert app.load_artifact('cost_file') == (None, None)
+    assert 'cost_file' not in app._artifacts()
+
+def test_oldest_artifacts_spill_when_the_session_is_over_budget(monkeypatch, tmp_path):
+    monkeypatch.setattr(app, 'SESSION_MEMORY_LIMIT_BYTES', 2500)
+    for i, key in enumerate(['a', 'b', 'c']):
+        app.store_artifact(key, bytes([i]) * 1000, f'{key}.xlsx')
+        app._artifacts()[key]['created'] -= 10 - i
+    assert [key for key, r in app._artifacts().items() if r['path']] == ['a']
+    assert app.session_memory_usage()['artifacts_memory'] == 2000
+    assert [app.load_artifact(key)[0][0] for key in 'abc'] == [0, 1, 2]
+
+def test_report_data_counts_towards_the_budget(session, monkeypatch):
+    session['monthly_stats'] = {f'ΕΡΓΑΖΟΜΕΝΟΣ {i}': {'overwork': 1.5, 'overtime': 2.5, 'sundays': 1, 'days_worked': 20}
+                                for i in range(200)}
+    stats = app.session_memory_usage()['stats']
+    # Nested dicts are counted, not only the top-level entries
+    assert stats > 200 * 4 * 8
+    monkeypatch.setattr(app, 'SESSION_MEMORY_LIMIT_BYTES', stats + 1500)
+    app.store_artifact('a', b'a' * 1000, 'a.xlsx')
+    app.store_artifact('b', b'b' * 1000, 'b.xlsx')
+    assert [key for key, r in app._artifacts().items() if r['path']] == ['a']
+
+def test_stale_artifacts_are_evicted(monkeypatch, tmp_path):
+    monkeypatch.setattr(app, 'ARTIFACT_SPILL_BYTES', 100)
+    app.store_artifact('payroll_file', b'p' * 50, 'ΜΙΣΘΟΔΟΣΙΑ.xlsx')
+    app.store_artifact('cost_file', b'c' * 500, 'ΚΟΣΤΟΛΟΓΗΣΗ.xlsx')
+    app._artifacts()['cost_file']['created'] -= app.ARTIFACT_TTL_SECONDS + 1
+    app.evict_stale_artifacts()
+    assert list(app._artifacts()) == ['payroll_file']
+    assert spilled_files(tmp_path) == []
+
+def test_orphaned_spill_files_are_swept(tmp_path):
+    old = tmp_path / f'{app.ARTIFACT_SPILL_PREFIX}old.xlsx'
+    new = tmp_path / f'{app.ARTIFACT_SPILL_PREFIX}new.xlsx'
+    other = tmp_path / 'other.xlsx'
+    for path in (old, new, other):
+        path.write_bytes(b'x')
+    stale = os.path.getmtime(new) - app.ARTIFACT_TTL_SECONDS - 1
+    os.utime(old, (stale, stale))
+    os.utime(other, (stale, stale))
+    app.sweep_orphaned_artifacts()
+    assert sorted(os.listdir(tmp_path)) == sorted([new.name, other.name])
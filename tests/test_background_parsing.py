@@ -0,0 +1,59 @@
+import datetime
+
+import app
+
+MONDAY = datetime.date(2025, 11, 3)
+
+def settled(cache):
+    """Waits for every queued parse, including the callbacks that size the entries."""
+    cache.executor.shutdown(wait=True)
+    return cache
+
+def test_file_without_formulas_is_parsed_once(make_week):
+    cache = app.WeekParseCache()
+    upload = make_week(MONDAY)
+    assert cache.get(upload, data_only=True) is cache.get(upload, data_only=False)
+    assert len(cache.entries) == 1
+
+def test_cached_values_are_read_only_for_formulas(make_week):
+    cache = app.WeekParseCache()
+    upload = make_week(MONDAY, rows=[('ΓΙΩΡΓΟΣ ΝΙΚΟΥ', {(0, 0): '=B3', (1, 0): '09:00-17:00'})])
+    written, values = cache.get(upload, data_only=False), cache.get(upload, data_only=True)
+    assert written is not values
+    assert written[0][1].has_formulas and not values[0][1].has_formulas
+    assert written[0][1].cell(row=app.LAYOUT.first_data_row, column=2).value == '=B3'
+    assert values[0][1].cell(row=app.LAYOUT.first_data_row, column=2).value is None
+
+def test_same_content_shares_one_entry(make_week):
+    cache = app.WeekParseCache()
+    upload = make_week(MONDAY)
+    renamed = make_week(MONDAY, name='renamed.xlsx')
+    assert cache.submit(upload) is cache.submit(renamed)
+
+def test_entries_are_bounded_by_packed_bytes(november_uploads):
+    cache = app.WeekParseCache(max_bytes=1)
+    for upload in november_uploads:
+        cache.submit(upload)
+    settled(cache)
+    # The newest entry stays even over the bound
+    assert len(cache.entries) == 1
+    future, size, _ = next(iter(cache.entries.values()))
+    assert size == sum(ws.nbytes for _, ws, _ in future.result()[False])
+
+def test_unused_entries_expire(november_uploads):
+    cache = app.WeekParseCache(ttl=60)
+    first, second = november_uploads[:2]
+    cache.get(first)
+    for entry in cache.entries.values():
+        entry[2] -= 120
+    cache.submit(second)
+    assert [key[0] for key in cache.entries] == [app.content_digest(second.getvalue())]
+
+def test_failed_parse_is_reported_and_sized_zero():
+    cache = app.WeekParseCache()
+    upload = app.io.BytesIO(b'not a workbook')
+    upload.name = 'broken.xlsx'
+    future = cache.submit(upload)
+    settled(cache)
+    assert future.exception() is not None
+    assert next(iter(cache.entries.values()))[1] == 0
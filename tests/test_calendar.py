@@ -0,0 +1,82 @@
+import datetime
+
+import app
+from conftest import WeekUpload
+
+def week_of(monday):
+    return [monday + datetime.timedelta(days=i) for i in range(7)]
+
+def test_dates_with_years_in_any_cell_style():
+    monday = datetime.date(2025, 10, 27)
+    cells = ('27 ΟΚΤΩΒΡΙΟΥ 2025', '28/10/25', datetime.datetime(2025, 10, 29), '', None, '1/11', '2 ΝΟΕΜΒΡΙΟΥ')
+    week = app.resolve_week_dates(cells)
+    assert week.dates == week_of(monday)
+    assert week.months == [10] * 5 + [11] * 2
+    assert week.included_days(11) == [False] * 5 + [True] * 2
+
+def test_year_is_inferred_from_the_weekday_closest_to_today():
+    # 3 November is a Monday in 2025 and 2031, and in no year in between
+    cells = ('3 ΝΟΕΜΒΡΙΟΥ',) + ('',) * 6
+    assert app.resolve_week_dates(cells, today=datetime.date(2026, 10, 19)).start == datetime.date(2025, 11, 3)
+    assert app.resolve_week_dates(cells, today=datetime.date(2031, 6, 1)).start == datetime.date(2031, 11, 3)
+
+def test_month_names_without_days_keep_month_filtering():
+    week = app.resolve_week_dates(('ΝΟΕΜΒΡΙΟΥ',) * 3 + ('ΔΕΚΕΜΒΡΙΟΥ',) * 4)
+    assert week.dates == [None] * 7
+    assert week.start is None
+    assert week.included_days(12) == [False] * 3 + [True] * 4
+
+def test_undated_week_includes_every_day():
+    week = app.resolve_week_dates(('',) * 7)
+    assert week.included_days(11) == [True] * 7
+    assert app.week_sort_key('3_ΝΟΕ - 9_ΝΟΕ(ΕΠΙΘ).xlsx', week)[0] == 1
+
+def test_excluded_days_are_left_out():
+    week = app.WeekDates(week_of(datetime.date(2025, 11, 3)), [11] * 7).excluding([0, 6])
+    assert week.included_days(11) == [False] + [True] * 5 + [False]
+    assert app.included_day_count(app.week_include_col_map(week, 11)) == 5
+
+def test_calendar_locates_dates_and_reports_overlaps():
+    calendar = app.ScheduleCalendar()
+    first = app.WeekDates(week_of(datetime.date(2025, 10, 27)), [10] * 5 + [11] * 2)
+    shifted = app.WeekDates(week_of(datetime.date(2025, 11, 1)), [11] * 7)
+    assert calendar.add_week('a', first) == []
+    assert calendar.add_week('b', shifted) == [datetime.date(2025, 11, 1), datetime.date(2025, 11, 2)]
+    assert calendar.locate(datetime.date(2025, 11, 2)) == ('a', 6, app.DAY_FIRST_COLUMNS[6])
+    assert calendar.locate(datetime.date(2025, 11, 3)) == ('b', 2, app.DAY_FIRST_COLUMNS[2])
+    assert calendar.holidays() == {datetime.date(2025, 10, 28): "28η Οκτωβρίου"}
+    assert calendar.holidays(target_month=11) == {}
+
+def test_orthodox_easter_and_moving_holidays():
+    assert app.orthodox_easter(2025) == datetime.date(2025, 4, 20)
+    assert app.orthodox_easter(2024) == datetime.date(2024, 5, 5)
+    assert app.holiday_name(datetime.date(2024, 6, 24)) == "Αγίου Πνεύματος"
+    assert app.holiday_name(datetime.date(2025, 11, 3)) is None
+
+def test_duplicate_upload_is_skipped(make_week):
+    upload = make_week(datetime.date(2025, 11, 3), seed=1)
+    copy = WeekUpload('copy.xlsx', upload.getvalue())
+    upload_index = app.UploadIndex()
+    week_list = app.load_weeks([upload, copy], upload_index=upload_index)
+    assert [name for name, _, _ in week_list] == [upload.name]
+    assert upload_index.warnings() == [f"Το αρχείο 'copy.xlsx' είναι ίδιο με το '{upload.name}' και παραλείφθηκε."]
+
+def test_overlapping_days_are_counted_once(make_week):
+    monday = datetime.date(2025, 11, 3)
+    first, reissued = make_week(monday, seed=1), make_week(monday, seed=2, name='reissued.xlsx')
+    upload_index = app.UploadIndex()
+    week_list = app.load_weeks([first, reissued], upload_index=upload_index)
+    assert [name for name, _, _ in week_list] == [first.name]
+    assert upload_index.overlaps == [('reissued.xlsx', [first.name], week_of(monday))]
+    stats = app.process_payroll(None, 11, week_list=week_list)[2]
+    assert stats == app.process_payroll(None, 11, week_list=app.load_weeks([first]))[2]
+
+def test_partly_covered_week_keeps_its_other_days():
+    upload_index = app.UploadIndex()
+    first = app.WeekDates(week_of(datetime.date(2025, 11, 3)), [11] * 7)
+    late = app.WeekDates(week_of(datetime.date(2025, 11, 8)), [11] * 7)
+    assert upload_index.claim_week('a', first) is first
+    claimed = upload_index.claim_week('b', late)
+    assert claimed.excluded == frozenset({0, 1})
+    assert claimed.included_days(11) == [False, False] + [True] * 5
+    assert "(08/11, 09/11)" in upload_index.warnings()[0]
@@ -0,0 +1,48 @@
+import pytest
+
+import app
+
+@pytest.fixture
+def cost_run(november_uploads):
+    week_list = app.load_weeks(november_uploads)
+    work_days = app.scan_cost_inputs(None, 11, week_list=week_list)[0]
+    costs = {name: 40.0 + 7.5 * i for i, name in enumerate(sorted(work_days))}
+    _, location_costs, _, cube = app.process_cost_analysis(None, costs, 11, week_list=week_list)
+    return location_costs, cube
+
+def test_store_totals_are_the_location_costs(cost_run):
+    location_costs, cube = cost_run
+    totals = {store: measures[2] for (store,), measures in cube.rollup(('store',)).items()}
+    assert totals == pytest.approx({store: cost for store, cost in location_costs.items() if cost})
+    assert cube.values('store') == [store for store in app.STORE_COLORS if store in totals]
+
+@pytest.mark.parametrize('dimension', ['week', 'employee', 'weekday'])
+def test_drill_down_adds_up_to_the_store_totals(cost_run, dimension):
+    _, cube = cost_run
+    stores = cube.rollup(('store',))
+    by_store = {}
+    for (store, _), measures in cube.rollup(('store', dimension)).items():
+        total = by_store.setdefault(store, [0.0, 0, 0.0])
+        for i, value in enumerate(measures):
+            total[i] += value
+    assert by_store.keys() == {store for (store,) in stores}
+    for (store,), measures in stores.items():
+        assert by_store[store] == pytest.approx(measures)
+
+def test_filters_and_pivot(cost_run):
+    _, cube = cost_run
+    store = cube.values('store')[0]
+    filtered = cube.rollup(('week',), {'store': [store]})
+    assert sum(m[2] for m in filtered.values()) == pytest.approx(cube.rollup(('store',))[(store,)][2])
+    table = cube.pivot('weekday', 'store', 'cost', {'store': [store]})
+    assert all(set(row) == {'ΗΜΕΡΑ', store, 'ΣΥΝΟΛΟ'} for row in table)
+    assert [row['ΗΜΕΡΑ'] for row in table] == [app.WEEKDAY_NAMES[d] for d in cube.values('weekday')
+                                               if any(key[0] == store and key[3] == d for key in cube.cells)]
+
+def test_shifts_in_one_store_on_one_day_are_one_worked_day():
+    cube = app.CostCube()
+    cube.add('ΡΕΝΤΗΣ', 'w1', 'ΑΝΝΑ', 0, 4.0, 50.0)
+    cube.add('ΡΕΝΤΗΣ', 'w1', 'ΑΝΝΑ', 0, 3.0, 0.0)
+    cube.add('ΑΙΓΑΛΕΩ', 'w1', 'ΑΝΝΑ', 1, 8.0, 50.0)
+    assert cube.rollup(('store',)) == {('ΡΕΝΤΗΣ',): [7.0, 1, 50.0], ('ΑΙΓΑΛΕΩ',): [8.0, 1, 50.0]}
+    assert cube.rollup(('employee',)) == {('ΑΝΝΑ',): [15.0, 2, 100.0]}
@@ -0,0 +1,48 @@
+import io
+
+import openpyxl
+import pytest
+
+import app
+from conftest import WeekUpload
+
+@pytest.mark.parametrize('value, expected', [
+    (1200, 1200.0), (1234.5, 1234.5),
+    ('1.234,56', 1234.56), ('1,234.56', 1234.56), ('1234,5', 1234.5), ('1234.56 €', 1234.56),
+    # Greek thousands without decimals
+    ('1.500', 1500.0), ('€ 1.200', 1200.0), ('1.250.000', 1250000.0),
+    # A dot that is not followed by three digits is a decimal point
+    ('1.5', 1.5), ('12.50', 12.5), ('1234.567', 1234.567),
+    (None, None), ('', None), ('ΚΟΣΤΟΣ', None), (True, None),
+])
+def test_parse_cost_value(value, expected):
+    assert app.parse_cost_value(value) == expected
+
+def test_cost_table_from_a_workbook():
+    wb = openpyxl.Workbook()
+    for row in [('ΟΝΟΜΑΤΕΠΩΝΥΜΟ', 'ΚΟΣΤΟΣ'), ('ΜΑΡΙΑ ΠΑΠΑ (8ΩΡΟΣ)', 1200), ('ΓΙΩΡΓΟΣ ΝΙΚΟΥ', '1.500'),
+                (None, 300), ('ΣΗΜΕΙΩΣΗ', 'χωρίς κόστος')]:
+        wb.active.append(row)
+    buffer = io.BytesIO()
+    wb.save(buffer)
+    rows = app.read_cost_table(WeekUpload('κόστη.xlsx', buffer.getvalue()))
+    assert rows == [('ΜΑΡΙΑ ΠΑΠΑ (8ΩΡΟΣ)', 1200.0), ('ΓΙΩΡΓΟΣ ΝΙΚΟΥ', 1500.0)]
+
+def test_cost_table_from_a_greek_csv():
+    text = 'ΟΝΟΜΑΤΕΠΩΝΥΜΟ;ΚΟΣΤΟΣ\r\nΜΑΡΙΑ ΠΑΠΑ;1.234,56\r\nΓΙΩΡΓΟΣ ΝΙΚΟΥ;€ 1.200\r\nΕΛΕΝΗ ΔΗΜΟΥ;\r\n'
+    rows = app.read_cost_table(WeekUpload('κόστη.csv', text.encode('cp1253')))
+    assert rows == [('ΜΑΡΙΑ ΠΑΠΑ', 1234.56), ('ΓΙΩΡΓΟΣ ΝΙΚΟΥ', 1200.0)]
+
+def test_accents_do_not_matter_either_way():
+    matched, unmatched = app.match_cost_table([('Μαρία Παπά', 1200.0), ('ΓΙΏΡΓΟΣ ΝΊΚΟΥ', 800.0)],
+                                              ['ΜΑΡΙΑ ΠΑΠΑ', 'Γιώργος Νίκου'])
+    assert matched == {'ΜΑΡΙΑ ΠΑΠΑ': 1200.0, 'Γιώργος Νίκου': 800.0} and unmatched == []
+
+def test_cost_rows_are_matched_to_the_roster():
+    roster = ['ΜΑΡΙΑ ΠΑΠΑ (8ΩΡΟΣ)', 'ΓΙΩΡΓΟΣ ΝΙΚΟΥ', 'ΕΛΕΝΗ ΔΗΜΟΥ']
+    rows = [('μαρια  παπα', 1200.0), ('ΓΙΩΡΓΟΣ ΝΙΚΟΥ (4ΩΡΟΣ)', 800.0), ('ΚΑΠΟΙΟΣ ΑΛΛΟΣ', 500.0),
+            ('ΕΛΕΝΗ ΔΗΜΟΥ', -10.0)]
+    matched, unmatched = app.match_cost_table(rows, roster)
+    assert matched == {'ΜΑΡΙΑ ΠΑΠΑ (8ΩΡΟΣ)': 1200.0, 'ΓΙΩΡΓΟΣ ΝΙΚΟΥ': 800.0}
+    # Unknown names and negative costs are reported, not applied
+    assert unmatched == ['ΚΑΠΟΙΟΣ ΑΛΛΟΣ', 'ΕΛΕΝΗ ΔΗΜΟΥ']
@@ -0,0 +1,67 @@
+import datetime
+
+import openpyxl
+
+import app
+
+DAY = datetime.date(2025, 11, 4)
+
+def naive_coverage(intervals, target_month, slot_minutes=app.COVERAGE_SLOT_MINUTES):
+    """Headcounts slot by slot, the slow way the sweep must agree with."""
+    day_slots = 24 * 60 // slot_minutes
+    counts = {}
+    for store, date, start, end in intervals:
+        for slot in range(start // slot_minutes, -(-end // slot_minutes)):
+            day = date + datetime.timedelta(days=slot // day_slots)
+            if day.month == target_month:
+                counts.setdefault((store, day), [0] * day_slots)[slot % day_slots] += 1
+    return counts
+
+def test_parse_shift():
+    assert app.parse_shift('09:00-17:00') == (540, 1020)
+    assert app.parse_shift('10:00-18:00 [ΑΙΓΑΛΕΩ]') == (600, 1080)
+    assert app.parse_shift('22:00-06:00') == (1320, 1800)
+    assert app.parse_shift('ΡΕΠΟ') is None
+    assert app.parse_shift('Α') is None
+    assert app.parse_shift('9-17') is None
+
+def test_sweep_counts_partly_covered_slots():
+    intervals = [app.ShiftInterval('ΡΕΝΤΗΣ', DAY, 540, 1020), app.ShiftInterval('ΡΕΝΤΗΣ', DAY, 600, 610),
+                 app.ShiftInterval('ΑΙΓΑΛΕΩ', DAY, 545, 560)]
+    counts = app.sweep_coverage(intervals, 11)
+    assert counts[('ΡΕΝΤΗΣ', DAY)][35] == 0
+    assert counts[('ΡΕΝΤΗΣ', DAY)][36] == 1
+    assert counts[('ΡΕΝΤΗΣ', DAY)][40] == 2
+    assert counts[('ΡΕΝΤΗΣ', DAY)][67] == 1
+    assert counts[('ΡΕΝΤΗΣ', DAY)][68] == 0
+    # 09:05-09:20 touches the 09:00 and 09:15 slots
+    assert [slot for slot, n in enumerate(counts[('ΑΙΓΑΛΕΩ', DAY)]) if n] == [36, 37]
+
+def test_overnight_shift_continues_next_day_within_the_month():
+    last_day = datetime.date(2025, 11, 30)
+    intervals = [app.ShiftInterval('ΠΕΙΡΑΙΑΣ', DAY, 22 * 60, 30 * 60),
+                 app.ShiftInterval('ΠΕΙΡΑΙΑΣ', last_day, 22 * 60, 30 * 60)]
+    counts = app.sweep_coverage(intervals, 11)
+    next_day = DAY + datetime.timedelta(days=1)
+    assert sum(counts[('ΠΕΙΡΑΙΑΣ', DAY)]) == 8 and sum(counts[('ΠΕΙΡΑΙΑΣ', next_day)]) == 24
+    assert ('ΠΕΙΡΑΙΑΣ', datetime.date(2025, 12, 1)) not in counts
+
+def test_sweep_matches_slot_by_slot_counts(november_uploads):
+    intervals = app.collect_shift_intervals(app.load_weeks(november_uploads), 11)
+    assert intervals
+    assert app.sweep_coverage(intervals, 11) == naive_coverage(intervals, 11)
+
+def test_month_coverage_and_table(november_uploads):
+    coverage = app.store_coverage(app.load_weeks(november_uploads), 11)
+    assert coverage['dates'] == [datetime.date(2025, 11, d) for d in range(1, 31)]
+    assert all(date.month == 11 for _, date in coverage['counts'])
+    labels, dates, rows = app.coverage_table(coverage, 'ΡΕΝΤΗΣ')
+    assert dates == coverage['dates']
+    assert len(rows) == len(labels) and all(len(row) == len(dates) for row in rows)
+    # Trimmed to the store's staffed hours
+    assert any(rows[0]) and any(rows[-1])
+
+def test_coverage_sheet_is_added_to_the_payroll(november_uploads):
+    output = app.process_payroll(None, 11, week_list=app.load_weeks(november_uploads))[0]
+    wb = openpyxl.load_workbook(output)
+    assert wb.sheetnames == ['ΜΙΣΘΟΔΟΣΙΑ', 'ΚΑΛΥΨΗ']
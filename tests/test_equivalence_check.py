@@ -0,0 +1,19 @@
+import equivalence_check
+
+def test_blocks_line_up_in_any_week_order():
+    first = {'A1': '5_ΙΑΝ - 11_ΙΑΝ', 'A2': 'ΟΝΟΜΑ', 'B3': 8, 'A5': '29_ΔΕΚ - 4_ΙΑΝ', 'A6': 'ΟΝΟΜΑ', 'B7': 4}
+    swapped = {'A1': '29_ΔΕΚ - 4_ΙΑΝ', 'A2': 'ΟΝΟΜΑ', 'B3': 4, 'A5': '5_ΙΑΝ - 11_ΙΑΝ', 'A6': 'ΟΝΟΜΑ', 'B7': 8}
+    assert equivalence_check.sheet_blocks(first) == equivalence_check.sheet_blocks(swapped)
+    swapped['B7'] = 9
+    assert equivalence_check.diff_mapping('sheet', equivalence_check.sheet_blocks(first),
+                                          equivalence_check.sheet_blocks(swapped)) == \
+        ["sheet[5_ΙΑΝ - 11_ΙΑΝ +2:B]: reference=8 candidate=9"]
+
+def test_blocks_with_the_same_first_cell_stay_apart():
+    blocks = equivalence_check.sheet_blocks({'A1': 'ΟΝΟΜΑ', 'B1': 1, 'A3': 'ΟΝΟΜΑ', 'B3': 2})
+    assert blocks == {'ΟΝΟΜΑ +0:A': 'ΟΝΟΜΑ', 'ΟΝΟΜΑ +0:B': 1, "ΟΝΟΜΑ' +0:A": 'ΟΝΟΜΑ', "ΟΝΟΜΑ' +0:B": 2}
+
+def test_january_after_the_year_boundary_matches_the_reference():
+    # Weeks of late December sort first by date but last by file name in the reference
+    assert equivalence_check.main(['--months', '1', '--year', '2026', '--seeds', '1',
+                                   '--candidates', 'native', 'combined']) == 0
@@ -0,0 +1,34 @@
+import openpyxl
+
+import app
+
+def workbook_values(output):
+    wb = openpyxl.load_workbook(output)
+    return {ws.title: {cell.coordinate: cell.value for row in ws.iter_rows() for cell in row if cell.value is not None}
+            for ws in wb.worksheets}
+
+def test_one_pass_gives_the_separate_reports(november_uploads):
+    work_days = app.get_monthly_work_days(november_uploads, 11)
+    costs = {name: (900.0 + 37.5 * i) / days for i, (name, days) in enumerate(sorted(work_days.items())) if days}
+    payroll_file, payroll_filename, monthly_stats = app.process_payroll(november_uploads, 11)
+    cost_file, location_costs = app.process_cost_analysis(november_uploads, costs, 11)[:2]
+
+    reports = app.run_monthly_reports(november_uploads, 11, costs)
+    assert reports['monthly_stats'] == monthly_stats
+    assert reports['payroll_filename'] == payroll_filename
+    assert reports['work_days'] == work_days
+    assert reports['location_costs'] == location_costs
+    assert workbook_values(reports['payroll_file']) == workbook_values(payroll_file)
+    assert workbook_values(reports['cost_file']) == workbook_values(cost_file)
+    assert reports['monthly_totals'] == {field: sum(stats[field] for stats in monthly_stats.values())
+                                         for field in app.EMPLOYEE_STATS_FIELDS}
+
+def test_one_pass_adds_into_the_given_aggregates(november_uploads):
+    week_list = app.load_weeks(november_uploads)
+    monthly = app.Aggregates(app.EMPLOYEE_STATS_FIELDS)
+    weeks = []
+    reports = app.run_monthly_reports(None, 11, {}, week_list=week_list, aggregates=monthly,
+                                      week_done=lambda week_idx, week_stats: weeks.append(week_idx))
+    assert weeks == list(range(len(week_list)))
+    assert monthly.records() == reports['monthly_stats']
+    assert all(cost == 0 for cost in reports['location_costs'].values())
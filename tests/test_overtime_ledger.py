@@ -0,0 +1,57 @@
+import datetime
+
+import app
+
+def stats(overtime, overwork=0.0, sundays=0, days_worked=20):
+    return {'overwork': overwork, 'overtime': overtime, 'sundays': sundays, 'days_worked': days_worked}
+
+def test_year_to_date_runs_from_january():
+    ledger = app.OvertimeLedger()
+    ledger.record_month(2025, 3, {'ΑΝΝΑ': stats(10.0, sundays=1)})
+    ledger.record_month(2025, 1, {'ΑΝΝΑ': stats(5.0), 'ΗΛΙΑΣ': stats(2.5, overwork=4.0)})
+    assert ledger.recorded_months(2025) == [1, 3]
+    assert ledger.year_to_date(2025, 1, 'ΑΝΝΑ') == stats(5.0)
+    # A month without a payroll carries the totals so far
+    assert ledger.year_to_date(2025, 2, 'ΑΝΝΑ') == stats(5.0)
+    assert ledger.year_to_date(2025, 12, 'ΑΝΝΑ') == stats(15.0, sundays=1, days_worked=40)
+    assert ledger.year_to_date(2025, 12, 'ΗΛΙΑΣ') == stats(2.5, overwork=4.0)
+    assert ledger.year_to_date(2024, 12, 'ΑΝΝΑ') == stats(0, overwork=0, days_worked=0)
+
+def test_recording_a_month_again_replaces_it():
+    ledger = app.OvertimeLedger()
+    ledger.record_month(2025, 1, {'ΑΝΝΑ': stats(5.0), 'ΗΛΙΑΣ': stats(1.0)})
+    ledger.record_month(2025, 2, {'ΑΝΝΑ': stats(3.0)})
+    ledger.record_month(2025, 1, {'ΑΝΝΑ': stats(7.0)})
+    assert ledger.year_to_date(2025, 2, 'ΑΝΝΑ')['overtime'] == 10.0
+    assert ledger.year_to_date(2025, 2, 'ΗΛΙΑΣ')['overtime'] == 0
+
+def test_ledger_is_saved_in_the_data_folder():
+    app.record_payroll_month(2025, 11, {'ΑΝΝΑ': stats(12.5)})
+    app.record_payroll_month(2025, 12, {'ΑΝΝΑ': stats(1.5)})
+    assert app.OVERTIME_LEDGER_PATH.startswith(app.DATA_DIR)
+    ledger = app.OvertimeLedger()
+    assert ledger.recorded_months(2025) == [11, 12]
+    assert ledger.year_to_date(2025, 12, 'ΑΝΝΑ')['overtime'] == 14.0
+
+def test_unreadable_ledger_starts_empty(tmp_path):
+    path = tmp_path / 'ledger.json'
+    path.write_text('{not json', encoding='utf-8')
+    assert app.OvertimeLedger(str(path)).years == {}
+    assert app.OvertimeLedger(str(tmp_path / 'missing.json')).years == {}
+
+def test_limit_warnings_from_the_warning_share():
+    ledger = app.OvertimeLedger()
+    limit = app.ANNUAL_OVERTIME_LIMIT_HOURS
+    at_share = limit * app.OVERTIME_WARNING_SHARE
+    ledger.record_month(2025, 6, {'ΑΝΝΑ': stats(at_share), 'ΗΛΙΑΣ': stats(at_share - 0.5),
+                                  'ΜΑΡΙΑ': stats(limit + 10.0)})
+    warnings = ledger.limit_warnings(2025, 6, ['ΑΝΝΑ', 'ΗΛΙΑΣ', 'ΜΑΡΙΑ', 'ΚΑΝΕΝΑΣ'])
+    assert warnings == [('ΜΑΡΙΑ', limit + 10.0, (limit + 10.0) / limit),
+                        ('ΑΝΝΑ', at_share, app.OVERTIME_WARNING_SHARE)]
+    assert ledger.limit_warnings(2025, 6, ['ΗΛΙΑΣ'], limit=at_share - 0.5) == [('ΗΛΙΑΣ', at_share - 0.5, 1.0)]
+
+def test_payroll_year_follows_the_target_month(november_uploads):
+    week_list = app.load_weeks(november_uploads)
+    assert app.payroll_year(week_list, 11) == 2025
+    undated = [('week', None, app.WeekDates([None] * 7, [11] * 7))]
+    assert app.payroll_year(undated, 11) == datetime.date.today().year
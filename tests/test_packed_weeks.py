@@ -0,0 +1,96 @@
+import datetime
+
+import pytest
+
+import app
+from conftest import EMPLOYEES
+
+MONDAY = datetime.date(2025, 11, 3)
+
+def sheet_cells(ws, employees):
+    """Every cell a report reads: header rows, names, and the layout's values and fills."""
+    cells = []
+    for r in range(1, app.LAYOUT.header_rows + 1):
+        for c in range(1, app.LAYOUT.last_data_col + 1):
+            cell = ws.cell(row=r, column=c)
+            cells.append((cell.value, cell.has_style, cell.font.name, cell.font.size, cell.fill.start_color.index,
+                          cell.alignment.horizontal, cell.alignment.vertical, cell.alignment.wrap_text))
+    for row in range(app.LAYOUT.first_data_row, app.LAYOUT.first_data_row + employees):
+        cells.append(ws.cell(row=row, column=1).value)
+        for layout_col in app.LAYOUT.columns:
+            cell = ws.cell(row=row, column=layout_col.col)
+            cells.append((cell.value, cell.fill.start_color.index))
+    return cells
+
+@pytest.mark.parametrize('engine', ['native', 'openpyxl'])
+def test_packed_sheet_reads_like_its_source(make_week, engine):
+    source = app.load_week_sheet(make_week(MONDAY, seed=5), engine=engine)
+    week = app.read_week_dates(source)
+    ws = app.PackedSheet(app.pack_week(source, week))
+    assert ws.employees == len(EMPLOYEES) and ws.max_row == app.LAYOUT.first_data_row + len(EMPLOYEES) - 1
+    assert sheet_cells(ws, ws.employees) == sheet_cells(source, ws.employees)
+    assert ws.names == [app.clean_name(name) for name in EMPLOYEES]
+    assert (ws.week.dates, ws.week.months, ws.week.excluded) == (week.dates, week.months, week.excluded)
+
+def test_packed_arrays_hold_what_the_reports_compute(make_week):
+    source = app.load_week_sheet(make_week(MONDAY, seed=6))
+    ws = app.PackedSheet(app.pack_week(source, app.read_week_dates(source)))
+    for emp_row, name in enumerate(ws.names):
+        for layout_col in app.LAYOUT.columns:
+            i = emp_row * len(app.LAYOUT.columns) + layout_col.index
+            cell = source.cell(row=app.LAYOUT.first_data_row + emp_row, column=layout_col.col)
+            val = str(cell.value).strip() if cell.value else ""
+            hours = app.parse_hours(val, name) if val not in ["", "None", "RR", "ΡΕΠΟ"] else 0.0
+            assert ws.hours[i] == max(hours, 0.0)
+            assert bool(ws.flags[i] & app._PACKED_COST_WORK) == app.is_cost_work(val)
+            assert bool(ws.flags[i] & app._PACKED_LEAVE) == (val in ('ΑΝΑΡΡΩΤΙΚΗ', 'ΑΔΕΙΑ'))
+            assert app.LAYOUT.stores[ws.stores[i]] == app.resolve_cell_location(cell, layout_col.store)
+            shift = app.parse_shift(cell.value)
+            assert (ws.shift_starts[i], ws.shift_ends[i]) == (shift or (app._PACKED_NO_SHIFT, app._PACKED_NO_SHIFT))
+
+def test_scalars_come_back_with_their_types():
+    values = [None, 'ΚΕΙΜΕΝΟ', True, False, 1, 1.0, 0.1, datetime.datetime(2025, 11, 3, 9, 30),
+              datetime.date(2025, 11, 3), datetime.time(9, 30), datetime.timedelta(hours=8, minutes=30)]
+    font, fill, alignment = app._NativeFont('Arial', 10.0), app._NativeFill(app._NativeColor('00D9D9D9')), \
+        app._NativeAlignment('center', None, True)
+    cells = {(1, c): app._NativeCell(value, True, font, fill, alignment) for c, value in enumerate(values, start=1)}
+    empty = app._NativeCell(None, *app._PACKED_EMPTY_STYLE)
+    ws = app.PackedSheet(app.pack_week(app.NativeSheet(cells, empty), app.resolve_week_dates(('',) * 7)))
+    read = [ws.cell(row=1, column=c).value for c in range(1, len(values) + 1)]
+    assert read == values
+    assert [type(v) for v in read] == [type(v) for v in values]
+    assert ws.cell(row=1, column=2).font == font and ws.cell(row=1, column=2).alignment == alignment
+    assert ws.employees == 0 and ws.week.dates == [None] * 7
+
+def test_repack_only_changes_the_week_dates(make_week):
+    source = app.load_week_sheet(make_week(MONDAY, seed=2))
+    week = app.read_week_dates(source)
+    packed = app.pack_week(source, week)
+    ws = app.PackedSheet(packed)
+    claimed = week.excluding([0, 1])
+    repacked = app.PackedSheet(app.pack_week(ws, claimed))
+    assert repacked.week.excluded == frozenset({0, 1})
+    assert len(app.pack_week(ws, claimed)) == len(packed) == ws.nbytes
+    assert sheet_cells(repacked, ws.employees) == sheet_cells(ws, ws.employees)
+
+def test_formulas_are_flagged(make_week):
+    upload = make_week(MONDAY, rows=[('ΓΙΩΡΓΟΣ ΝΙΚΟΥ', {(0, 0): '=B3'})])
+    source = app.load_week_sheet(upload)
+    assert app.PackedSheet(app.pack_week(source, app.read_week_dates(source))).has_formulas
+    source = app.load_week_sheet(make_week(MONDAY))
+    assert not app.PackedSheet(app.pack_week(source, app.read_week_dates(source))).has_formulas
+
+def test_bad_buffers_are_rejected(make_week):
+    source = app.load_week_sheet(make_week(MONDAY))
+    packed = app.pack_week(source, app.read_week_dates(source))
+    with pytest.raises(ValueError):
+        app.PackedSheet(b'XXXX' + packed[4:])
+    with pytest.raises(ValueError):
+        app.PackedSheet(packed[:-1])
+
+def test_released_sheet_can_no_longer_be_read(make_week):
+    source = app.load_week_sheet(make_week(MONDAY))
+    ws = app.PackedSheet(bytearray(app.pack_week(source, app.read_week_dates(source))))
+    ws.release()
+    with pytest.raises(ValueError):
+        ws.hours[0]
@@ -0,0 +1,42 @@
+import zipfile
+
+import openpyxl
+
+import app
+
+def payroll_outputs(uploads):
+    week_list = app.load_weeks(uploads)
+    return {mode: app.process_payroll(None, 11, week_list=week_list, output_mode=mode)[0]
+            for mode in ('conditional', 'cells')}
+
+def cell_values(ws):
+    return {cell.coordinate: cell.value for row in ws.iter_rows() for cell in row if cell.value is not None}
+
+def test_conditional_mode_writes_the_same_values(november_uploads):
+    outputs = payroll_outputs(november_uploads)
+    books = {mode: openpyxl.load_workbook(output) for mode, output in outputs.items()}
+    assert books['conditional'].sheetnames == books['cells'].sheetnames
+    for title in books['cells'].sheetnames:
+        assert cell_values(books['conditional'][title]) == cell_values(books['cells'][title])
+
+def test_conditional_mode_styles_ranges_instead_of_cells(november_uploads):
+    outputs = payroll_outputs(november_uploads)
+    books = {mode: openpyxl.load_workbook(output) for mode, output in outputs.items()}
+    conditional, cells = books['conditional']['ΜΙΣΘΟΔΟΣΙΑ'], books['cells']['ΜΙΣΘΟΔΟΣΙΑ']
+    # Over-40h totals, overwork, overtime and the greyed-out days of the cut weeks
+    assert len(list(conditional.conditional_formatting)) == 4
+    assert not list(cells.conditional_formatting)
+    assert {'payroll_grid', 'payroll_calc'} <= set(books['conditional'].style_names)
+    assert 'payroll_grid' not in books['cells'].style_names
+
+    def solid_fills(ws):
+        return sum(1 for row in ws.iter_rows() for cell in row if cell.fill.fill_type == 'solid')
+
+    def distinct_styles(ws):
+        return len({cell.style_id for row in ws.iter_rows() for cell in row})
+    assert solid_fills(conditional) < solid_fills(cells)
+    assert distinct_styles(conditional) < distinct_styles(cells)
+    # The payroll sheet itself is the first worksheet part; ΚΑΛΥΨΗ is the same in both modes
+    sheet_sizes = {mode: zipfile.ZipFile(output).getinfo('xl/worksheets/sheet1.xml').file_size
+                   for mode, output in outputs.items()}
+    assert sheet_sizes['conditional'] < sheet_sizes['cells']
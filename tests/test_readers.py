@@ -0,0 +1,197 @@
+import datetime
+import io
+import zipfile
+
+import openpyxl
+import pytest
+
+import app
+from conftest import DAY_NAMES, MONTH_GENITIVE, WeekUpload, fill_week_sheet, random_rows, workbook_bytes
+
+MONDAY = datetime.date(2025, 11, 3)
+
+def layout_cells(ws):
+    """(value, fill colour) of every name and schedule cell of a week sheet."""
+    cells = []
+    row = app.LAYOUT.first_data_row
+    while ws.cell(row=row, column=1).value:
+        cells.append(ws.cell(row=row, column=1).value)
+        for layout_col in app.LAYOUT.columns:
+            cell = ws.cell(row=row, column=layout_col.col)
+            cells.append((cell.value, cell.fill.start_color.index if cell.value else None))
+        row += 1
+    return cells
+
+def header_cells(ws):
+    cells = []
+    for r in range(1, app.LAYOUT.header_rows + 1):
+        for c in range(1, app.LAYOUT.last_data_col + 1):
+            cell = ws.cell(row=r, column=c)
+            cells.append((cell.value, cell.has_style, cell.font.name, cell.alignment.horizontal,
+                          cell.fill.start_color.index if cell.has_style else None))
+    return cells
+
+def test_native_reader_matches_openpyxl(make_week):
+    upload = make_week(MONDAY, seed=7)
+    native = app.load_week_sheet(upload, engine="native")
+    reference = app.load_week_sheet(upload, engine="openpyxl")
+    assert isinstance(native, app.NativeSheet)
+    assert layout_cells(native) == layout_cells(reference)
+    assert header_cells(native) == header_cells(reference)
+
+def test_native_reader_resolves_week_dates(make_week):
+    week = app.read_week_dates(app.load_week_sheet(make_week(MONDAY), engine="native"))
+    assert week.dates == [MONDAY + datetime.timedelta(days=i) for i in range(7)]
+    assert week.months == [11] * 7
+
+def test_native_reader_keeps_formulas_as_written(make_week):
+    rows = [('ΓΙΩΡΓΟΣ ΝΙΚΟΥ', {(0, 0): '=B3'})]
+    upload = make_week(MONDAY, rows=rows)
+    cell = app.load_week_sheet(upload, engine="native").cell(row=app.LAYOUT.first_data_row, column=2)
+    assert cell.value == '=B3'
+    # Saved by openpyxl, so there is no cached value to read
+    cell = app.load_week_sheet(upload, data_only=True, engine="native").cell(row=app.LAYOUT.first_data_row, column=2)
+    assert cell.value is None
+
+def test_auto_engine_falls_back_to_openpyxl(make_week, monkeypatch):
+    def unsupported(data, data_only=False, active_only=False):
+        raise ValueError("Unsupported formula")
+    monkeypatch.setattr(app, 'read_native_sheets', unsupported)
+    upload = make_week(MONDAY, seed=3)
+    ws = app.load_week_sheet(upload, engine="auto")
+    assert not isinstance(ws, app.NativeSheet)
+    assert layout_cells(ws) == layout_cells(app.load_week_sheet(upload, engine="openpyxl"))
+
+def csv_week(monday, rows, delimiter=',', store_column=False):
+    """A week as a CSV export: Sunday cells name their store as "[ΣΤΟΡ]" or in a last column."""
+    width = app.LAYOUT.last_data_col
+    header = [[''] * width for _ in range(app.LAYOUT.header_rows)]
+    header[0][0] = 'ΟΝΟΜΑ'
+    for day, day_cols in enumerate(app.LAYOUT.day_columns):
+        date = monday + datetime.timedelta(days=day)
+        header[0][day_cols[0].col - 1] = DAY_NAMES[day]
+        header[1][day_cols[0].col - 1] = f"{date.day} {MONTH_GENITIVE[date.month]} {date.year}"
+        for layout_col in day_cols:
+            header[2][layout_col.col - 1] = layout_col.store or 'ΚΑΤΑΣΤΗΜΑ'
+    if store_column:
+        header[2].append('ΚΑΤΑΣΤΗΜΑ ΚΥΡΙΑΚΗΣ')
+    lines = header
+    for name, cells in rows:
+        line = [name] + [''] * (width - 1)
+        sunday_store = ''
+        for (day, store), value in cells.items():
+            day_cols = app.LAYOUT.day_columns[day]
+            if len(day_cols) > 1:
+                line[day_cols[store].col - 1] = value
+            elif store_column:
+                line[day_cols[0].col - 1] = value
+                sunday_store = app.LAYOUT.stores[store]
+            else:
+                line[day_cols[0].col - 1] = f"{value} [{app.LAYOUT.stores[store]}]"
+        if store_column:
+            line.append(sunday_store)
+        lines.append(line)
+    return '\n'.join(delimiter.join(line) for line in lines)
+
+def store_of(ws, row, column):
+    layout_col = app.LAYOUT.columns[app.LAYOUT.column_index[column]]
+    return app.resolve_cell_location(ws.cell(row=row, column=column), layout_col.store)
+
+def test_csv_week_charges_sunday_to_marked_store():
+    rows = [('ΓΙΩΡΓΟΣ ΝΙΚΟΥ', {(0, 1): '09:00-17:00', (6, 2): '10:00-18:00'})]
+    ws = app.load_week_sheet(WeekUpload('week.csv', csv_week(MONDAY, rows).encode('utf-8')))
+    row = app.LAYOUT.first_data_row
+    sunday = app.LAYOUT.day_columns[6][0].col
+    assert ws.cell(row=row, column=3).value == '09:00-17:00'
+    assert store_of(ws, row, 3) == 'ΑΙΓΑΛΕΩ'
+    assert ws.cell(row=row, column=sunday).value == '10:00-18:00'
+    assert store_of(ws, row, sunday) == 'ΠΕΙΡΑΙΑΣ'
+    assert app.read_week_dates(ws).start == MONDAY
+
+def test_csv_week_reads_sunday_store_column_tsv_and_cp1253():
+    rows = [('ΕΛΕΝΗ ΔΗΜΟΥ', {(6, 3): '09:00-15:00'})]
+    data = csv_week(MONDAY, rows, delimiter='\t', store_column=True).encode('cp1253')
+    ws = app.load_week_sheet(WeekUpload('week.tsv', data))
+    sunday = app.LAYOUT.day_columns[6][0].col
+    assert ws.cell(row=app.LAYOUT.first_data_row, column=1).value == 'ΕΛΕΝΗ ΔΗΜΟΥ'
+    assert store_of(ws, app.LAYOUT.first_data_row, sunday) == 'ΠΕΡΙΣΤΕΡΙ'
+
+def test_csv_semicolon_week_gives_the_same_payroll_as_xlsx(make_week):
+    rows = random_rows(11)
+    xlsx = make_week(MONDAY, rows=rows)
+    csv_upload = WeekUpload(xlsx.name.replace('.xlsx', '.csv'), csv_week(MONDAY, rows, delimiter=';').encode('utf-8'))
+    expected = app.process_payroll(None, 11, week_list=app.load_weeks([xlsx]))[2]
+    assert app.process_payroll(None, 11, week_list=app.load_weeks([csv_upload]))[2] == expected
+
+def zip_upload(name, members):
+    buffer = io.BytesIO()
+    with zipfile.ZipFile(buffer, 'w', zipfile.ZIP_DEFLATED) as archive:
+        for member_name, data in members:
+            archive.writestr(member_name, data)
+    return WeekUpload(name, buffer.getvalue())
+
+def test_zip_upload_expands_to_its_week_files(november_uploads):
+    upload = zip_upload('november.zip', [(f"weeks/{f.name}", f.getvalue()) for f in november_uploads]
+                        + [('weeks/', b''), ('__MACOSX/weeks/._a.xlsx', b'x'), ('weeks/~$lock.xlsx', b'x'),
+                           ('weeks/.hidden.csv', b'x'), ('weeks/notes.txt', b'x')])
+    expanded = app.expand_week_uploads([upload, november_uploads[0]])
+    assert [f.name for f in expanded] == [f.name for f in november_uploads] + [november_uploads[0].name]
+    assert all(member.getvalue() == f.getvalue() for member, f in zip(expanded, november_uploads))
+
+def test_zip_members_are_decompressed_only_when_read(november_uploads, monkeypatch):
+    upload = zip_upload('november.zip', [(f.name, f.getvalue()) for f in november_uploads])
+    opened = []
+    original = zipfile.ZipFile.open
+    monkeypatch.setattr(zipfile.ZipFile, 'open', lambda self, name, *args, **kw: (opened.append(name), original(self, name, *args, **kw))[1])
+    expanded = app.expand_week_uploads([upload])
+    assert opened == [] and [f.size for f in expanded] == [len(f.getvalue()) for f in november_uploads]
+    assert expanded[2].getvalue() == november_uploads[2].getvalue()
+    assert len(opened) == 1
+
+@pytest.mark.parametrize('limit', ['ZIP_MEMBER_MAX_BYTES', 'ZIP_TOTAL_MAX_BYTES'])
+def test_oversized_zip_is_rejected_before_decompressing(november_uploads, monkeypatch, limit):
+    upload = zip_upload('november.zip', [(f.name, f.getvalue()) for f in november_uploads])
+    monkeypatch.setattr(app, limit, len(november_uploads[0].getvalue()) - 1)
+    with pytest.raises(ValueError, match='MB'):
+        app.expand_week_uploads([upload])
+
+def test_member_larger_than_its_header_says_is_cut_off(november_uploads, monkeypatch):
+    upload = zip_upload('november.zip', [(f.name, f.getvalue()) for f in november_uploads])
+    member = app.expand_week_uploads([upload])[0]
+    # As if the archive understated the size: the read stops at the limit
+    monkeypatch.setattr(app, 'ZIP_MEMBER_MAX_BYTES', member.size - 1)
+    with pytest.raises(ValueError, match='MB'):
+        member.getvalue()
+
+def test_zip_upload_gives_the_same_payroll_as_its_files(november_uploads):
+    upload = zip_upload('november.zip', [(f.name, f.getvalue()) for f in november_uploads])
+    expected = app.process_payroll(None, 11, week_list=app.load_weeks(november_uploads))[2]
+    assert app.process_payroll(None, 11, week_list=app.load_weeks([upload]))[2] == expected
+
+def test_broken_zip_is_an_error():
+    with pytest.raises(zipfile.BadZipFile):
+        app.expand_week_uploads([WeekUpload('broken.zip', b'PK not really')])
+
+def test_month_workbook_gives_one_week_per_dated_sheet(november_uploads):
+    mondays = [datetime.date(2025, 10, 27) + datetime.timedelta(weeks=i) for i in range(5)]
+    wb = openpyxl.Workbook()
+    wb.active.title = 'ΣΗΜΕΙΩΣΕΙΣ'
+    wb.active['A1'] = 'Πρόγραμμα Νοεμβρίου'
+    # Sheets out of date order: weeks are ordered by their dates
+    for i in (2, 0, 4, 1, 3):
+        fill_week_sheet(wb.create_sheet(f"ΕΒΔ {i + 1}"), mondays[i], random_rows(i))
+    upload = WeekUpload('ΝΟΕΜΒΡΙΟΣ.xlsx', workbook_bytes(wb))
+    week_list = app.load_weeks([upload])
+    assert [name for name, _, _ in week_list] == [f"ΝΟΕΜΒΡΙΟΣ - ΕΒΔ {i + 1}" for i in range(5)]
+    assert [week.start for _, _, week in week_list] == mondays
+    expected = app.process_payroll(None, 11, week_list=app.load_weeks(november_uploads))[2]
+    assert app.process_payroll(None, 11, week_list=week_list)[2] == expected
+
+def test_workbook_without_dated_sheets_gives_its_active_sheet():
+    wb = openpyxl.Workbook()
+    wb.active['A1'] = 'ΠΡΟΓΡΑΜΜΑ'
+    wb.create_sheet('ΑΛΛΟ')['A1'] = 'ΣΗΜΕΙΩΣΕΙΣ'
+    sheets = app.load_week_sheets(WeekUpload('undated.xlsx', workbook_bytes(wb)))
+    selected = app.select_week_sheets(sheets)
+    assert len(selected) == 1
+    assert selected[0][1].cell(row=1, column=1).value == 'ΠΡΟΓΡΑΜΜΑ'
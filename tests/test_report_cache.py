@@ -0,0 +1,74 @@
+import os
+import pickle
+
+import app
+from conftest import WeekUpload
+
+def blob_size(result):
+    return len(pickle.dumps(result, protocol=pickle.HIGHEST_PROTOCOL))
+
+def test_least_recently_used_reports_go_first():
+    report = {'data': b'x' * 1000}
+    cache = app.ReportCache(max_bytes=blob_size(report) * 2, directory=None)
+    cache.put('a', report)
+    cache.put('b', report)
+    assert cache.get('a') == report
+    cache.put('c', report)
+    assert cache.get('b') is None
+    assert cache.get('a') == report and cache.get('c') == report
+    assert cache.size == blob_size(report) * 2
+
+def test_report_larger_than_the_cache_is_not_kept():
+    cache = app.ReportCache(max_bytes=100, directory=None)
+    cache.put('a', {'data': b'x' * 1000})
+    assert cache.get('a') is None and cache.size == 0
+
+def test_reports_on_disk_outlive_the_process(tmp_path):
+    report = {'payroll_data': b'PK...', 'monthly_stats': {'ΑΝΝΑ': {'overtime': 1.5}}}
+    app.ReportCache(directory=str(tmp_path)).put('a', report)
+    assert app.ReportCache(directory=str(tmp_path)).get('a') == report
+    assert app.ReportCache(directory=str(tmp_path)).get('missing') is None
+
+def test_disk_is_pruned_oldest_first(tmp_path):
+    report = {'data': b'x' * 1000}
+    cache = app.ReportCache(max_bytes=blob_size(report) * 2, directory=str(tmp_path))
+    for written, key in [(2000, 'a'), (1000, 'b')]:
+        cache.put(key, report)
+        os.utime(cache._path(key), (written, written))
+    cache.put('c', report)
+    assert sorted(os.listdir(tmp_path)) == ['a.pickle', 'c.pickle']
+
+def test_pruning_skips_files_removed_by_another_session(tmp_path, monkeypatch):
+    report = {'data': b'x' * 1000}
+    cache = app.ReportCache(max_bytes=blob_size(report), directory=str(tmp_path))
+    cache.put('a', report)
+    listdir = os.listdir
+    # Another session prunes 'gone' between our listing and our stat/unlink
+    monkeypatch.setattr(app.os, 'listdir', lambda path: listdir(path) + ['gone.pickle'])
+    cache.put('b', report)
+    assert listdir(tmp_path) == ['b.pickle']
+    unlink = os.unlink
+
+    def raced_unlink(path):
+        unlink(path)
+        raise FileNotFoundError(path)
+    monkeypatch.setattr(app.os, 'unlink', raced_unlink)
+    cache.put('c', report)
+    assert listdir(tmp_path) == ['c.pickle']
+
+def test_key_follows_every_input(monkeypatch):
+    uploads = [WeekUpload('a.xlsx', b'one'), WeekUpload('b.xlsx', b'two')]
+    key = app.report_cache_key('costs', uploads, 11, {'ΑΝΝΑ': 50.0})
+    assert key == app.report_cache_key('costs', [WeekUpload('a.xlsx', b'one'), WeekUpload('b.xlsx', b'two')],
+                                       11, {'ΑΝΝΑ': 50.0})
+    changed = [
+        app.report_cache_key('payroll', uploads, 11, {'ΑΝΝΑ': 50.0}),
+        app.report_cache_key('costs', uploads, 12, {'ΑΝΝΑ': 50.0}),
+        app.report_cache_key('costs', uploads, 11, {'ΑΝΝΑ': 50.5}),
+        app.report_cache_key('costs', uploads, 11, {'ΑΝΝΑ': 50.0, 'ΗΛΙΑΣ': 40.0}),
+        app.report_cache_key('costs', [uploads[0], WeekUpload('b.xlsx', b'three')], 11, {'ΑΝΝΑ': 50.0}),
+        app.report_cache_key('costs', [uploads[0], WeekUpload('c.xlsx', b'two')], 11, {'ΑΝΝΑ': 50.0}),
+    ]
+    monkeypatch.setattr(app, 'PAYROLL_OUTPUT_MODE', 'cells')
+    changed.append(app.report_cache_key('costs', uploads, 11, {'ΑΝΝΑ': 50.0}))
+    assert len(set(changed + [key])) == len(changed) + 1
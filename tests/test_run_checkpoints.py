@@ -0,0 +1,80 @@
+import pytest
+
+import app
+
+class Interrupted(Exception):
+    """Stands in for a lost session or a killed process."""
+
+def interrupt_after(monkeypatch, method, calls):
+    original = getattr(app.RunCheckpoint, method)
+    done = []
+
+    def interrupted(self, *args):
+        if len(done) == calls:
+            raise Interrupted
+        done.append(args[0])
+        return original(self, *args)
+    monkeypatch.setattr(app.RunCheckpoint, method, interrupted)
+
+def test_payroll_resumes_from_the_first_unfinished_week(november_uploads, monkeypatch):
+    monthly = app.Aggregates(app.EMPLOYEE_STATS_FIELDS)
+    stats = app.process_payroll(None, 11, week_list=app.load_weeks(november_uploads), aggregates=monthly)[2]
+
+    with monkeypatch.context() as patch:
+        interrupt_after(patch, 'save_week_stats', 2)
+        with pytest.raises(Interrupted):
+            app.build_payroll_report(november_uploads, 11)
+    run = app.RunCheckpoint.for_uploads(november_uploads, 11)
+    manifest = run.manifest()
+    assert manifest['weeks'] == 5 and manifest['payroll_weeks'] == 2
+    assert run.load_output('payroll') is None
+
+    finished = []
+    original = app.RunCheckpoint.save_week_stats
+    monkeypatch.setattr(app.RunCheckpoint, 'save_week_stats',
+                        lambda self, week_idx, week_stats: (finished.append(week_idx), original(self, week_idx, week_stats)))
+    resumed = app.resume_run_payroll(run)
+    assert finished == [2, 3, 4]
+    assert resumed['monthly_stats'] == stats
+    assert resumed['monthly_totals'] == monthly.totals()
+    assert app.RunCheckpoint.for_uploads(november_uploads, 11).load_output('payroll')['monthly_stats'] == stats
+
+def test_only_files_without_a_checkpoint_are_parsed_again(november_uploads, monkeypatch):
+    with monkeypatch.context() as patch:
+        interrupt_after(patch, '_save_file_weeks', 3)
+        with pytest.raises(Interrupted):
+            app.build_payroll_report(november_uploads, 11)
+    run = app.RunCheckpoint.for_uploads(november_uploads, 11)
+    assert len(run.manifest()['parsed']) == 3 and run.manifest()['weeks'] is None
+
+    parsed = []
+    original = app.WeekParseCache.get
+    monkeypatch.setattr(app.WeekParseCache, 'get', lambda self, f, **kw: (parsed.append(f.name), original(self, f, **kw))[1])
+    report = app.build_payroll_report(november_uploads, 11)
+    assert len(parsed) == 2
+    assert report['monthly_stats'] == app.process_payroll(None, 11, week_list=app.load_weeks(november_uploads))[2]
+
+def test_checkpointed_weeks_need_no_uploads_and_are_closed_after_use(november_uploads):
+    run = app.RunCheckpoint.for_uploads(november_uploads, 11)
+    with run.open_weeks(november_uploads):
+        pass
+    with run.open_weeks() as (week_list, warnings):
+        ws = week_list[0][1]
+        names = ws.names
+        assert [name for name, _, _ in week_list] == run.manifest()['week_names']
+    assert names
+    with pytest.raises(ValueError):
+        ws.names
+
+def test_missing_week_file_without_uploads_is_an_error(november_uploads):
+    run = app.RunCheckpoint.for_uploads(november_uploads, 11)
+    with pytest.raises(ValueError):
+        with run.open_weeks():
+            pass
+
+def test_runs_are_found_by_id_only_when_saved(november_uploads):
+    run = app.RunCheckpoint.for_uploads(november_uploads, 11)
+    assert app.RunCheckpoint.find(run.run_id).path == run.path
+    assert app.RunCheckpoint.find('0' * 16) is None
+    assert app.RunCheckpoint.find('../../etc') is None
+    assert app.RunCheckpoint.for_uploads(november_uploads, 12).run_id != run.run_id
@@ -0,0 +1,90 @@
+import pytest
+
+import app
+
+def rebuilt(scenario, edited_rows):
+    """The scenario rebuilt from scratch with the edits written into its cells."""
+    full = dict(scenario, cells=[list(c) for c in scenario['cells']], stores=[list(s) for s in scenario['stores']])
+    for row, edits in edited_rows.items():
+        for label, value in edits.items():
+            i = scenario['columns'].index(label)
+            text = (value or '').strip()
+            if app.LAYOUT.columns[i].store is None:
+                text, marker = app.split_store_marker(text)
+                full['stores'][row][i] = marker or full['stores'][row][i]
+            full['cells'][row][i] = text
+    full['stats'] = [app.scenario_row_stats(full, *row) for row in zip(full['names'], full['cells'], full['stores'])]
+    return app.price_scenario(full, scenario['daily_costs'])
+
+@pytest.fixture
+def november(november_uploads):
+    week_list = app.load_weeks(november_uploads)
+    names = app.process_payroll(None, 11, week_list=week_list)[2]
+    costs = {name: 40.0 + 7.5 * i for i, name in enumerate(names)}
+    return week_list, costs
+
+def test_weeks_add_up_to_the_month_reports(november):
+    week_list, costs = november
+    stats = app.process_payroll(None, 11, week_list=week_list)[2]
+    store_costs = app.process_cost_analysis(None, costs, 11, week_list=week_list)[1]
+    totals, stores = {}, {}
+    for file_name, ws, week in week_list:
+        scenario = app.week_scenario(file_name, ws, week, 11, costs)
+        for name, row in zip(scenario['names'], scenario['stats']):
+            total = totals.setdefault(name, dict.fromkeys(stats[name], 0))
+            for field in ('overwork', 'overtime', 'days_worked'):
+                total[field] += row[field]
+            total['sundays'] += row['sunday']
+        for store, (hours, cost) in scenario['store_totals'].items():
+            stores[store] = stores.get(store, 0.0) + cost
+    assert totals.keys() == stats.keys()
+    for name in stats:
+        assert totals[name] == pytest.approx(stats[name])
+    assert {store: stores.get(store, 0.0) for store in store_costs} == pytest.approx(store_costs)
+
+def test_no_edits_is_the_baseline(november):
+    (file_name, ws, week), costs = november[0][1], november[1]
+    scenario = app.week_scenario(file_name, ws, week, 11, costs)
+    result = app.evaluate_scenario(scenario, {0: {scenario['columns'][0]: scenario['cells'][0][0]}})
+    assert result['stats'] == scenario['stats']
+    assert result['changed'] == [] and result['changes'] == []
+    assert all(before == after for before, after in result['stores'].values())
+
+def test_edits_match_a_full_rebuild(november):
+    (file_name, ws, week), costs = november[0][1], november[1]
+    scenario = app.week_scenario(file_name, ws, week, 11, costs)
+    labels = scenario['columns']
+    sunday = next(i for i, c in enumerate(app.LAYOUT.columns) if c.store is None)
+    edits = {0: {labels[0]: '09:00-21:00', labels[5]: 'ΡΕΠΟ', labels[sunday]: '10:00-18:00 [ΠΕΙΡΑΙΑΣ]'},
+             3: {labels[2]: None}}
+    # The grid sends row numbers as strings after a rerun
+    result = app.evaluate_scenario(scenario, {'0': edits[0], 3: edits[3]})
+    full = rebuilt(scenario, edits)
+    assert result['stats'] == full['stats']
+    assert result['changed'][0] == 0 and set(result['changed']) <= {0, 3}
+    for store, (before, after) in result['stores'].items():
+        assert before == pytest.approx(scenario['store_totals'][store])
+        assert after == pytest.approx(full['store_totals'][store])
+    assert (0, sunday, app.scenario_cell_text(app.LAYOUT.columns[sunday], scenario['cells'][0][sunday],
+                                              scenario['stores'][0][sunday]),
+            '10:00-18:00 [ΠΕΙΡΑΙΑΣ]') in result['changes']
+
+def test_sunday_cells_carry_their_store(november):
+    file_name, ws, week = november[0][1]
+    scenario = app.week_scenario(file_name, ws, week, 11)
+    sunday = next(i for i, c in enumerate(app.LAYOUT.columns) if c.store is None)
+    row = next(r for r, cells in enumerate(scenario['cells']) if cells[sunday])
+    label = scenario['columns'][sunday]
+    assert app.scenario_grid(scenario)[row][label] == f"{scenario['cells'][row][sunday]} [{scenario['stores'][row][sunday]}]"
+    assert app.split_store_marker('10:00-18:00 [αιγαλεω ]') == ('10:00-18:00', 'ΑΙΓΑΛΕΩ')
+    assert app.split_store_marker('10:00-18:00 [ΑΛΛΟ]') == ('10:00-18:00 [ΑΛΛΟ]', None)
+
+def test_repricing_keeps_the_figures(november):
+    (file_name, ws, week), costs = november[0][1], november[1]
+    scenario = app.week_scenario(file_name, ws, week, 11)
+    assert all(cost == 0.0 for _, cost in scenario['store_totals'].values())
+    stats = scenario['stats']
+    app.price_scenario(scenario, costs)
+    assert scenario['stats'] is stats and scenario['daily_costs'] == costs
+    assert scenario['store_totals'] == app.scenario_store_totals(stats, scenario['names'], costs)
+    assert sum(cost for _, cost in scenario['store_totals'].values()) > 0